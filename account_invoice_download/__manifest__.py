@@ -13,6 +13,7 @@
     "website": "https://github.com/OCA/edi",
     "depends": [
         "account_invoice_import",
+        "queue_job",
     ],
     "data": [
         "security/rule.xml",
@@ -22,6 +23,7 @@
         "views/account_invoice_import_config.xml",
         "wizard/account_invoice_download_credentials_view.xml",
         "data/cron.xml",
+        "data/job_channel.xml",
     ],
     "installable": True,
 }
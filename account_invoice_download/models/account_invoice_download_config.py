@@ -3,7 +3,11 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
 from dateutil.relativedelta import relativedelta
 
 from odoo import _, api, fields, models
@@ -11,6 +15,10 @@ from odoo.exceptions import UserError
 
 logger = logging.getLogger(__name__)
 
+# Default number of parallel HTTP requests of a download
+DOWNLOAD_MAX_WORKERS = 4
+_HTTP_CALL_COUNT_LOCK = threading.Lock()
+
 
 class AccountInvoiceDownloadConfig(models.Model):
     _name = "account.invoice.download.config"
@@ -37,6 +45,14 @@ class AccountInvoiceDownloadConfig(models.Model):
     )
     # Don't set last_run as readonly because sometimes we need to
     # manually fool the system
+    last_invoice_date = fields.Date(
+        string="Last Invoice Date",
+        help="Date of the most recent invoice seen during a successful "
+        "download. When set, the next download starts from this date "
+        "(minus the backward days) instead of the last download date. "
+        "As this date is not after the last download date, the invoices "
+        "published late by the supplier are downloaded too.",
+    )
     backward_days = fields.Integer(
         string="Backward Days",
         help="By default, Odoo will download all invoices that are "
@@ -103,16 +119,15 @@ class AccountInvoiceDownloadConfig(models.Model):
         ),
     ]
 
-    @api.depends("backward_days", "last_run")
+    @api.depends("backward_days", "last_run", "last_invoice_date")
     def _compute_download_start_date(self):
         for config in self:
-            start_date = False
-            if config.last_run:
-                start_date = config.last_run
-                if config.backward_days:
-                    start_date = config.last_run - relativedelta(
-                        days=config.backward_days
-                    )
+            # Start from the most recent invoice already downloaded: it is
+            # not after the last run, so the invoices dated between them but
+            # published after the last run are not missed
+            start_date = config.last_invoice_date or config.last_run
+            if start_date and config.backward_days:
+                start_date = start_date - relativedelta(days=config.backward_days)
             config.download_start_date = start_date
 
     @api.depends("name", "backend", "method")
@@ -139,10 +154,89 @@ class AccountInvoiceDownloadConfig(models.Model):
         """Returns a list of either:
             - pivot dict (example: ovh backend)
             - tuple: (invoice_file_b64, invoice_filename) (example: weboob).
-        This method is inherited in backend-specific modules
+        This method is inherited in backend-specific modules.
+        Backends should not request the details of the invoices
+        returned by _get_existing_refs(): run() would skip them anyway.
         """
         return []
 
+    def _get_existing_refs(self):
+        """Return a dict with key = reference of the existing supplier
+        invoices of the partner, value = invoice ID"""
+        self.ensure_one()
+        existing_invs = self.env["account.move"].search_read(
+            [
+                ("move_type", "in", ("in_invoice", "in_refund")),
+                ("commercial_partner_id", "=", self.partner_id.id),
+                ("company_id", "=", self.company_id.id),
+                ("ref", "!=", False),
+            ],
+            ["ref"],
+        )
+        return {inv["ref"]: inv["id"] for inv in existing_invs}
+
+    @api.model
+    def _download_max_workers(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_invoice_download.max_workers", DOWNLOAD_MAX_WORKERS)
+        )
+
+    @api.model
+    def _download_session(self, logs=None):
+        """HTTP session reusing the connections of the requests of a download.
+        A session is not thread-safe: get one per thread of _download_map()
+        with _download_thread_local(). If logs is given, the HTTP calls
+        of the session are counted in logs["http_call_count"]"""
+        session = requests.Session()
+        if logs is not None:
+            session.hooks["response"].append(
+                lambda response, *args, **kwargs: self._download_count_http_call(logs)
+            )
+        return session
+
+    @api.model
+    def _download_count_http_call(self, logs, count=1):
+        """Count HTTP calls made outside of _download_session().
+        Can be called from the threads of _download_map()"""
+        with _HTTP_CALL_COUNT_LOCK:
+            logs["http_call_count"] = logs.get("http_call_count", 0) + count
+
+    @api.model
+    def _download_thread_local(self, factory, value=None):
+        """Return a function which gives to each thread its own object built
+        by factory(), for the HTTP sessions and API clients used by the
+        threads of _download_map(). value, if given, is the object of the
+        current thread.
+        """
+        local = threading.local()
+        if value is not None:
+            local.value = value
+
+        def get():
+            if not hasattr(local, "value"):
+                local.value = factory()
+            return local.value
+
+        return get
+
+    @api.model
+    def _download_map(self, func, items):
+        """Call func on each item in a bounded pool of threads.
+        func only does HTTP requests: it must not use the ORM, and it must
+        not share a session or a client with the other threads
+        (see _download_thread_local()).
+
+        :return: list of the results, in the order of items
+        """
+        items = list(items)
+        max_workers = min(self._download_max_workers(), len(items))
+        if max_workers <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, items))
+
     def run_button(self):
         self.ensure_one()
         if not self.backend:
@@ -193,7 +287,6 @@ class AccountInvoiceDownloadConfig(models.Model):
         """Do the real work. Handle try/except.
         Create log. Return list of invoices and log"""
         self.ensure_one()
-        amo = self.env["account.move"]
         aiio = self.env["account.invoice.import"]
         logger.info("Start to run invoice download %s (%s)", self.name, self.backend)
         if not self.backend:
@@ -204,12 +297,15 @@ class AccountInvoiceDownloadConfig(models.Model):
                 "Missing invoice import config on invoice download %s", self.name
             )
             return ([], False)
+        start = time.perf_counter()
         logs = {
             "msg": [],
             "result": "success",
+            "http_call_count": 0,
         }
         invoice_ids = []
         invoices_dl = []
+        skipped_count = 0
         try:
             invoices_dl = self.download(credentials, logs)
         except Exception as e:
@@ -219,19 +315,10 @@ class AccountInvoiceDownloadConfig(models.Model):
         company_id = self.company_id.id
         assert self.import_config_id.company_id.id == company_id
         import_config = self.import_config_id.convert_to_import_config()
-        existing_refs = {}  # key = invoice reference, value = inv ID
-        existing_invs = amo.search_read(
-            [
-                ("move_type", "in", ("in_invoice", "in_refund")),
-                ("commercial_partner_id", "=", self.partner_id.id),
-                ("company_id", "=", company_id),
-                ("ref", "!=", False),
-            ],
-            ["ref"],
-        )
-        for existing_inv in existing_invs:
-            existing_refs[existing_inv.get("ref")] = existing_inv["id"]
+        # key = invoice reference, value = inv ID
+        existing_refs = self._get_existing_refs()
         logger.debug("existing_refs=%s", existing_refs)
+        last_invoice_date = False
         for inv_struc in invoices_dl:
             if isinstance(inv_struc, dict):  # Pivot format
                 parsed_inv = inv_struc
@@ -246,6 +333,10 @@ class AccountInvoiceDownloadConfig(models.Model):
                 continue
             # Get partner from invoice import config, not from invoice
             parsed_inv["partner"] = {"recordset": self.partner_id}
+            if parsed_inv.get("date"):
+                inv_date = fields.Date.to_date(parsed_inv["date"])
+                if not last_invoice_date or inv_date > last_invoice_date:
+                    last_invoice_date = inv_date
             if (
                 parsed_inv.get("invoice_number")
                 and parsed_inv["invoice_number"] in existing_refs
@@ -268,6 +359,7 @@ class AccountInvoiceDownloadConfig(models.Model):
                         existing_refs[parsed_inv["invoice_number"]],
                     )
                 )
+                skipped_count += 1
                 continue
             try:
                 invoice = aiio.with_company(company_id).create_invoice(
@@ -296,6 +388,10 @@ class AccountInvoiceDownloadConfig(models.Model):
             )
         if logs["result"] == "success":
             self.last_run = fields.Date.context_today(self)
+            if last_invoice_date and (
+                not self.last_invoice_date or last_invoice_date > self.last_invoice_date
+            ):
+                self.last_invoice_date = last_invoice_date
         if not invoice_ids and logs["result"] == "success":
             logs["msg"].append(_("No invoice downloaded."))
         log = self.env["account.invoice.download.log"].create(
@@ -303,6 +399,10 @@ class AccountInvoiceDownloadConfig(models.Model):
                 "download_config_id": self.id,
                 "message": "\n".join(logs["msg"]),
                 "invoice_count": len(invoice_ids),
+                "invoice_downloaded_count": len(invoices_dl),
+                "invoice_skipped_count": skipped_count,
+                "http_call_count": logs["http_call_count"],
+                "duration": time.perf_counter() - start,
                 "result": logs["result"],
             }
         )
@@ -314,6 +414,31 @@ class AccountInvoiceDownloadConfig(models.Model):
         )
         return (invoice_ids, log.id)
 
+    def _compute_next_run(self, today_dt):
+        self.ensure_one()
+        int_number = self.interval_number
+        int_type = self.interval_type
+        return today_dt + relativedelta(
+            days=int_type == "days" and int_number or 0,
+            weeks=int_type == "weeks" and int_number or 0,
+            months=int_type == "months" and int_number or 0,
+            years=int_type == "years" and int_number or 0,
+        )
+
+    def _download_job_channel(self):
+        """One channel per backend, so that the number of parallel
+        downloads can be limited per provider in the queue_job configuration,
+        for example: root.account_invoice_download.ovh:1"""
+        self.ensure_one()
+        return "root.account_invoice_download.%s" % self.backend
+
+    def run_job(self):
+        """Run the automatic download of the config, in a queue job"""
+        self.ensure_one()
+        credentials = self.prepare_credentials()
+        invoice_ids, log_id = self.run(credentials)
+        return _("%d invoice(s) created, see log ID %s.") % (len(invoice_ids), log_id)
+
     @api.model
     def run_cron(self):
         logger.info(
@@ -329,17 +454,22 @@ class AccountInvoiceDownloadConfig(models.Model):
             ]
         )
         for config in configs:
-            if config.credentials_stored():
-                credentials = config.prepare_credentials()
-                config.run(credentials)
-                int_number = config.interval_number
-                int_type = config.interval_type
-                config.next_run = today_dt + relativedelta(
-                    days=int_type == "days" and int_number or 0,
-                    weeks=int_type == "weeks" and int_number or 0,
-                    months=int_type == "months" and int_number or 0,
-                    years=int_type == "years" and int_number or 0,
+            try:
+                credentials_stored = config.credentials_stored()
+            except UserError as e:
+                logger.warning(
+                    "Cannot run download config %s: %s", config.display_name, e
                 )
+                continue
+            if credentials_stored:
+                # Each config is downloaded in its own job and transaction:
+                # a slow or failing provider doesn't block the others
+                config.with_delay(
+                    channel=config._download_job_channel(),
+                    description=_("Download supplier invoices of %s")
+                    % config.display_name,
+                ).run_job()
+                config.next_run = config._compute_next_run(today_dt)
             else:
                 logger.warning(
                     "Cannot run download config %s because of missing " "credentials",
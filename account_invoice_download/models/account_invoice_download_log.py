@@ -35,3 +35,16 @@ class AccountInvoiceDownloadLog(models.Model):
     invoice_count = fields.Integer(
         string="Number of Invoices Downloaded", readonly=True
     )
+    invoice_downloaded_count = fields.Integer(
+        string="Number of Invoices Received",
+        readonly=True,
+        help="Number of invoices returned by the supplier, "
+        "including the ones that already exist in Odoo.",
+    )
+    invoice_skipped_count = fields.Integer(
+        string="Number of Invoices Skipped",
+        readonly=True,
+        help="Number of invoices skipped because they already exist in Odoo.",
+    )
+    http_call_count = fields.Integer(string="Number of HTTP Calls", readonly=True)
+    duration = fields.Float(string="Duration (s)", digits=(16, 1), readonly=True)
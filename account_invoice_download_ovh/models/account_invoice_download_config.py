@@ -74,32 +74,104 @@ class AccountInvoiceDownloadConfig(models.Model):
             return self.ovh_download(credentials, logs)
         return super().download(credentials, logs)
 
-    def ovh_invoice_attach_pdf(self, parsed_inv, pdf_invoice_url):
-        logger.info(
-            "Starting to download PDF of OVH invoice %s dated %s",
-            parsed_inv["invoice_number"],
-            parsed_inv["date"],
-        )
+    def _ovh_download_pdf(self, pdf_invoice_url, invoice_number, session=None):
+        """Return the PDF as base64 or False. Doesn't use the ORM,
+        so it can run in a thread"""
+        logger.info("Starting to download PDF of OVH invoice %s", invoice_number)
         logger.debug("OVH invoice download url: %s", pdf_invoice_url)
-        rpdf = requests.get(pdf_invoice_url)
+        rpdf = (session or requests).get(pdf_invoice_url)
         logger.info("OVH invoice PDF download HTTP code: %s", rpdf.status_code)
         res = False
         if rpdf.status_code == 200:
             res = base64.encodebytes(rpdf.content)
             logger.info(
                 "Successfull download of the PDF of the OVH invoice %s",
-                parsed_inv["invoice_number"],
+                invoice_number,
             )
         else:
             logger.warning(
                 "Could not download the PDF of the OVH invoice %s. HTTP " "error %d",
-                parsed_inv["invoice_number"],
+                invoice_number,
                 rpdf.status_code,
             )
+        return res
+
+    def ovh_invoice_attach_pdf(self, parsed_inv, pdf_invoice_url, session=None):
+        res = self._ovh_download_pdf(
+            pdf_invoice_url, parsed_inv["invoice_number"], session=session
+        )
         filename = "OVH_invoice_%s.pdf" % parsed_inv["invoice_number"]
         parsed_inv["attachments"] = {filename: res}
         return
 
+    def _ovh_fetch_bill(self, client, session, oinv_num, with_lines, logs):
+        """Do all the HTTP requests of an OVH invoice. Doesn't use the ORM,
+        so it can run in a thread.
+
+        :return: dict with keys bill, pdf and details (one dict per line)
+        """
+        logger.info("Starting OVH API query /me/bill/%s", oinv_num)
+        res_inv = client.get("/me/bill/%s" % oinv_num)
+        self._download_count_http_call(logs)
+        logger.debug("Result of /me/bill/%s : %s", oinv_num, json.dumps(res_inv))
+        res = {"bill": res_inv, "pdf": False, "details": []}
+        if not res_inv["priceWithoutTax"].get("value") and not res_inv[
+            "priceWithTax"
+        ].get("value"):
+            # Skipped by ovh_download()
+            return res
+        res["pdf"] = self._ovh_download_pdf(
+            res_inv["pdfUrl"], oinv_num, session=session
+        )
+        if with_lines:
+            logger.info("Starting OVH API query /me/bill/%s/details", oinv_num)
+            res_ilines = client.get("/me/bill/%s/details" % oinv_num)
+            self._download_count_http_call(logs)
+            logger.debug(
+                "Result /me/bill/%s/details: %s", oinv_num, json.dumps(res_ilines)
+            )
+            for line in res_ilines:
+                logger.info(
+                    "Starting OVH API query /me/bill/%s/details/%s", oinv_num, line
+                )
+                res_iline = client.get("/me/bill/%s/details/%s" % (oinv_num, line))
+                self._download_count_http_call(logs)
+                logger.debug(
+                    "Result /me/bill/%s/details/%s: %s",
+                    oinv_num,
+                    line,
+                    json.dumps(res_iline),
+                )
+                res["details"].append(res_iline)
+        return res
+
+    def _ovh_prepare_line(self, res_iline):
+        line = {
+            # We don't have accurate product code in the OVH API
+            # We had a product code in the SoAPI...
+            # 'product': {'code': 'xxx'},
+            "name": res_iline["description"],
+            "qty": int(res_iline["quantity"]),
+            "price_unit": res_iline["unitPrice"]["value"],
+            "uom": {"unece_code": "C62"},
+            "taxes": [
+                {
+                    "amount_type": "percent",
+                    "amount": 20.0,
+                    "unece_type_code": "VAT",
+                    "unece_categ_code": "S",
+                }
+            ],
+        }
+        if res_iline["periodStart"] and res_iline["periodEnd"]:
+            line.update(
+                {
+                    "date_start": res_iline["periodStart"],
+                    "date_end": res_iline["periodEnd"],
+                }
+            )
+        return line
+
     def ovh_download(self, credentials, logs):
         invoices = []
         logger.info(
@@ -107,13 +179,14 @@ class AccountInvoiceDownloadConfig(models.Model):
             self.name,
             self.ovh_endpoint,
         )
+        client_params = {
+            "endpoint": self.ovh_endpoint,
+            "application_key": self.ovh_application_key,
+            "application_secret": self.ovh_application_secret,
+            "consumer_key": self.ovh_consumer_key,
+        }
         try:
-            client = ovh.Client(
-                endpoint=self.ovh_endpoint,
-                application_key=self.ovh_application_key,
-                application_secret=self.ovh_application_secret,
-                consumer_key=self.ovh_consumer_key,
-            )
+            client = ovh.Client(**client_params)
         except Exception as e:
             logs["msg"].append(
                 _(
@@ -129,31 +202,50 @@ class AccountInvoiceDownloadConfig(models.Model):
         if self.download_start_date:
             params = {"date.from": self.download_start_date}
         res_ilist = client.get("/me/bill", **params)
+        self._download_count_http_call(logs)
         logger.debug("Result of /me/bill : %s", json.dumps(res_ilist, indent=4))
 
+        # Don't query the details of the invoices that are already in Odoo
+        existing_refs = self._get_existing_refs()
+        oinv_nums = []
         for oinv_num in res_ilist:
-            logger.info(
-                "Starting OVH API query /me/bill/%s (d/l config %s)",
-                oinv_num,
-                self.name,
-            )
-            res_inv = client.get("/me/bill/%s" % oinv_num)
-            logger.debug("Result of /me/bill/%s : %s", oinv_num, json.dumps(res_inv))
-            oinv_date = res_inv["date"][:10]
-            if not res_inv["priceWithoutTax"].get("value") and not res_inv[
-                "priceWithTax"
-            ].get("value"):
-                logs["msg"].append(
-                    _("Skipping OVH invoice %s dated %s because " "the amount is 0")
-                    % (oinv_num, oinv_date)
+            if oinv_num in existing_refs:
+                logger.info(
+                    "Skipping OVH invoice %s because it already exists in Odoo",
+                    oinv_num,
                 )
                 continue
             if oinv_num and oinv_num.startswith("PP_"):
                 logs["msg"].append(
                     _(
-                        "Skipping OVH invoice %s dated %s because it is a "
+                        "Skipping OVH invoice %s because it is a "
                         "special pre-paid invoice"
                     )
+                    % oinv_num
+                )
+                continue
+            oinv_nums.append(oinv_num)
+        with_lines = self.import_config_id.invoice_line_method.startswith("nline")
+        # ovh.Client and requests.Session are not thread-safe:
+        # each thread of _download_map() gets its own ones
+        get_client = self._download_thread_local(
+            lambda: ovh.Client(**client_params), client
+        )
+        get_session = self._download_thread_local(lambda: self._download_session(logs))
+        bills = self._download_map(
+            lambda oinv_num: self._ovh_fetch_bill(
+                get_client(), get_session(), oinv_num, with_lines, logs
+            ),
+            oinv_nums,
+        )
+        for oinv_num, bill in zip(oinv_nums, bills):
+            res_inv = bill["bill"]
+            oinv_date = res_inv["date"][:10]
+            if not res_inv["priceWithoutTax"].get("value") and not res_inv[
+                "priceWithTax"
+            ].get("value"):
+                logs["msg"].append(
+                    _("Skipping OVH invoice %s dated %s because " "the amount is 0")
                     % (oinv_num, oinv_date)
                 )
                 continue
@@ -165,63 +257,12 @@ class AccountInvoiceDownloadConfig(models.Model):
                 "date": oinv_date,
                 "amount_untaxed": res_inv["priceWithoutTax"].get("value"),
                 "amount_total": res_inv["priceWithTax"].get("value"),
+                "attachments": {"OVH_invoice_%s.pdf" % oinv_num: bill["pdf"]},
             }
-            self.ovh_invoice_attach_pdf(parsed_inv, res_inv["pdfUrl"])
-
-            if self.import_config_id.invoice_line_method.startswith("nline"):
-                parsed_inv["lines"] = []
-                logger.info(
-                    "Starting OVH API query /me/bill/%s/details "
-                    "invoice number %s dated %s",
-                    oinv_num,
-                    parsed_inv["invoice_number"],
-                    parsed_inv["date"],
-                )
-                res_ilines = client.get("/me/bill/%s/details" % oinv_num)
-                logger.debug(
-                    "Result /me/bill/%s/details: %s", oinv_num, json.dumps(res_ilines)
-                )
-                for line in res_ilines:
-                    logger.info(
-                        "Starting OVH API query /me/bill/%s/details/%s "
-                        "invoice number %s dated %s",
-                        oinv_num,
-                        line,
-                        parsed_inv["invoice_number"],
-                        parsed_inv["date"],
-                    )
-                    res_iline = client.get("/me/bill/%s/details/%s" % (oinv_num, line))
-                    logger.debug(
-                        "Result /me/bill/%s/details/%s: %s",
-                        oinv_num,
-                        line,
-                        json.dumps(res_iline),
-                    )
-                    line = {
-                        # We don't have accurate product code in the OVH API
-                        # We had a product code in the SoAPI...
-                        # 'product': {'code': 'xxx'},
-                        "name": res_iline["description"],
-                        "qty": int(res_iline["quantity"]),
-                        "price_unit": res_iline["unitPrice"]["value"],
-                        "uom": {"unece_code": "C62"},
-                        "taxes": [
-                            {
-                                "amount_type": "percent",
-                                "amount": 20.0,
-                                "unece_type_code": "VAT",
-                                "unece_categ_code": "S",
-                            }
-                        ],
-                    }
-                    if res_iline["periodStart"] and res_iline["periodEnd"]:
-                        line.update(
-                            {
-                                "date_start": res_iline["periodStart"],
-                                "date_end": res_iline["periodEnd"],
-                            }
-                        )
-                    parsed_inv["lines"].append(line)
+            if with_lines:
+                parsed_inv["lines"] = [
+                    self._ovh_prepare_line(res_iline) for res_iline in bill["details"]
+                ]
 
             logger.debug("Final parsed_inv=%s", parsed_inv)
             invoices.append(parsed_inv)
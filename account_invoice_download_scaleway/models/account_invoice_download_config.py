@@ -41,30 +41,37 @@ class AccountInvoiceDownloadConfig(models.Model):
             return self.scaleway_download(credentials, logs)
         return super().download(credentials, logs)
 
-    def _scaleway_invoice_attach_pdf(self, parsed_inv, invoice_id, headers):
-        logger.info(
-            "Starting to download PDF of Scaleway invoice %s dated %s",
-            parsed_inv["invoice_number"],
-            parsed_inv["date"],
-        )
+    def _scaleway_download_pdf(self, invoice_id, invoice_number, headers, session=None):
+        """Return the JSON of the PDF or False. Doesn't use the ORM,
+        so it can run in a thread"""
+        logger.info("Starting to download PDF of Scaleway invoice %s", invoice_number)
         pdf_invoice_url = "%s/invoices/%s/download" % (URL_BASE, invoice_id)
         logger.debug("Scaleway invoice download url: %s", pdf_invoice_url)
-        rpdf = requests.get(pdf_invoice_url, headers=headers)
+        rpdf = (session or requests).get(pdf_invoice_url, headers=headers)
         logger.info("Scaleway invoice PDF download HTTP code: %s", rpdf.status_code)
         if rpdf.status_code == 200:
-            rpdf_json = rpdf.json()
             logger.info(
                 "Successfull download of the PDF of the Scaleway invoice %s",
-                parsed_inv["invoice_number"],
+                invoice_number,
+            )
+            return rpdf.json()
+        logger.warning(
+            "Could not download the PDF of the Scaleway invoice %s. HTTP error %d",
+            invoice_number,
+            rpdf.status_code,
+        )
+        return False
+
+    def _scaleway_invoice_attach_pdf(
+        self, parsed_inv, invoice_id, headers, session=None, rpdf_json=None
+    ):
+        if rpdf_json is None:
+            rpdf_json = self._scaleway_download_pdf(
+                invoice_id, parsed_inv["invoice_number"], headers, session=session
             )
+        if rpdf_json:
             filename = rpdf_json["name"]
             parsed_inv["attachments"] = {filename: rpdf_json["content"]}
-        else:
-            logger.warning(
-                "Could not download the PDF of the Scaleway invoice %s. HTTP error %d",
-                parsed_inv["invoice_number"],
-                rpdf.status_code,
-            )
 
     def scaleway_download(self, credentials, logs):
         invoices = []
@@ -79,8 +86,9 @@ class AccountInvoiceDownloadConfig(models.Model):
         list_url = "%s/invoices" % URL_BASE
         logger.info("Starting Scaleway API query on %s", list_url)
         logger.debug("URL params=%s", params)
+        session = self._download_session(logs)
         try:
-            res_ilist = requests.get(list_url, headers=headers, params=params)
+            res_ilist = session.get(list_url, headers=headers, params=params)
         except Exception as e:
             logs["msg"].append(
                 _("Cannot connect to the Scaleway API. Error message: '%s'.") % str(e)
@@ -89,6 +97,8 @@ class AccountInvoiceDownloadConfig(models.Model):
             return []
         ilist_json = res_ilist.json()
         logger.debug("Result of invoice list: %s", ilist_json)
+        # Don't download the PDF of the invoices that are already in Odoo
+        existing_refs = self._get_existing_refs()
         for inv in ilist_json.get("invoices", []):
             if not inv.get("number"):
                 logger.info(
@@ -96,6 +106,12 @@ class AccountInvoiceDownloadConfig(models.Model):
                     inv.get("id"),
                 )
                 continue
+            if inv["number"] in existing_refs:
+                logger.info(
+                    "Skipping scaleway invoice %s because it already exists in Odoo",
+                    inv["number"],
+                )
+                continue
             untaxed = inv["total_untaxed"]
             currency_code = untaxed["currency_code"]
             amount_untaxed_str = "%s.%s" % (untaxed["units"], untaxed["nanos"])
@@ -120,8 +136,24 @@ class AccountInvoiceDownloadConfig(models.Model):
                         "date_end": end_date_dt,
                     }
                 )
-            self._scaleway_invoice_attach_pdf(parsed_inv, inv["id"], headers)
-
-            logger.debug("Final parsed_inv=%s", parsed_inv)
+            parsed_inv["scaleway_id"] = inv["id"]
             invoices.append(parsed_inv)
+        # A requests.Session is not thread-safe: one per thread
+        get_session = self._download_thread_local(
+            lambda: self._download_session(logs), session
+        )
+        pdfs = self._download_map(
+            lambda parsed_inv: self._scaleway_download_pdf(
+                parsed_inv["scaleway_id"],
+                parsed_inv["invoice_number"],
+                headers,
+                session=get_session(),
+            ),
+            invoices,
+        )
+        for parsed_inv, rpdf_json in zip(invoices, pdfs):
+            self._scaleway_invoice_attach_pdf(
+                parsed_inv, parsed_inv.pop("scaleway_id"), headers, rpdf_json=rpdf_json
+            )
+            logger.debug("Final parsed_inv=%s", parsed_inv)
         return invoices
@@ -0,0 +1 @@
+from . import test_scaleway_download
@@ -0,0 +1,141 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests.common import SavepointCase
+
+from odoo.addons.queue_job.tests.common import trap_jobs
+
+MODULE = "odoo.addons.account_invoice_download_scaleway.models"
+CONFIG_MODULE = MODULE + ".account_invoice_download_config"
+
+
+def _scaleway_invoice(invoice_id, number):
+    return {
+        "id": invoice_id,
+        "number": number,
+        "invoice_type": "periodic",
+        "start_date": "2023-01-01T00:00:00Z",
+        "issued_date": "2023-02-01T00:00:00Z",
+        "due_date": "2023-02-28T00:00:00Z",
+        "total_untaxed": {"currency_code": "EUR", "units": 10, "nanos": 0},
+        "total_taxed": {"currency_code": "EUR", "units": 12, "nanos": 0},
+    }
+
+
+class ScalewayStubHandler(BaseHTTPRequestHandler):
+    invoices = [
+        _scaleway_invoice("id-1", "INV-1"),
+        _scaleway_invoice("id-2", "INV-2"),
+        _scaleway_invoice("id-3", "INV-3"),
+    ]
+    requested_paths = []
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.requested_paths.append(path)
+        if path == "/invoices":
+            res = {"invoices": self.invoices}
+        else:
+            invoice_id = path.split("/")[2]
+            res = {"name": "%s.pdf" % invoice_id, "content": "UERG"}
+        data = json.dumps(res).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        return
+
+
+class TestScalewayDownload(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ScalewayStubHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.start()
+        cls.url_base = "http://127.0.0.1:%d" % cls.server.server_port
+        partner = cls.env["res.partner"].create(
+            {"name": "Scaleway", "is_company": True}
+        )
+        import_config = cls.env["account.invoice.import.config"].create(
+            {"name": "Scaleway", "partner_id": partner.id}
+        )
+        cls.download_config = cls.env["account.invoice.download.config"].create(
+            {
+                "name": "Scaleway",
+                "backend": "scaleway",
+                "import_config_id": import_config.id,
+                "scaleway_secret_key": "secret",
+            }
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server_thread.join()
+        super().tearDownClass()
+
+    def test_download_skip_existing(self):
+        ScalewayStubHandler.requested_paths.clear()
+        logs = {"msg": [], "result": "success"}
+        with mock.patch(CONFIG_MODULE + ".URL_BASE", self.url_base), mock.patch.object(
+            type(self.download_config),
+            "_get_existing_refs",
+            return_value={"INV-2": 42},
+        ):
+            invoices = self.download_config.scaleway_download(
+                self.download_config.prepare_credentials(), logs
+            )
+        self.assertEqual(logs["result"], "success")
+        self.assertEqual(
+            [inv["invoice_number"] for inv in invoices], ["INV-1", "INV-3"]
+        )
+        self.assertEqual(invoices[0]["attachments"], {"id-1.pdf": "UERG"})
+        self.assertEqual(invoices[0]["amount_total"], 12.0)
+        # The PDF of the existing invoice is not downloaded
+        self.assertEqual(
+            sorted(ScalewayStubHandler.requested_paths),
+            ["/invoices", "/invoices/id-1/download", "/invoices/id-3/download"],
+        )
+
+    def test_run_cron(self):
+        aidco = self.env["account.invoice.download.config"]
+        today = fields.Date.context_today(aidco)
+        aidco.search([]).write({"method": "manual"})
+        self.download_config.write(
+            {
+                "method": "auto",
+                "next_run": today,
+                "interval_type": "months",
+                "interval_number": 1,
+            }
+        )
+        not_due_config = self.download_config.copy(
+            {
+                "name": "Scaleway not due",
+                "scaleway_secret_key": "secret",
+                "method": "auto",
+                "next_run": today + relativedelta(days=1),
+            }
+        )
+        with trap_jobs() as trap:
+            aidco.run_cron()
+            # One job per due config, in the channel of its backend
+            trap.assert_jobs_count(1)
+            trap.assert_enqueued_job(
+                self.download_config.run_job,
+                properties=dict(channel="root.account_invoice_download.scaleway"),
+            )
+        self.assertEqual(self.download_config.next_run, today + relativedelta(months=1))
+        self.assertEqual(not_due_config.next_run, today + relativedelta(days=1))
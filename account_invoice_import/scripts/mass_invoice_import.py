@@ -10,60 +10,204 @@ The module OCA/edi/account_invoice_import must be installed on Odoo.
 import argparse
 import base64
 import getpass
+import hashlib
+import json
 import logging
 import mimetypes
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import odoorpc
 
 __author__ = "Alexis de Lattre <alexis.delattre@akretion.com>"
 __date__ = "March 2021"
-__version__ = "0.2"
+__version__ = "0.3"
 
-FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+FORMAT = "%(asctime)s [%(levelname)s] [%(threadName)s] %(message)s"
 logging.basicConfig(format=FORMAT)
 logger = logging.getLogger("add_xivo_user")
 
+INV_MIME = ["application/xml", "text/xml", "application/pdf"]
+
 fail_subdir_ok = {}  # key = directory, value: failsubdir or False
 invoice_ids = []
 fail_files = []
+# key = sha256 of a file already imported, value = state line
+imported_files = {}
+stats = {"skipped_state": 0, "skipped_server": 0, "bytes": 0}
+lock = threading.Lock()
+odoo_sessions = threading.local()
 
 
-def send_file(odoo, file_path):
+def get_odoo(pwd):
+    """Each worker thread has its own session on Odoo"""
+    odoo = getattr(odoo_sessions, "odoo", None)
+    if odoo is None:
+        proto = args.no_ssl and "jsonrpc" or "jsonrpc+ssl"
+        odoo = odoorpc.ODOO(args.server, proto, args.port)
+        odoo.login(args.database, args.username, pwd)
+        odoo_sessions.odoo = odoo
+    return odoo
+
+
+def state_db_key():
+    return "%s:%s/%s" % (args.server, args.port, args.database)
+
+
+def load_state(state_file):
+    """The state file has one JSON dict per line, for each file
+    imported in Odoo (or already present in Odoo)"""
+    if not state_file or not os.path.exists(state_file):
+        return
+    db_key = state_db_key()
+    with open(state_file) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                state = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring corrupted line of state file: %s", line)
+                continue
+            if state.get("db") == db_key:
+                imported_files[state["sha256"]] = state
+    logger.info(
+        "%d files already imported according to state file %s",
+        len(imported_files),
+        state_file,
+    )
+
+
+def save_state(file_hash, filename, invoice_id):
+    state = {
+        "db": state_db_key(),
+        "sha256": file_hash,
+        "filename": filename,
+        "invoice_id": invoice_id,
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with lock:
+        imported_files[file_hash] = state
+        if args.state_file:
+            with open(args.state_file, "a") as f:
+                f.write(json.dumps(state) + "\n")
+
+
+def read_file(file_path):
+    """Return (content, sha256) or (False, False) if the file must be skipped"""
     filename = os.path.basename(file_path)
     filetype = mimetypes.guess_type(filename)
     logger.debug("filetype of file %s=%s", filename, filetype)
-    inv_mime = ["application/xml", "text/xml", "application/pdf"]
-    if filetype and filetype[0] in inv_mime:
-        logger.info("Starting to upload file %s to Odoo", filename)
-        if not os.access(file_path, os.R_OK):
-            logger.error("No read access on file %s. Skipping.", filename)
-            return False
-        with open(file_path, "rb") as f:
-            f.seek(0)
-            invoice = f.read()
-        inv_b64 = base64.encodebytes(invoice)
-        aiio = odoo.env["account.invoice.import"]
-        try:
-            invoice_id = aiio.create_invoice_webservice(
-                inv_b64.decode("utf8"), filename, "mass import script"
-            )
-            if invoice_id:
-                logger.info("Invoice ID %d successfully created in Odoo", invoice_id)
-                invoice_ids.append(invoice_id)
-                return "success"
-            else:
-                logger.warning("Invoice import failed")
-                fail_files.append(filename)
-                return "failure"
-        except Exception as e:
-            logger.warning("Odoo failed to import file %s. Reason: %s", filename, e)
-            fail_files.append(filename)
-            return "failure"
-    else:
+    if not filetype or filetype[0] not in INV_MIME:
         logger.warning("Filetype of file %s is %s. Skipping.", filename, filetype)
+        return False, False
+    if not os.access(file_path, os.R_OK):
+        logger.error("No read access on file %s. Skipping.", filename)
+        return False, False
+    with open(file_path, "rb") as f:
+        invoice = f.read()
+    file_hash = hashlib.sha256(invoice).hexdigest()
+    if file_hash in imported_files:
+        logger.info(
+            "File %s already imported as invoice ID %s. Skipping.",
+            filename,
+            imported_files[file_hash]["invoice_id"],
+        )
+        with lock:
+            stats["skipped_state"] += 1
+        return False, False
+    with lock:
+        stats["bytes"] += len(invoice)
+    return invoice, file_hash
+
+
+def send_file(odoo, file_path):
+    filename = os.path.basename(file_path)
+    invoice, file_hash = read_file(file_path)
+    if not invoice:
         return False
+    logger.info("Starting to upload file %s to Odoo", filename)
+    inv_b64 = base64.b64encode(invoice)
+    del invoice
+    aiio = odoo.env["account.invoice.import"]
+    try:
+        invoice_id = aiio.create_invoice_webservice(
+            inv_b64.decode("utf8"), filename, "mass import script"
+        )
+        if invoice_id:
+            logger.info("Invoice ID %d successfully created in Odoo", invoice_id)
+            invoice_ids.append(invoice_id)
+            save_state(file_hash, filename, invoice_id)
+            return "success"
+        else:
+            logger.warning("Invoice import failed")
+            fail_files.append(filename)
+            return "failure"
+    except Exception as e:
+        logger.warning("Odoo failed to import file %s. Reason: %s", filename, e)
+        fail_files.append(filename)
+        return "failure"
+
+
+def send_batch(odoo, file_paths):
+    """Send several files in one call to the server-side batch import.
+    Return a list of (file_path, result)"""
+    invoice_files = []
+    todo = []
+    res = []
+    for file_path in file_paths:
+        invoice, file_hash = read_file(file_path)
+        if not invoice:
+            res.append((file_path, False))
+            continue
+        invoice_files.append(
+            {
+                "invoice_file_b64": base64.b64encode(invoice).decode("utf8"),
+                "invoice_filename": os.path.basename(file_path),
+            }
+        )
+        todo.append((file_path, file_hash))
+    if not invoice_files:
+        return res
+    logger.info("Starting to upload a batch of %d files to Odoo", len(invoice_files))
+    aiio = odoo.env["account.invoice.import"]
+    try:
+        report = aiio.create_invoices_webservice(invoice_files, "mass import script")
+    except Exception as e:
+        logger.warning("Odoo failed to import a batch of files. Reason: %s", e)
+        for file_path, _file_hash in todo:
+            fail_files.append(os.path.basename(file_path))
+            res.append((file_path, "failure"))
+        return res
+    for (file_path, file_hash), file_res in zip(todo, report):
+        filename = os.path.basename(file_path)
+        if file_res["state"] == "done":
+            logger.info(
+                "Invoice ID %d successfully created in Odoo from file %s",
+                file_res["invoice_id"],
+                filename,
+            )
+            invoice_ids.append(file_res["invoice_id"])
+            save_state(file_hash, filename, file_res["invoice_id"])
+            res.append((file_path, "success"))
+        elif file_res["state"] == "skipped":
+            logger.info("File %s skipped by Odoo: %s", filename, file_res["message"])
+            with lock:
+                stats["skipped_server"] += 1
+            save_state(file_hash, filename, file_res["invoice_id"])
+            res.append((file_path, "skipped"))
+        else:
+            logger.warning(
+                "Odoo failed to import file %s. Reason: %s",
+                filename,
+                file_res["message"],
+            )
+            fail_files.append(filename)
+            res.append((file_path, "failure"))
+    return res
 
 
 def update_fail_subdir(directory, fail_subdir):
@@ -94,10 +238,12 @@ def update_fail_subdir(directory, fail_subdir):
     return True
 
 
-def handle_failure(directory, entry, file_path):
+def handle_failure(file_path):
     if not args.no_move_failed:
-        if directory not in fail_subdir_ok:
-            update_fail_subdir(directory, args.fail_subdir)
+        directory, entry = os.path.split(file_path)
+        with lock:
+            if directory not in fail_subdir_ok:
+                update_fail_subdir(directory, args.fail_subdir)
         fail_dir_path = fail_subdir_ok[directory]
         if fail_dir_path:
             logger.info(
@@ -108,22 +254,35 @@ def handle_failure(directory, entry, file_path):
             os.rename(file_path, os.path.join(fail_dir_path, entry))
 
 
-def browse_directory(odoo, directory):
+def list_files(directory):
+    """Return the list of the paths of the files to import"""
     if os.path.isdir(directory):
         logger.info("Start working on directory %s", directory)
-        for entry in os.listdir(directory):
+        file_paths = []
+        for entry in sorted(os.listdir(directory)):
             file_path = os.path.join(directory, entry)
             logger.debug("file_path=%s", entry)
-            if not os.path.isfile(file_path):
-                continue
-            res = send_file(odoo, file_path)
-            if res == "failure":
-                handle_failure(directory, entry, file_path)
-
+            if os.path.isfile(file_path):
+                file_paths.append(file_path)
+        return file_paths
     elif os.path.isfile(directory):
-        res = send_file(odoo, directory)
+        # Failed files given as argument are not moved
+        return [directory]
+    logger.warning("%s is not a directory nor a file. Skipped." % directory)
+    return []
+
+
+def import_files(pwd, file_paths):
+    """Run in a worker thread: import a list of files
+    (a batch or a single file)"""
+    odoo = get_odoo(pwd)
+    if args.batch_size:
+        res = send_batch(odoo, file_paths)
     else:
-        logger.warning("%s is not a directory nor a file. Skipped." % directory)
+        res = [(file_paths[0], send_file(odoo, file_paths[0]))]
+    for file_path, file_res in res:
+        if file_res == "failure" and file_path not in args.dir_list:
+            handle_failure(file_path)
 
 
 def main(args):
@@ -168,15 +327,37 @@ def main(args):
         args.username,
     )
     try:
-        odoo = odoorpc.ODOO(args.server, proto, args.port)
-        odoo.login(args.database, args.username, pwd)
+        get_odoo(pwd)
         logger.info("Successfully connected to Odoo")
     except Exception as e:
         logger.error("Failed to connect to Odoo. Error: %s", e)
         sys.exit(1)
 
+    load_state(args.state_file)
+    file_paths = []
     for directory in args.dir_list:
-        browse_directory(odoo, directory)
+        file_paths += list_files(directory)
+    batch_size = args.batch_size or 1
+    batches = [
+        file_paths[i : i + batch_size] for i in range(0, len(file_paths), batch_size)
+    ]
+    logger.info(
+        "%d files to import with %d worker%s",
+        len(file_paths),
+        args.workers,
+        args.workers > 1 and "s" or "",
+    )
+    start = time.perf_counter()
+    if args.workers > 1:
+        with ThreadPoolExecutor(
+            max_workers=args.workers, thread_name_prefix="worker"
+        ) as executor:
+            # list() to raise the unexpected exceptions of the workers
+            list(executor.map(lambda batch: import_files(pwd, batch), batches))
+    else:
+        for batch in batches:
+            import_files(pwd, batch)
+    duration = time.perf_counter() - start
     logger.info(
         "RESULT: %d invoice%s created in Odoo, %d invoice import failure%s.",
         len(invoice_ids),
@@ -184,6 +365,22 @@ def main(args):
         len(fail_files),
         len(fail_files) > 1 and "s" or "",
     )
+    logger.info(
+        "%d files skipped because already imported (state file), "
+        "%d files skipped by Odoo because the invoice already exists.",
+        stats["skipped_state"],
+        stats["skipped_server"],
+    )
+    sent_count = len(invoice_ids) + len(fail_files) + stats["skipped_server"]
+    logger.info(
+        "THROUGHPUT: %d files (%.1f MB) sent in %.1f seconds: "
+        "%.2f files/s, %.2f MB/s.",
+        sent_count,
+        stats["bytes"] / 1024 / 1024,
+        duration,
+        duration and sent_count / duration or 0,
+        duration and stats["bytes"] / 1024 / 1024 / duration or 0,
+    )
     logger.debug("IDs of created invoices: %s", invoice_ids)
     logger.debug("Fail invoice imports: %s", fail_files)
 
@@ -277,6 +474,37 @@ if __name__ == "__main__":
         help="Set log level. Possible values: debug, info, warn, error. "
         "Default value: info.",
     )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help="Number of files imported in parallel, each worker having "
+        "its own connection to Odoo. Default value: 1.",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        default=0,
+        help="Send the files by batches of this size to the server-side "
+        "batch import (create_invoices_webservice). Default value: 0 "
+        "(the files are sent one by one).",
+    )
+    parser.add_argument(
+        "-t",
+        "--state-file",
+        dest="state_file",
+        type=str,
+        default="",
+        help="File where the hash of the imported files is stored, so that "
+        "the files already imported are skipped when running the script "
+        "again. Delete this file to import the files again, for example "
+        "after deleting their invoices in Odoo. By default, there is no "
+        "state file.",
+    )
     parser.add_argument("dir_list", help="List of directories", type=str, nargs="+")
     args = parser.parse_args()
     main(args)
@@ -14,6 +14,7 @@ from lxml import etree
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.osv import expression
 from odoo.tools import config, float_compare, float_is_zero, float_round
 from odoo.tools.misc import format_amount
 
@@ -374,6 +375,11 @@ class AccountInvoiceImport(models.TransientModel):
             line_model, "end_date"
         )
         static_vals = {"move_id": None}
+        if import_config["invoice_line_method"] == "nline_auto_product":
+            self._prefetch_match_products(
+                [line.get("product") for line in parsed_inv["lines"]]
+            )
+        self._prefetch_match_uoms([line.get("uom") for line in parsed_inv["lines"]])
         if import_config["invoice_line_method"] == "nline_no_product":
             static_vals = {"account_id": import_config["account"].id, "move_id": None}
         elif import_config["invoice_line_method"] == "nline_static_product":
@@ -920,10 +926,16 @@ class AccountInvoiceImport(models.TransientModel):
     @api.model
     def create_invoice(self, parsed_inv, import_config=False, origin=None):
         amo = self.env["account.move"]
-        parsed_inv = self.pre_process_parsed_inv(parsed_inv)
-        vals = self._prepare_create_invoice_vals(parsed_inv, import_config)
-        logger.debug("Invoice vals for creation: %s", vals)
-        invoice = amo.create(vals)
+        with self._match_cache():
+            parsed_inv = self.pre_process_parsed_inv(parsed_inv)
+            vals = self._prepare_create_invoice_vals(parsed_inv, import_config)
+            logger.debug("Invoice vals for creation: %s", vals)
+            invoice = amo.create(vals)
+            self._finalize_created_invoice(parsed_inv, invoice, import_config, origin)
+        return invoice
+
+    @api.model
+    def _finalize_created_invoice(self, parsed_inv, invoice, import_config, origin):
         self.post_process_invoice(parsed_inv, invoice, import_config)
         logger.info("Invoice ID %d created", invoice.id)
         self.post_create_or_update(parsed_inv, invoice)
@@ -934,7 +946,6 @@ class AccountInvoiceImport(models.TransientModel):
             )
             % (origin or _("unspecified"))
         )
-        return invoice
 
     @api.model
     def create_invoice_webservice(
@@ -1008,6 +1019,376 @@ class AccountInvoiceImport(models.TransientModel):
         invoice = self.create_invoice(parsed_inv, import_config, origin)
         return invoice.id
 
+    @api.model
+    def create_invoices_webservice(self, invoice_files, origin, company_id=None):
+        """Import a batch of invoice files.
+
+        The files are all parsed first, then the partners, currencies,
+        import configurations, products, units of measure and taxes are
+        matched once for the whole batch and the invoices are created
+        with one create() per company.
+
+        :param invoice_files: list of dicts with either the keys
+            'invoice_file_b64' and 'invoice_filename' or the key 'attachment_id'
+        :return: list of dicts (one per file, in the same order) with the keys
+            'filename', 'state' ('done', 'skipped' or 'failed'),
+            'invoice_id' and 'message'
+        """
+        if company_id is None:
+            company_id = self.env.context.get("force_company") or self.env.company.id
+        # The duplicate check, the matching and the creation of the invoices
+        # get the company from the context, as in the import of a single file
+        self = self.with_company(company_id).with_context(force_company=company_id)
+        logger.info(
+            "Starting to import a batch of %d invoice files in company ID %d",
+            len(invoice_files),
+            company_id,
+        )
+        results = self._batch_parse_invoice_files(invoice_files)
+        todo = [res for res in results if res["state"] == "todo"]
+        # The searches of the matching are shared by all the invoices
+        with self._match_cache():
+            self._batch_match_invoices(todo)
+            self._batch_create_invoices(
+                [res for res in todo if res["state"] == "todo"], origin
+            )
+        report = []
+        for res in results:
+            report.append(
+                {
+                    "filename": res["filename"],
+                    "state": res["state"],
+                    "invoice_id": res.get("invoice_id", False),
+                    "message": res.get("message", False),
+                }
+            )
+        logger.info(
+            "Batch import of %d invoice files: %d created, %d skipped, %d failed",
+            len(report),
+            len([res for res in report if res["state"] == "done"]),
+            len([res for res in report if res["state"] == "skipped"]),
+            len([res for res in report if res["state"] == "failed"]),
+        )
+        return report
+
+    @api.model
+    def _batch_parse_invoice_files(self, invoice_files):
+        attachment_ids = [
+            file_dict["attachment_id"]
+            for file_dict in invoice_files
+            if file_dict.get("attachment_id")
+        ]
+        attachments = {
+            attach.id: attach
+            for attach in self.env["ir.attachment"].browse(attachment_ids)
+        }
+        results = []
+        for file_dict in invoice_files:
+            filename = file_dict.get("invoice_filename") or _(
+                "Attachment %s"
+            ) % file_dict.get("attachment_id")
+            res = {"filename": filename, "state": "todo"}
+            try:
+                with self.env.cr.savepoint():
+                    if file_dict.get("attachment_id"):
+                        attach = attachments[file_dict["attachment_id"]]
+                        invoice_file_b64 = attach.datas
+                        filename = res["filename"] = attach.name
+                    else:
+                        invoice_file_b64 = file_dict["invoice_file_b64"]
+                    # for invoice_file_b64, we accept it as bytes AND str
+                    # to avoid "Object of type bytes is not JSON serializable"
+                    if isinstance(invoice_file_b64, str):
+                        invoice_file_b64 = invoice_file_b64.encode("utf8")
+                    res["parsed_inv"] = self.parse_invoice(invoice_file_b64, filename)
+            except Exception as e:
+                logger.warning("Failed to parse invoice file %s: %s", filename, e)
+                res.update({"state": "failed", "message": str(e)})
+            results.append(res)
+        return results
+
+    @api.model
+    def _batch_match_key(self, data_dict):
+        return tuple(
+            sorted(
+                (
+                    key,
+                    value
+                    if value is None or isinstance(value, (str, int, float, bool))
+                    else repr(value),
+                )
+                for key, value in data_dict.items()
+                if key != "recordset"
+            )
+        )
+
+    @api.model
+    def _batch_match(self, memo, method, data_dict, chatter_msg, *args, **kwargs):
+        """Call the matching method once per distinct data_dict of the batch.
+
+        The matched record is set as 'recordset' in data_dict,
+        so that the following calls during invoice creation are direct matches.
+        The chatter messages and the errors are replayed for each invoice.
+        """
+        if not data_dict or data_dict.get("recordset"):
+            return data_dict and data_dict["recordset"]
+        key = (
+            method,
+            self._batch_match_key(data_dict),
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        if key not in memo:
+            msgs = []
+            try:
+                record = getattr(self, method)(data_dict, msgs, *args, **kwargs)
+                memo[key] = (record, msgs, None)
+            except UserError as e:
+                memo[key] = (None, msgs, e)
+        record, msgs, error = memo[key]
+        chatter_msg.extend(msgs)
+        if error:
+            raise error
+        if record:
+            data_dict["recordset"] = record
+        return record
+
+    @api.model
+    def _batch_invoice_key(self, partner, parsed_inv):
+        return (
+            partner.id,
+            parsed_inv["type"],
+            (parsed_inv.get("invoice_number") or "").lower(),
+        )
+
+    @api.model
+    def _batch_get_existing_invoices(self, todo):
+        """Return the keys of the invoices of the batch which already exist,
+        with the same criteria as invoice_already_exists()"""
+        company_id = self.env.context.get("force_company") or self.env.company.id
+        refs = {
+            res["parsed_inv"]["invoice_number"]
+            for res in todo
+            if res.get("partner") and res["parsed_inv"].get("invoice_number")
+        }
+        if not refs:
+            return set()
+        existing_invs = self.env["account.move"].search(
+            expression.AND(
+                [
+                    [
+                        ("company_id", "=", company_id),
+                        (
+                            "commercial_partner_id",
+                            "in",
+                            list({res["partner"].id for res in todo if res["partner"]}),
+                        ),
+                        (
+                            "move_type",
+                            "in",
+                            list({res["parsed_inv"]["type"] for res in todo}),
+                        ),
+                    ],
+                    expression.OR([[("ref", "=ilike", ref)] for ref in refs]),
+                ]
+            )
+        )
+        return {
+            (inv.commercial_partner_id.id, inv.move_type, (inv.ref or "").lower())
+            for inv in existing_invs
+        }
+
+    @api.model
+    def _batch_get_import_configs(self, partners, company_id):
+        import_configs = self.env["account.invoice.import.config"].search(
+            [("partner_id", "in", partners.ids), ("company_id", "=", company_id)]
+        )
+        configs_by_partner = {}
+        for import_config in import_configs:
+            configs_by_partner.setdefault(import_config.partner_id, import_config)
+        res = {}
+        for partner in partners:
+            import_config = configs_by_partner.get(partner)
+            if not import_config:
+                logger.warning(
+                    "Missing invoice import configuration "
+                    "for partner '%s' in company ID %d.",
+                    partner.display_name,
+                    company_id,
+                )
+                res[partner] = {}
+            else:
+                res[partner] = import_config.convert_to_import_config()
+        return res
+
+    @api.model
+    def _batch_match_lines(self, memo, parsed_inv, partner, import_config):
+        method = import_config.get("invoice_line_method") or ""
+        chatter_msg = parsed_inv["chatter_msg"]
+        for line in parsed_inv.get("lines", []):
+            if line.get("line_note") or line.get("sectionheader"):
+                continue
+            if method == "nline_auto_product":
+                self._batch_match(
+                    memo, "_match_product", line["product"], chatter_msg, seller=partner
+                )
+            elif method == "nline_no_product":
+                for tax_dict in line.get("taxes") or []:
+                    self._batch_match(
+                        memo,
+                        "_match_tax",
+                        tax_dict,
+                        chatter_msg,
+                        type_tax_use="purchase",
+                        price_include=tax_dict.get("price_include", False),
+                    )
+            if method.startswith("nline"):
+                self._batch_match(memo, "_match_uom", line.get("uom"), chatter_msg)
+
+    @api.model
+    def _batch_match_invoices(self, todo):
+        company_id = self.env.context.get("force_company") or self.env.company.id
+        memo = {}
+        self._prefetch_match_partners(
+            [
+                res["parsed_inv"]["partner"]
+                for res in todo
+                if res["parsed_inv"].get("partner")
+            ]
+        )
+        for res in todo:
+            parsed_inv = res["parsed_inv"]
+            res["partner"] = False
+            try:
+                partner = self._batch_match(
+                    memo,
+                    "_match_partner",
+                    parsed_inv.get("partner"),
+                    parsed_inv["chatter_msg"],
+                    raise_exception=False,
+                )
+            except UserError as e:
+                res.update({"state": "failed", "message": str(e)})
+                continue
+            if partner:
+                partner = partner.commercial_partner_id
+                parsed_inv["partner"]["recordset"] = partner
+                res["partner"] = partner
+        todo = [res for res in todo if res["state"] == "todo"]
+        partners = self.env["res.partner"].browse(
+            {res["partner"].id for res in todo if res["partner"]}
+        )
+        existing_keys = self._batch_get_existing_invoices(todo)
+        import_configs = self._batch_get_import_configs(partners, company_id)
+        for res in todo:
+            parsed_inv = res["parsed_inv"]
+            partner = res["partner"]
+            res["import_config"] = {}
+            if not partner:
+                continue
+            if parsed_inv.get("invoice_number"):
+                inv_key = self._batch_invoice_key(partner, parsed_inv)
+                exists = inv_key in existing_keys
+                # Avoid to import twice the same invoice of the batch
+                existing_keys.add(inv_key)
+            else:
+                exists = self.invoice_already_exists(partner, parsed_inv)
+            if exists:
+                logger.warning(
+                    "Supplier invoice %s of %s already exists in Odoo",
+                    parsed_inv.get("invoice_number"),
+                    partner.display_name,
+                )
+                res.update(
+                    {
+                        "state": "skipped",
+                        "message": _("This invoice already exists in Odoo."),
+                    }
+                )
+                continue
+            res["import_config"] = import_configs[partner]
+            try:
+                self._batch_match(
+                    memo,
+                    "_match_currency",
+                    parsed_inv.get("currency"),
+                    parsed_inv["chatter_msg"],
+                )
+                self._batch_match_lines(memo, parsed_inv, partner, res["import_config"])
+            except UserError as e:
+                res.update({"state": "failed", "message": str(e)})
+
+    @api.model
+    def _batch_create_invoices(self, todo, origin):
+        amo = self.env["account.move"]
+        todo_by_company = {}
+        for res in todo:
+            try:
+                with self.env.cr.savepoint():
+                    parsed_inv = self.pre_process_parsed_inv(res["parsed_inv"])
+                    res["vals"] = self._prepare_create_invoice_vals(
+                        parsed_inv, res["import_config"]
+                    )
+            except Exception as e:
+                res.update({"state": "failed", "message": str(e)})
+                continue
+            todo_by_company.setdefault(res["vals"]["company_id"], []).append(res)
+        for company_id, company_todo in todo_by_company.items():
+            try:
+                with self.env.cr.savepoint():
+                    invoices = amo.with_company(company_id).create(
+                        [res["vals"] for res in company_todo]
+                    )
+            except Exception as e:
+                # Create the invoices one by one to find the faulty ones
+                logger.info("Batch invoice creation failed (%s), retrying 1 by 1", e)
+                invoices = amo.browse()
+                for res in list(company_todo):
+                    try:
+                        with self.env.cr.savepoint():
+                            invoices |= amo.with_company(company_id).create(res["vals"])
+                    except Exception as e:
+                        res.update({"state": "failed", "message": str(e)})
+                        company_todo.remove(res)
+            for res, invoice in zip(company_todo, invoices):
+                try:
+                    with self.env.cr.savepoint():
+                        self._finalize_created_invoice(
+                            res["parsed_inv"], invoice, res["import_config"], origin
+                        )
+                except Exception as e:
+                    res.update({"state": "failed", "message": str(e)})
+                    discard_error = self._batch_discard_invoice(invoice)
+                    if discard_error:
+                        res["invoice_id"] = invoice.id
+                        res["message"] += "\n" + _(
+                            "The invoice could not be deleted nor cancelled: %s"
+                        ) % (discard_error,)
+                    continue
+                res.update({"state": "done", "invoice_id": invoice.id})
+
+    @api.model
+    def _batch_discard_invoice(self, invoice):
+        """Delete an invoice whose finalization failed. The invoice is reset
+        to draft first if it was posted, and cancelled if it can't be deleted
+        (for example because its number is already used).
+        Return the error message if the invoice could not be cancelled either.
+        """
+        try:
+            with self.env.cr.savepoint():
+                if invoice.state != "draft":
+                    invoice.button_draft()
+                invoice.unlink()
+        except Exception as e:
+            logger.warning("Failed to delete invoice ID %d (%s)", invoice.id, e)
+            try:
+                with self.env.cr.savepoint():
+                    invoice.button_cancel()
+            except Exception as e:
+                logger.warning("Failed to cancel invoice ID %d (%s)", invoice.id, e)
+                return str(e)
+        return False
+
     @api.model
     def _prepare_global_adjustment_line(self, diff_amount, invoice, import_config):
         prec = invoice.currency_id.rounding
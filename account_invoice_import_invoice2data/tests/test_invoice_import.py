@@ -6,6 +6,8 @@ import base64
 import logging
 from unittest import mock
 
+from invoice2data.extract.invoice_template import InvoiceTemplate
+
 from odoo import fields
 from odoo.tests.common import SavepointCase
 from odoo.tools import file_open, float_compare
@@ -221,3 +223,61 @@ class TestInvoiceImport(SavepointCase):
         )
         self.assertEqual(float_compare(iline.quantity, 15.0, precision_digits=0), 0)
         self.assertEqual(float_compare(iline.price_unit, 10.00, precision_digits=2), 0)
+
+    def test_templates_cache(self):
+        aiio = self.env["account.invoice.import"]
+        templates, keywords = aiio._invoice2data_read_templates()
+        self.assertTrue(templates)
+        self.assertEqual(len(templates), len(keywords))
+        templates2, keywords2 = aiio._invoice2data_read_templates()
+        self.assertIs(templates2, templates)
+        self.assertIs(keywords2, keywords)
+        templates = [
+            self._template("free", ["Free SAS", "Facture"]),
+            self._template("regex", [r"FR\d+"]),
+            self._template("azure", ["Azure Interior"]),
+        ]
+        keywords = [aiio._invoice2data_template_keywords(tmpl) for tmpl in templates]
+        self.assertEqual(keywords, [("Free SAS", "Facture"), (), ("Azure Interior",)])
+        candidates = aiio._invoice2data_candidate_templates(
+            "Facture Free SAS", templates, keywords
+        )
+        self.assertEqual([c[0] for c in candidates], templates[:2])
+
+    def _template(self, name, keywords, priority=5, options=None):
+        template = {
+            "template_name": name,
+            "issuer": name,
+            "keywords": keywords,
+            "exclude_keywords": [],
+            "fields": {},
+            "priority": priority,
+        }
+        if options:
+            template["options"] = options
+        return InvoiceTemplate(template)
+
+    def test_templates_prepare_input(self):
+        aiio = self.env["account.invoice.import"]
+        templates = [
+            self._template(
+                "lowercase",
+                ["acme corp", "invoice"],
+                priority=10,
+                options={"lowercase": True},
+            ),
+            self._template("generic", ["Invoice"], priority=1),
+        ]
+        keywords = [aiio._invoice2data_template_keywords(tmpl) for tmpl in templates]
+        text = "Invoice from ACME Corp"
+        candidates = aiio._invoice2data_candidate_templates(text, templates, keywords)
+        self.assertEqual(
+            candidates,
+            [(templates[0], "invoice from acme corp"), (templates[1], text)],
+        )
+        # Same template as invoice2data.main.extract_data()
+        template, optimized_str = aiio._invoice2data_match_template(
+            text, templates, keywords
+        )
+        self.assertEqual(template["template_name"], "lowercase")
+        self.assertEqual(optimized_str, "invoice from acme corp")
@@ -7,15 +7,18 @@ import logging
 import os
 import re
 import shutil
+import threading
+import time
 from tempfile import NamedTemporaryFile
 
 from odoo import _, api, fields, models, tools
-from odoo.exceptions import UserError
+from odoo.exceptions import AccessError, UserError
 
 logger = logging.getLogger(__name__)
 
 try:
     from invoice2data.extract.loader import read_templates
+    from invoice2data.input import pdftotext
     from invoice2data.main import extract_data, logger as loggeri2data
 except ImportError:
     logger.debug("Cannot import invoice2data")
@@ -24,6 +27,16 @@ try:
 except ImportError:
     logger.debug("Cannot import tesseract")
 
+# Templates read by invoice2data, per templates directory (None for
+# the built-in templates of the lib): {folder: (signature, templates, keywords)}
+# They are read again when the files of the directory change.
+_TEMPLATES_CACHE = {}
+_TEMPLATES_CACHE_LOCK = threading.Lock()
+# A keyword without these characters is searched as a plain string
+REGEX_SPECIAL_CHARS = frozenset("()[]{}?*+|^$\\.")
+# Template options used by InvoiceTemplate.prepare_input()
+PREPARE_INPUT_OPTIONS = ("remove_whitespace", "remove_accents", "lowercase", "replace")
+
 
 class AccountInvoiceImport(models.TransientModel):
     _inherit = "account.invoice.import"
@@ -76,26 +89,164 @@ class AccountInvoiceImport(models.TransientModel):
         return re.sub(r"\D+", "", string)
 
     @api.model
-    def invoice2data_parse_invoice(self, file_data):
-        logger.info("Trying to analyze PDF invoice with invoice2data lib")
-        fileobj = NamedTemporaryFile(
-            "wb", prefix="odoo-aii-inv2data-pdf-", suffix=".pdf"
+    def _invoice2data_templates_signature(self, folder):
+        """Name, modification time and size of the template files"""
+        if folder is None:
+            # The built-in templates don't change while the server runs
+            return None
+        signature = []
+        for path, _subdirs, files in os.walk(folder):
+            for name in files:
+                stat = os.stat(os.path.join(path, name))
+                signature.append((path, name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+
+    @api.model
+    def _invoice2data_template_keywords(self, template):
+        """Keywords of the template that are plain strings: a text
+        that doesn't contain one of them can't match the template"""
+        return tuple(
+            keyword
+            for keyword in template["keywords"]
+            if isinstance(keyword, str)
+            and keyword
+            and not REGEX_SPECIAL_CHARS.intersection(keyword)
         )
-        fileobj.write(file_data)
-        loggeri2data.setLevel(logger.getEffectiveLevel())
+
+    @api.model
+    def _invoice2data_read_templates(self, folder=None):
+        """Read the templates of the folder once per worker
+
+        :return: (templates, keywords), keywords being the plain string
+            keywords of each template
+        """
+        signature = self._invoice2data_templates_signature(folder)
+        cached = _TEMPLATES_CACHE.get(folder)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+        with _TEMPLATES_CACHE_LOCK:
+            cached = _TEMPLATES_CACHE.get(folder)
+            if not cached or cached[0] != signature:
+                start = time.perf_counter()
+                templates = read_templates(folder)
+                keywords = [
+                    self._invoice2data_template_keywords(template)
+                    for template in templates
+                ]
+                cached = _TEMPLATES_CACHE[folder] = (signature, templates, keywords)
+                logger.info(
+                    "invoice2data: %d templates read from %s in %.2fs",
+                    len(templates),
+                    folder or "the lib",
+                    time.perf_counter() - start,
+                )
+        return cached[1], cached[2]
+
+    @api.model
+    def _invoice2data_get_templates(self):
+        """:return: (templates, keywords)"""
         local_templates_dir = tools.config.get("invoice2data_templates_dir", False)
         logger.debug("invoice2data local_templates_dir=%s", local_templates_dir)
         templates = []
+        keywords = []
         if local_templates_dir and os.path.isdir(local_templates_dir):
-            templates += read_templates(local_templates_dir)
+            local_templates, local_keywords = self._invoice2data_read_templates(
+                local_templates_dir
+            )
+            templates += local_templates
+            keywords += local_keywords
         exclude_built_in_templates = tools.config.get(
             "invoice2data_exclude_built_in_templates", False
         )
         if not exclude_built_in_templates:
-            templates += read_templates()
+            builtin_templates, builtin_keywords = self._invoice2data_read_templates()
+            templates += builtin_templates
+            keywords += builtin_keywords
+        return templates, keywords
+
+    @api.model
+    def _invoice2data_prepare_input_key(self, template):
+        """Templates with the same key get the same text from prepare_input()"""
+        return repr([template.options.get(option) for option in PREPARE_INPUT_OPTIONS])
+
+    @api.model
+    def _invoice2data_candidate_templates(self, text, templates, keywords):
+        """Skip the templates with a plain string keyword absent from the
+        text, without running the regex of all the keywords of all templates.
+        As in invoice2data.main.extract_data(), the keywords are searched in
+        the text prepared by the template (lowercase, without accents...),
+        which is computed once per set of options.
+
+        :return: list of (template, prepared text), in the order of templates
+        """
+        prepared = {}
+        found = {}
+        candidates = []
+        for template, template_keywords in zip(templates, keywords):
+            key = self._invoice2data_prepare_input_key(template)
+            if key not in prepared:
+                prepared[key] = template.prepare_input(text)
+            optimized_str = prepared[key]
+            for keyword in template_keywords:
+                if (key, keyword) not in found:
+                    found[(key, keyword)] = keyword in optimized_str
+                if not found[(key, keyword)]:
+                    break
+            else:
+                candidates.append((template, optimized_str))
+        return candidates
+
+    @api.model
+    def _invoice2data_match_template(self, text, templates, keywords):
+        """:return: (template, prepared text) of the template with the highest
+        priority that matches the text, or (None, None)"""
+        candidates = self._invoice2data_candidate_templates(text, templates, keywords)
+        logger.debug(
+            "invoice2data: %d candidate templates out of %d",
+            len(candidates),
+            len(templates),
+        )
+        matched = sorted(
+            [
+                (template, optimized_str)
+                for template, optimized_str in candidates
+                if template.matches_input(optimized_str)
+            ],
+            key=lambda match: match[0]["priority"],
+            reverse=True,
+        )
+        return matched and matched[0] or (None, None)
+
+    @api.model
+    def _invoice2data_extract_data(self, pdf_path, templates, keywords):
+        """Same as invoice2data.main.extract_data(), but the templates
+        are pre-filtered on their keywords"""
+        text = pdftotext.to_text(pdf_path)
+        if isinstance(text, str) and text.strip():
+            template, optimized_str = self._invoice2data_match_template(
+                text, templates, keywords
+            )
+            if template:
+                logger.info("Using %s template", template["template_name"])
+                return template.extract(optimized_str, pdf_path, pdftotext)
+        # No text or no template: let the lib try its fallbacks (ocrmypdf)
+        return extract_data(pdf_path, templates=templates)
+
+    @api.model
+    def invoice2data_parse_invoice(self, file_data):
+        logger.info("Trying to analyze PDF invoice with invoice2data lib")
+        fileobj = NamedTemporaryFile(
+            "wb", prefix="odoo-aii-inv2data-pdf-", suffix=".pdf"
+        )
+        fileobj.write(file_data)
+        fileobj.flush()
+        loggeri2data.setLevel(logger.getEffectiveLevel())
+        templates, keywords = self._invoice2data_get_templates()
         logger.debug("Calling invoice2data.extract_data with templates=%s", templates)
         try:
-            invoice2data_res = extract_data(fileobj.name, templates=templates)
+            invoice2data_res = self._invoice2data_extract_data(
+                fileobj.name, templates, keywords
+            )
         except Exception as e:
             fileobj.close()
             raise UserError(_("PDF Invoice parsing failed. Error message: %s") % e)
@@ -129,6 +280,48 @@ class AccountInvoiceImport(models.TransientModel):
         fileobj.close()
         return self.invoice2data_to_parsed_inv(invoice2data_res)
 
+    @api.model
+    def invoice2data_benchmark(self, folder):
+        """Compare the parsing of the PDF files of a server folder with
+        the templates read for each file and with the cached templates.
+        To be run from an Odoo shell:
+        env["account.invoice.import"].invoice2data_benchmark("/path/to/pdfs")
+        """
+        if not self.env.is_system():
+            raise AccessError(_("Only administrators can run this benchmark."))
+        local_templates_dir = tools.config.get("invoice2data_templates_dir", False)
+        res = {"files": 0, "mismatch": [], "uncached_time": 0.0, "cached_time": 0.0}
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(folder, name)
+            start = time.perf_counter()
+            templates = []
+            if local_templates_dir and os.path.isdir(local_templates_dir):
+                templates += read_templates(local_templates_dir)
+            if not tools.config.get("invoice2data_exclude_built_in_templates"):
+                templates += read_templates()
+            uncached_res = extract_data(path, templates=templates)
+            uncached_time = time.perf_counter() - start
+            start = time.perf_counter()
+            templates, keywords = self._invoice2data_get_templates()
+            cached_res = self._invoice2data_extract_data(path, templates, keywords)
+            cached_time = time.perf_counter() - start
+            logger.info(
+                "invoice2data benchmark: %s parsed in %.3fs (uncached) / "
+                "%.3fs (cached)",
+                name,
+                uncached_time,
+                cached_time,
+            )
+            res["files"] += 1
+            res["uncached_time"] += uncached_time
+            res["cached_time"] += cached_time
+            if uncached_res != cached_res:
+                res["mismatch"].append(name)
+        logger.info("invoice2data benchmark result: %s", res)
+        return res
+
     def invoice2data_prepare_lines(self, lines):
         """Manipulate line data to match with account_invoice_import"""
         for line in lines:
@@ -1,3 +1,4 @@
 from . import account_invoice_import_simple_pdf_fields
 from . import account_invoice_import_simple_pdf_invoice_number
+from . import account_invoice_import_simple_pdf_text_cache
 from . import res_partner
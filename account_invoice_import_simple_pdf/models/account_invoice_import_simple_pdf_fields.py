@@ -3,6 +3,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import logging
+from functools import lru_cache
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
@@ -22,6 +23,83 @@ except ImportError:
     logger.debug("Cannot import dateparser")
 
 
+@lru_cache(maxsize=512)
+def compile_pattern(pattern):
+    """Compile a regular expression once for all the imports."""
+    return regex.compile(pattern)
+
+
+@lru_cache(maxsize=256)
+def _date_plan(
+    regexp, date_format, date_separator_char, space_pattern, format2regex, format2dt
+):
+    if regexp:
+        pattern = regexp
+    else:
+        pattern = date_format
+        # Special case to support "1er Janvier 2022" or "July 5th, 2022"
+        if date_separator_char == chr(32) and "month" in pattern:
+            pattern = pattern.replace("dd", r"\d{1,2}\p{L}{0,2}")
+        for src, dest in format2regex:
+            pattern = pattern.replace(src, dest)
+
+        if date_separator_char == chr(32):
+            date_separator_regex = ",?%s+" % space_pattern
+        else:
+            date_separator_regex = regex.escape(date_separator_char)
+
+        pattern = pattern.replace("-", date_separator_regex)
+    date_formatdt = date_format
+    for src, dest in format2dt:
+        date_formatdt = date_formatdt.replace(src, dest)
+    date_formatdt = date_formatdt.replace("-", date_separator_char)
+    return {
+        "pattern": pattern,
+        "regex": compile_pattern(pattern),
+        "date_formatdt": date_formatdt,
+    }
+
+
+@lru_cache(maxsize=256)
+def _amount_plan(regexp, thousand_sep, decimal_sep, decimal_places, space_pattern):
+    if not thousand_sep:
+        thousand_sep_pattern = ""
+    elif thousand_sep == chr(32):
+        thousand_sep_pattern = space_pattern
+    else:
+        thousand_sep_pattern = regex.escape(thousand_sep)
+    decimal_sep_pattern = regex.escape(decimal_sep)
+    if regexp:
+        pattern = regexp
+    else:
+        if decimal_places:
+            pattern = r"(?:\d{1,3}%s)*\d{1,3}%s\d{%d}" % (
+                thousand_sep_pattern,
+                decimal_sep_pattern,
+                decimal_places,
+            )
+        else:
+            pattern = r"(?:\d{1,3}%s)*\d{1,3}" % thousand_sep_pattern
+    return {
+        "pattern": pattern,
+        "regex": compile_pattern(pattern),
+        # filter out percentages with decimals like VAT rates or discounts
+        # for example '5.5 %' or '20.0%', and without decimal e.g. 20%
+        # in a single pass
+        "percent_regex": compile_pattern(
+            r"\d{1,2}%s\d{1,2}\s?%%|\d{1,3}\s?%%" % decimal_sep_pattern
+        ),
+        # Try to filter out capital amounts
+        # Yes, this is a hack :)
+        # Works in EN and FR... what about other languages ?
+        "capital_regex": compile_pattern(
+            r"[Cc]apital.{1,30}(?:\d{1,3}%s)*\d{1,3}" % regex.escape(thousand_sep)
+        ),
+        "thousand_sep_regex": thousand_sep_pattern
+        and compile_pattern(thousand_sep_pattern),
+    }
+
+
 class AccountInvoiceImportSimplePdfFields(models.Model):
     _name = "account.invoice.import.simple.pdf.fields"
     _description = "Fields for Simple PDF invoice import"
@@ -251,36 +329,24 @@ class AccountInvoiceImportSimplePdfFields(models.Model):
                 % error_arg
             )
         date_separator_char = partner_config["separator2char"][date_separator]
-
-        if self.regexp:
-            pattern = self.regexp
-        else:
-            pattern = date_format
-            # Special case to support "1er Janvier 2022" or "July 5th, 2022"
-            if date_separator_char == chr(32) and "month" in pattern:
-                pattern = pattern.replace("dd", r"\d{1,2}\p{L}{0,2}")
-            for src, dest in partner_config["date_format2regex"].items():
-                pattern = pattern.replace(src, dest)
-
-            if date_separator_char == chr(32):
-                date_separator_regex = ",?%s+" % test_info["space_pattern"]
-            else:
-                date_separator_regex = regex.escape(date_separator_char)
-
-            pattern = pattern.replace("-", date_separator_regex)
+        plan = _date_plan(
+            self.regexp,
+            date_format,
+            date_separator_char,
+            test_info["space_pattern"],
+            tuple(partner_config["date_format2regex"].items()),
+            tuple(partner_config["date_format2dt"].items()),
+        )
         test_info[self.name] = {
-            "pattern": pattern,
+            "pattern": plan["pattern"],
             "date_format": test_info["date_format_sel"][date_format].replace(
                 " ", date_separator_char
             ),
         }
         restrict_text = self.restrict_text(raw_text, test_info)
-        res_regex = regex.findall(pattern, restrict_text)
+        res_regex = plan["regex"].findall(restrict_text)
         valid_dates_dt = []
-        date_formatdt = date_format
-        for src, dest in partner_config["date_format2dt"].items():
-            date_formatdt = date_formatdt.replace(src, dest)
-        date_formatdt = date_formatdt.replace("-", date_separator_char)
+        date_formatdt = plan["date_formatdt"]
         languages = (
             partner_config["lang_short"] and [partner_config["lang_short"]] or None
         )
@@ -327,53 +393,28 @@ class AccountInvoiceImportSimplePdfFields(models.Model):
         return self._get_date(*args)
 
     def _get_amount_total(self, parsed_inv, raw_text, partner_config, test_info):
-        thousand_sep = partner_config["thousand_sep"]
-        if not thousand_sep:
-            thousand_sep_pattern = ""
-        elif thousand_sep == chr(32):
-            thousand_sep_pattern = test_info["space_pattern"]
-        else:
-            thousand_sep_pattern = regex.escape(thousand_sep)
-        decimal_sep = partner_config["decimal_sep"]
-        decimal_sep_pattern = regex.escape(decimal_sep)
         decimal_places = partner_config["currency"].decimal_places
-        if self.regexp:
-            pattern = self.regexp
-        else:
-            if decimal_places:
-                pattern = r"(?:\d{1,3}%s)*\d{1,3}%s\d{%d}" % (
-                    thousand_sep_pattern,
-                    decimal_sep_pattern,
-                    decimal_places,
-                )
-            else:
-                pattern = r"(?:\d{1,3}%s)*\d{1,3}" % thousand_sep_pattern
-        test_info[self.name] = {"pattern": pattern}
+        plan = _amount_plan(
+            self.regexp,
+            partner_config["thousand_sep"],
+            partner_config["decimal_sep"],
+            decimal_places,
+            test_info["space_pattern"],
+        )
+        test_info[self.name] = {"pattern": plan["pattern"]}
         # don't take if followed by a % ? => means it's a rate
         restrict_text = self.restrict_text(raw_text, test_info)
         # I don't move the code that filters out percentrages and capital
         # to simple_pdf_text_extraction() because I want to have raw
         # test for start/end cut
-        # filter out percentage with decimal like VAT rates or discounts
-        # for example '5.5 %' or '20.0%'
-        restrict_text_filtered = regex.sub(
-            r"\d{1,2}%s\d{1,2}\s?%%" % regex.escape(decimal_sep), "", restrict_text
-        )
-        # filter out discounts or VAT rates without decimal e.g. 20%
-        restrict_text_filtered = regex.sub(r"\d{1,3}\s?%", "", restrict_text_filtered)
-        # Try to filter out capital amounts
-        # Yes, this is a hack :)
-        # Works in EN and FR... what about other languages ?
-        restrict_text_filtered = regex.sub(
-            r"[Cc]apital.{1,30}(?:\d{1,3}%s)*\d{1,3}" % regex.escape(thousand_sep),
-            "",
-            restrict_text_filtered,
-        )
-        res_regex = regex.findall(pattern, restrict_text_filtered)
+        restrict_text_filtered = plan["percent_regex"].sub("", restrict_text)
+        restrict_text_filtered = plan["capital_regex"].sub("", restrict_text_filtered)
+        res_regex = plan["regex"].findall(restrict_text_filtered)
+        thousand_sep_regex = plan["thousand_sep_regex"]
         valid_amounts = []
         for amount_raw in res_regex:
-            if thousand_sep_pattern:
-                amount_raw = regex.sub(thousand_sep_pattern, "", amount_raw)
+            if thousand_sep_regex:
+                amount_raw = thousand_sep_regex.sub("", amount_raw)
             if decimal_places:
                 amount_raw_list = list(amount_raw)
                 amount_raw_list[-decimal_places - 1] = "."
@@ -405,7 +446,7 @@ class AccountInvoiceImportSimplePdfFields(models.Model):
         pattern = self.regexp or partner._prepare_simple_pdf_invoice_number_regex()
         test_info[self.name] = {"pattern": pattern}
         restrict_text = self.restrict_text(raw_text, test_info)
-        res_regex = regex.findall(pattern, restrict_text)
+        res_regex = compile_pattern(pattern).findall(restrict_text)
         test_info[self.name]["res_regex"] = res_regex
 
         inv_number = self.get_value_from_list(res_regex, test_info, raise_if_none=False)
@@ -419,7 +460,7 @@ class AccountInvoiceImportSimplePdfFields(models.Model):
         pattern = self.regexp
         test_info[self.name] = {"pattern": pattern}
         restrict_text = self.restrict_text(raw_text, test_info)
-        res_regex = regex.findall(pattern, restrict_text)
+        res_regex = compile_pattern(pattern).findall(restrict_text)
         test_info[self.name]["res_regex"] = res_regex
         description = self.get_value_from_list(
             res_regex, test_info, raise_if_none=False
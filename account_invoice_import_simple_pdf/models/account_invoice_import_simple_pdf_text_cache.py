@@ -0,0 +1,105 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DAYS = 30
+
+
+class AccountInvoiceImportSimplePdfTextCache(models.Model):
+    _name = "account.invoice.import.simple.pdf.text.cache"
+    _description = "Text extracted from PDF invoices for Simple PDF import"
+
+    checksum = fields.Char(required=True, index=True, readonly=True)
+    extraction_config = fields.Char(readonly=True)
+    text_extraction = fields.Char(string="Extraction Method", readonly=True)
+    text_all = fields.Text(readonly=True)
+    text_first = fields.Text(readonly=True)
+
+    _sql_constraints = [
+        (
+            "checksum_config_uniq",
+            "unique(checksum, extraction_config)",
+            "This PDF file has already been extracted with the same configuration.",
+        )
+    ]
+
+    @api.model
+    def _get_cache_days(self):
+        """Number of days the extracted text is kept. 0 disables the cache."""
+        value = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("invoice_import_simple_pdf.text_cache_days")
+        )
+        if value in (None, False, ""):
+            return DEFAULT_CACHE_DAYS
+        try:
+            return int(value)
+        except ValueError:
+            logger.warning(
+                "Invalid value '%s' for system parameter "
+                "invoice_import_simple_pdf.text_cache_days",
+                value,
+            )
+            return DEFAULT_CACHE_DAYS
+
+    @api.model
+    def _compute_checksum(self, file_data):
+        return hashlib.sha256(file_data).hexdigest()
+
+    @api.model
+    def _get_text(self, checksum, extraction_config):
+        if not self._get_cache_days():
+            return False
+        entry = self.sudo().search(
+            [
+                ("checksum", "=", checksum),
+                ("extraction_config", "=", extraction_config or False),
+            ],
+            limit=1,
+        )
+        if not entry:
+            return False
+        logger.info("PDF text found in cache (sha256 %s)", checksum)
+        return {
+            "all": entry.text_all or "",
+            "first": entry.text_first or "",
+            "text_extraction": entry.text_extraction,
+        }
+
+    @api.model
+    def _set_text(self, checksum, extraction_config, res, text_extraction):
+        if not self._get_cache_days():
+            return
+        # Another transaction may store the same file concurrently:
+        # the cache must never make the import fail
+        try:
+            with self.env.cr.savepoint():
+                self.sudo().create(
+                    {
+                        "checksum": checksum,
+                        "extraction_config": extraction_config or False,
+                        "text_extraction": text_extraction,
+                        "text_all": res["all"],
+                        "text_first": res["first"],
+                    }
+                )
+        except Exception as e:
+            logger.info("Could not store the PDF text in cache. Error: %s", e)
+
+    @api.autovacuum
+    def _gc_text_cache(self):
+        cache_days = self._get_cache_days()
+        domain = []
+        if cache_days:
+            limit_date = fields.Datetime.now() - timedelta(days=cache_days)
+            domain = [("create_date", "<", limit_date)]
+        entries = self.sudo().search(domain)
+        entries.unlink()
+        logger.info("Removed %d Simple PDF text cache entries", len(entries))
@@ -21,6 +21,34 @@ except ImportError:
 class ResPartner(models.Model):
     _inherit = "res.partner"
 
+    def _simple_pdf_partner_index_fields(self):
+        aiio = self.env["account.invoice.import"]
+        return set(aiio._simple_pdf_keyword_fields()) | {
+            "simple_pdf_keyword",
+            "parent_id",
+            "is_company",
+            "active",
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        index_fields = self._simple_pdf_partner_index_fields()
+        if any(index_fields.intersection(vals) for vals in vals_list):
+            self.env["account.invoice.import"]._simple_pdf_partner_index_clear()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._simple_pdf_partner_index_fields().intersection(vals):
+            self.env["account.invoice.import"]._simple_pdf_partner_index_clear()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["account.invoice.import"]._simple_pdf_partner_index_clear()
+        return res
+
     @api.model
     def _simple_pdf_date_format_sel(self):
         return [
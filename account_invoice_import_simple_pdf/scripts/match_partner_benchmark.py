@@ -0,0 +1,93 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+"""
+Benchmark of the matching of the vendor of a PDF invoice.
+
+Synthetic vendors are created, half of them matched on their VAT number and
+the other half on 2 keywords. The matching with the keyword index is compared
+with one substring search per keyword and per vendor, then everything is
+rolled back. To be run from an Odoo shell, on a test database with
+account_invoice_import_simple_pdf installed:
+
+    odoo shell -d <database> < \\
+        account_invoice_import_simple_pdf/scripts/match_partner_benchmark.py
+"""
+import time
+
+PARTNER_COUNT = 40000
+DOCUMENT_COUNT = 200
+
+
+def match_partner_linear(raw_text_no_space, entries):
+    """Matching with one substring search per keyword and per partner."""
+    for partner_id, keywords, kfield_values in entries:
+        if keywords and all(kw in raw_text_no_space for kw in keywords):
+            return partner_id
+        for value in kfield_values.values():
+            if value in raw_text_no_space:
+                return partner_id
+    return False
+
+
+def create_partners(env, partner_count):
+    env["res.partner"].create(
+        [
+            {
+                "name": "Benchmark Supplier %d" % i,
+                "is_company": True,
+                "vat": i % 2 and "XX%09d" % i or False,
+                "simple_pdf_keyword": not i % 2
+                and "Bench%d|Supplier%d" % (i, i)
+                or False,
+            }
+            for i in range(partner_count)
+        ]
+    )
+    env["res.partner"].flush()
+
+
+def get_texts(partner_count, document_count):
+    filler = "InvoiceNumberDateQuantityUnitPriceTotalAmountDue" * 40
+    texts = []
+    for doc in range(document_count):
+        i = doc * partner_count // document_count
+        key = i % 2 and "XX%09d" % i or "Bench%dSupplier%d" % (i, i)
+        texts.append(filler + key + filler)
+    return texts
+
+
+def main(env, partner_count=PARTNER_COUNT, document_count=DOCUMENT_COUNT):
+    aiio = env["account.invoice.import"]
+    try:
+        create_partners(env, partner_count)
+        aiio._simple_pdf_partner_index_clear()
+        start = time.perf_counter()
+        __, entries = aiio._simple_pdf_partner_index()
+        build_time = time.perf_counter() - start
+        texts = get_texts(partner_count, document_count)
+        start = time.perf_counter()
+        matched = len([t for t in texts if aiio.simple_pdf_match_partner(t)])
+        index_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for text in texts:
+            match_partner_linear(text, entries)
+        linear_time = time.perf_counter() - start
+        print(
+            "%d partners, %d/%d documents matched: index built in %.1f ms, "
+            "%.3f ms per document with the index, %.3f ms without"
+            % (
+                partner_count,
+                matched,
+                document_count,
+                build_time * 1000,
+                index_time * 1000 / document_count,
+                linear_time * 1000 / document_count,
+            )
+        )
+    finally:
+        env.cr.rollback()
+        env.clear()
+        aiio._simple_pdf_partner_index_clear()
+
+
+main(env)  # noqa: F821
@@ -3,6 +3,7 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 import base64
+from unittest.mock import patch
 
 from odoo import fields
 from odoo.tests.common import TransactionCase
@@ -520,6 +521,30 @@ class TestInvoiceImport(TransactionCase):
         self.assertIn("FR 74 397 480 930", res["first"])
         self.assertIn("FR74397480930", res["first_no_space"])
 
+    def test_raw_extraction_cache(self):
+        aiio = self.env["account.invoice.import"]
+        cacheo = self.env["account.invoice.import.simple.pdf.text.cache"]
+        checksum = cacheo._compute_checksum(self.bt_pdf_file)
+        cacheo.search([("checksum", "=", checksum)]).unlink()
+        res = aiio.simple_pdf_text_extraction(self.bt_pdf_file, self.test_info)
+        entry = cacheo.search([("checksum", "=", checksum)])
+        self.assertEqual(len(entry), 1)
+        self.assertEqual(entry.text_extraction, self.test_info["text_extraction"])
+        with patch.object(
+            type(aiio), "_simple_pdf_text_extraction_raw"
+        ) as extraction_mock:
+            cached_res = aiio.simple_pdf_text_extraction(
+                self.bt_pdf_file, self.test_info
+            )
+            extraction_mock.assert_not_called()
+        self.assertEqual(res, cached_res)
+        # Expired entries are removed by the autovacuum
+        self.env["ir.config_parameter"].set_param(
+            "invoice_import_simple_pdf.text_cache_days", "0"
+        )
+        cacheo._gc_text_cache()
+        self.assertFalse(entry.exists())
+
     def test_complete_import(self):
         wiz = self.env["account.invoice.import"].create(
             {
@@ -585,3 +610,27 @@ class TestInvoiceImport(TransactionCase):
         self.assertFalse(self.partner_ak.simple_pdf_test_results)
         self.assertFalse(self.partner_ak.simple_pdf_test_raw_text)
         self.assertFalse(self.partner_ak.simple_pdf_test_file)
+
+    def test_match_partner(self):
+        aiio = self.env["account.invoice.import"]
+        partner2 = self.env["res.partner"].create(
+            {
+                "name": "Test Partner 2",
+                "is_company": True,
+                "simple_pdf_keyword": "Acme | Widgets",
+            }
+        )
+        self.partner.write({"vat": "FR86792377731"})
+        test_results = []
+        text = "InvoicefromAcmeWidgetsVATFR86792377731"
+        self.assertEqual(aiio.simple_pdf_match_partner(text, test_results), partner2.id)
+        self.assertTrue(test_results)
+        self.assertEqual(
+            aiio.simple_pdf_match_partner("VATFR86792377731Acme"), self.partner.id
+        )
+        self.assertFalse(aiio.simple_pdf_match_partner("Widgets"))
+        # the index follows the changes on the partners
+        partner2.write({"simple_pdf_keyword": "Widgets"})
+        self.assertEqual(aiio.simple_pdf_match_partner("Widgets"), partner2.id)
+        partner2.write({"active": False})
+        self.assertFalse(aiio.simple_pdf_match_partner("Widgets"))
@@ -0,0 +1,77 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton to find many keywords in a text.
+
+    The automaton is built once for a set of keywords,
+    then each text is scanned in a single pass
+    whatever the number of keywords.
+    """
+
+    def __init__(self, keywords):
+        # Transitions, failure links, keyword ending on state
+        # and link to the nearest failure state ending a keyword
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        self._output_link = [0]
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_links()
+
+    def _add(self, keyword):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._output_link.append(0)
+            state = next_state
+        self._output[state] = keyword
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                if fail == next_state:
+                    fail = 0
+                self._fail[next_state] = fail
+                self._output_link[next_state] = (
+                    fail if self._output[fail] else self._output_link[fail]
+                )
+
+    def find_all(self, text):
+        """Return the set of keywords contained in given text."""
+        goto, fail, output, output_link = (
+            self._goto,
+            self._fail,
+            self._output,
+            self._output_link,
+        )
+        found = set()
+        seen_states = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match_state = state if output[state] else output_link[state]
+            while match_state and match_state not in seen_states:
+                seen_states.add(match_state)
+                found.add(output[match_state])
+                match_state = output_link[match_state]
+        return found
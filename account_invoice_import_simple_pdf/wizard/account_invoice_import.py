@@ -2,15 +2,17 @@
 # @author: Alexis de Lattre <alexis.delattre@akretion.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import io
 import logging
 import shutil
 import subprocess
-from tempfile import NamedTemporaryFile
 
 from odoo import _, api, models
 from odoo.exceptions import UserError
 from odoo.osv import expression
 
+from ..utils import KeywordAutomaton
+
 logger = logging.getLogger(__name__)
 try:
     import fitz
@@ -48,17 +50,20 @@ class AccountInvoiceImport(models.TransientModel):
         return res
 
     @api.model
-    def _simple_pdf_text_extraction_pymupdf(self, fileobj, test_info):
+    def _simple_pdf_pages_to_res(self, pages):
+        return {
+            "all": "\n\n".join(pages),
+            "first": pages and pages[0] or "",
+        }
+
+    @api.model
+    def _simple_pdf_text_extraction_pymupdf(self, file_data, test_info):
         res = False
         try:
-            pages = []
-            doc = fitz.open(fileobj.name)
-            for page in doc:
-                pages.append(page.get_text())
-            res = {
-                "all": "\n\n".join(pages),
-                "first": pages and pages[0] or "",
-            }
+            doc = fitz.open(stream=file_data, filetype="pdf")
+            pages = [page.get_text() for page in doc]
+            doc.close()
+            res = self._simple_pdf_pages_to_res(pages)
             logger.info("Text extraction made with PyMuPDF %s", fitz.__version__)
             test_info["text_extraction"] = "pymupdf %s" % fitz.__version__
         except Exception as e:
@@ -66,9 +71,11 @@ class AccountInvoiceImport(models.TransientModel):
         return res
 
     @api.model
-    def _simple_pdf_text_extraction_pdfplumber(self, fileobj, test_info):
+    def _simple_pdf_text_extraction_pdfplumber(self, file_data, test_info):
         res = False
-        with pdfplumber.open(fileobj.name, laparams={"detect_vertical": True}) as pdf:
+        with pdfplumber.open(
+            io.BytesIO(file_data), laparams={"detect_vertical": True}
+        ) as pdf:
             pages = []
             for pdf_page in pdf.pages:
                 pages.append(
@@ -76,77 +83,70 @@ class AccountInvoiceImport(models.TransientModel):
                         layout=True, use_text_flow=True, keep_blank_chars=True
                     )
                 )
-            res = {
-                "all": "\n\n".join(pages),
-                "first": pages and pages[0] or "",
-            }
+            res = self._simple_pdf_pages_to_res(pages)
         test_info["text_extraction"] = "pdfplumber %s" % pdfplumber.__version__
         logger.info("Text extraction made with pdfplumber %s", pdfplumber.__version__)
         return res
 
     @api.model
-    def _simple_pdf_text_extraction_pypdf(self, fileobj, test_info):
+    def _simple_pdf_text_extraction_pypdf(self, file_data, test_info):
         res = False
-        reader = pypdf.PdfReader(fileobj.name)
-        pages = []
-        for pdf_page in reader.pages:
-            pages.append(pdf_page.extract_text())
-            res = {
-                "all": "\n\n".join(pages),
-                "first": pages and pages[0] or "",
-            }
+        reader = pypdf.PdfReader(io.BytesIO(file_data))
+        pages = [pdf_page.extract_text() for pdf_page in reader.pages]
+        if pages:
+            res = self._simple_pdf_pages_to_res(pages)
         test_info["text_extraction"] = "pypdf %s" % pypdf.__version__
         logger.info("Text extraction made with pypdf %s", pypdf.__version__)
         return res
 
     @api.model
-    def _simple_pdf_pdftotext_cmd_call(self, fileobj, test_info, first_page=False):
+    def _simple_pdf_pdftotext_cmd_call(self, file_data, test_info):
+        """Run pdftotext once on the whole file, read from stdin.
+
+        :return: list of the text of each page
+        """
         res = False
         if not shutil.which("pdftotext"):
             logger.warning(
                 "Could not find the pdftotext utility. Hint: sudo apt install poppler-utils"
             )
             return False
-        cmd_args = ["pdftotext"]
-        if first_page:
-            cmd_args += ["-l", "1"]
-        cmd_args += ["-layout", fileobj.name, "-"]
+        cmd_args = ["pdftotext", "-layout", "-", "-"]
         try:
-            out, err = subprocess.Popen(cmd_args, stdout=subprocess.PIPE).communicate()
+            out, err = subprocess.Popen(
+                cmd_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            ).communicate(file_data)
             if err:
                 logger.debug("pdftotext_cmd err=%s", err)
             if out:
-                res = out.decode("utf8")
+                # pdftotext ends each page with a form feed
+                res = out.decode("utf8").split("\f")
+                if len(res) > 1 and not res[-1].strip():
+                    res.pop()
         except Exception as e:
             logger.info("Text extraction with pdftotext command failed. Error: %s", e)
         return res
 
     @api.model
-    def _simple_pdf_text_extraction_pdftotext_cmd(self, fileobj, test_info):
-        res_all = self._simple_pdf_pdftotext_cmd_call(fileobj, test_info)
-        if not res_all:
+    def _simple_pdf_text_extraction_pdftotext_cmd(self, file_data, test_info):
+        pages = self._simple_pdf_pdftotext_cmd_call(file_data, test_info)
+        if not pages:
             return False
         res = {
-            "all": res_all,
-            "first": self._simple_pdf_pdftotext_cmd_call(
-                fileobj, test_info, first_page=True
-            ),
+            "all": "\f".join(pages),
+            "first": pages[0],
         }
         test_info["text_extraction"] = "pdftotext.cmd"
         logger.info("Text extraction made with pdftotext command")
         return res
 
     @api.model
-    def _simple_pdf_text_extraction_pdftotext_lib(self, fileobj, test_info):
+    def _simple_pdf_text_extraction_pdftotext_lib(self, file_data, test_info):
         # pdftotext lib doc: https://github.com/jalan/pdftotext
         res = False
         try:
-            with open(fileobj.name, "rb") as pdf_file:
-                pdf = pdftotext.PDF(pdf_file)
-                res = {
-                    "all": "\n\n".join(pdf),
-                    "first": pdf[0],
-                }
+            pdf = pdftotext.PDF(io.BytesIO(file_data))
+            res = self._simple_pdf_pages_to_res(list(pdf))
             logger.info("Text extraction made with pdftotext lib")
             test_info["text_extraction"] = "pdftotext.lib"
         except Exception as e:
@@ -155,19 +155,19 @@ class AccountInvoiceImport(models.TransientModel):
 
     @api.model
     def _simple_pdf_text_extraction_specific_tool(
-        self, specific_tool, fileobj, test_info
+        self, specific_tool, file_data, test_info
     ):
         res = False
         if specific_tool == "pymupdf":
-            res = self._simple_pdf_text_extraction_pymupdf(fileobj, test_info)
+            res = self._simple_pdf_text_extraction_pymupdf(file_data, test_info)
         elif specific_tool == "pdftotext.lib":
-            res = self._simple_pdf_text_extraction_pdftotext_lib(fileobj, test_info)
+            res = self._simple_pdf_text_extraction_pdftotext_lib(file_data, test_info)
         elif specific_tool == "pdftotext.cmd":
-            res = self._simple_pdf_text_extraction_pdftotext_cmd(fileobj, test_info)
+            res = self._simple_pdf_text_extraction_pdftotext_cmd(file_data, test_info)
         elif specific_tool == "pdfplumber":
-            res = self._simple_pdf_text_extraction_pdfplumber(fileobj, test_info)
+            res = self._simple_pdf_text_extraction_pdfplumber(file_data, test_info)
         elif specific_tool == "pypdf":
-            res = self._simple_pdf_text_extraction_pypdf(fileobj, test_info)
+            res = self._simple_pdf_text_extraction_pypdf(file_data, test_info)
         else:
             raise UserError(
                 _(
@@ -188,13 +188,37 @@ class AccountInvoiceImport(models.TransientModel):
         return res
 
     @api.model
-    def simple_pdf_text_extraction(self, file_data, test_info):
-        fileobj = NamedTemporaryFile("wb", prefix="odoo-simple-pdf-", suffix=".pdf")
-        fileobj.write(file_data)
+    def _simple_pdf_text_extraction_raw(self, file_data, specific_tool, test_info):
         # Extract text from PDF
         # Very interesting reading:
         # https://dida.do/blog/how-to-extract-text-from-pdf
         # https://github.com/erfelipe/PDFtextExtraction
+        if specific_tool:
+            return self._simple_pdf_text_extraction_specific_tool(
+                specific_tool, file_data, test_info
+            )
+        # From best tool to worst
+        res = self._simple_pdf_text_extraction_pymupdf(file_data, test_info)
+        if not res:
+            res = self._simple_pdf_text_extraction_pdftotext_lib(file_data, test_info)
+        if not res:
+            res = self._simple_pdf_text_extraction_pdftotext_cmd(file_data, test_info)
+        if not res:
+            res = self._simple_pdf_text_extraction_pdfplumber(file_data, test_info)
+        if not res:
+            res = self._simple_pdf_text_extraction_pypdf(file_data, test_info)
+        if not res:
+            raise UserError(
+                _(
+                    "Odoo could not extract the text from the PDF invoice. "
+                    "Refer to the Odoo server logs for more technical information "
+                    "about the cause of the failure."
+                )
+            )
+        return res
+
+    @api.model
+    def simple_pdf_text_extraction(self, file_data, test_info):
         specific_tool = (
             self.env["ir.config_parameter"]
             .sudo()
@@ -203,29 +227,20 @@ class AccountInvoiceImport(models.TransientModel):
         if specific_tool:
             specific_tool = specific_tool.strip().lower()
         test_info["text_extraction_config"] = specific_tool
-        if specific_tool:
-            res = self._simple_pdf_text_extraction_specific_tool(
-                specific_tool, fileobj, test_info
-            )
+        # The text of a given file only depends on the extraction method,
+        # so re-imports and test runs re-use the text extracted previously
+        cacheo = self.env["account.invoice.import.simple.pdf.text.cache"]
+        checksum = cacheo._compute_checksum(file_data)
+        res = cacheo._get_text(checksum, specific_tool)
+        if res:
+            test_info["text_extraction"] = res.pop("text_extraction")
         else:
-            # From best tool to worst
-            res = self._simple_pdf_text_extraction_pymupdf(fileobj, test_info)
-            if not res:
-                res = self._simple_pdf_text_extraction_pdftotext_lib(fileobj, test_info)
-            if not res:
-                res = self._simple_pdf_text_extraction_pdftotext_cmd(fileobj, test_info)
-            if not res:
-                res = self._simple_pdf_text_extraction_pdfplumber(fileobj, test_info)
-            if not res:
-                res = self._simple_pdf_text_extraction_pypdf(fileobj, test_info)
-            if not res:
-                raise UserError(
-                    _(
-                        "Odoo could not extract the text from the PDF invoice. "
-                        "Refer to the Odoo server logs for more technical information "
-                        "about the cause of the failure."
-                    )
-                )
+            res = self._simple_pdf_text_extraction_raw(
+                file_data, specific_tool, test_info
+            )
+            cacheo._set_text(
+                checksum, specific_tool, res, test_info.get("text_extraction")
+            )
         for key, text in res.items():
             if text:
                 # Remove lonely accents
@@ -240,7 +255,6 @@ class AccountInvoiceImport(models.TransientModel):
         res["first_no_space"] = regex.sub(
             "%s+" % test_info["space_pattern"], "", res["first"]
         )
-        fileobj.close()
         return res
 
     @api.model
@@ -249,35 +263,124 @@ class AccountInvoiceImport(models.TransientModel):
             "vat": _("VAT number"),
         }
 
+    @api.model
+    def _simple_pdf_partner_domain(self):
+        keyword_fields_list = list(self._simple_pdf_keyword_fields().keys())
+        domain_or_list = [[(field, "!=", False)] for field in keyword_fields_list]
+        domain_or_list.append([("simple_pdf_keyword", "!=", False)])
+        return expression.AND(
+            [
+                expression.OR(domain_or_list),
+                [("parent_id", "=", False), ("is_company", "=", True)],
+            ]
+        )
+
+    @api.model
+    def _simple_pdf_partner_index_fingerprint(self):
+        """Cheap fingerprint of the partners having keywords.
+
+        It changes whenever a matching partner is created, updated or deleted.
+        """
+        groups = (
+            self.env["res.partner"]
+            .sudo()
+            .read_group(self._simple_pdf_partner_domain(), ["write_date:max"], [])
+        )
+        keyword_fields = tuple(self._simple_pdf_keyword_fields().keys())
+        if not groups:
+            return (keyword_fields, 0, False)
+        return (keyword_fields, groups[0]["__count"], groups[0]["write_date"])
+
+    @api.model
+    def _simple_pdf_build_partner_index(self):
+        """Index all partners keywords and VAT numbers.
+
+        :return: tuple `(automaton, partner_entries)` where each entry is
+            `(partner_id, keywords, {keyword_field: value})`
+        """
+        keyword_fields_list = list(self._simple_pdf_keyword_fields().keys())
+        partners = (
+            self.env["res.partner"]
+            .sudo()
+            .search_read(
+                self._simple_pdf_partner_domain(),
+                ["simple_pdf_keyword"] + keyword_fields_list,
+            )
+        )
+        entries = []
+        all_keywords = set()
+        for partner in partners:
+            keywords = None
+            if partner["simple_pdf_keyword"] and partner["simple_pdf_keyword"].strip():
+                keywords = tuple(
+                    partner["simple_pdf_keyword"].replace(" ", "").split("|")
+                )
+                all_keywords.update(keywords)
+            kfield_values = {
+                kfield: partner[kfield]
+                for kfield in keyword_fields_list
+                if partner[kfield]
+            }
+            all_keywords.update(kfield_values.values())
+            entries.append((partner["id"], keywords, kfield_values))
+        return KeywordAutomaton(all_keywords), entries
+
+    @api.model
+    def _simple_pdf_partner_index(self):
+        """Return the partner index, rebuilt only when the partners changed.
+
+        The index is kept on the registry. The fingerprint catches
+        the changes made by other workers, the changes made in the current
+        transaction are handled by `_simple_pdf_partner_index_clear`.
+        """
+        fingerprint = self._simple_pdf_partner_index_fingerprint()
+        cached = getattr(self.pool, "_simple_pdf_partner_index_cache", None)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        index = self._simple_pdf_build_partner_index()
+        self.pool._simple_pdf_partner_index_cache = (fingerprint, index)
+        return index
+
+    @api.model
+    def _simple_pdf_partner_index_clear(self):
+        self.pool._simple_pdf_partner_index_cache = None
+
     @api.model
     def simple_pdf_match_partner(self, raw_text_no_space, test_results=None):
         if test_results is None:
             test_results = []
         partner_id = False
         rpo = self.env["res.partner"]
+        keyword_fields_dict = self._simple_pdf_keyword_fields()
+        automaton, entries = self._simple_pdf_partner_index()
+        # Scan the text once for all the keywords of all the partners
+        found = automaton.find_all(raw_text_no_space)
+        found.add("")
+        candidates = {}
+        for entry in entries:
+            __, keywords, kfield_values = entry
+            if (keywords and found.issuperset(keywords)) or any(
+                value in found for value in kfield_values.values()
+            ):
+                candidates[entry[0]] = entry
+        if not candidates:
+            return partner_id
         # Warning: invoices have the VAT number of the supplier, but they often
         # also have the VAT number of the customer (i.e. the VAT number of our company)
-        # So we exclude it from the search
-        keyword_fields_dict = self._simple_pdf_keyword_fields()
-        keyword_fields_list = list(keyword_fields_dict.keys())
-        domain_or_list = [[(field, "!=", False)] for field in keyword_fields_list]
-        domain_or_list.append([("simple_pdf_keyword", "!=", False)])
-        field_domain = expression.OR(domain_or_list)
-        partners = rpo.search_read(
-            field_domain
-            + [
-                ("parent_id", "=", False),
-                ("is_company", "=", True),
+        # So we exclude it from the search.
+        # Search again to apply access rules and keep the partners ordering.
+        partners = rpo.search(
+            [
+                ("id", "in", list(candidates)),
                 ("id", "!=", self.env.company.partner_id.id),
-            ],
-            ["simple_pdf_keyword"] + keyword_fields_list,
+            ]
+            + self._simple_pdf_partner_domain()
         )
         for partner in partners:
-            if partner["simple_pdf_keyword"] and partner["simple_pdf_keyword"].strip():
-                keywords = partner["simple_pdf_keyword"].replace(" ", "").split("|")
-                found_res = [keyword in raw_text_no_space for keyword in keywords]
-                if all(found_res):
-                    partner_id = partner["id"]
+            __, keywords, kfield_values = candidates[partner.id]
+            if keywords:
+                if found.issuperset(keywords):
+                    partner_id = partner.id
                     result_label = _("Successful match on %d keywords (%s)") % (
                         len(keywords),
                         ", ".join(keywords),
@@ -285,11 +388,12 @@ class AccountInvoiceImport(models.TransientModel):
                     test_results.append("<li>%s</li>" % result_label)
                     break
             for kfield, kfield_label in keyword_fields_dict.items():
-                if partner[kfield] and partner[kfield] in raw_text_no_space:
-                    partner_id = partner["id"]
+                value = kfield_values.get(kfield)
+                if value and value in found:
+                    partner_id = partner.id
                     result_label = _("Successful match on {label} '{value}'").format(
                         label=kfield_label,
-                        value=partner[kfield],
+                        value=value,
                     )
                     test_results.append("<li>%s</li>" % result_label)
                     break
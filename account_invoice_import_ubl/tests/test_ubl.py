@@ -3,8 +3,10 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import base64
+from unittest import mock
 
 from odoo import fields
+from odoo.exceptions import UserError
 from odoo.tests.common import TransactionCase
 from odoo.tools import file_open, float_compare, mute_logger
 
@@ -88,3 +90,104 @@ class TestUbl(TransactionCase):
                 0,
             )
             invoices.unlink()
+
+    @mute_logger(
+        LOGGER, "odoo.addons.account_invoice_import.wizard.account_invoice_import"
+    )
+    def test_import_ubl_invoice_batch(self):
+        aiio = self.env["account.invoice.import"]
+        invoice_files = []
+        for sample_file in (
+            "UBLKetentest_Referentiefactuur_20150100.xml",
+            "efff_BE0505890632_160421_Inv_16117778.xml",
+            "UBLInvoice-multitankcard-line_adjust.xml",
+        ):
+            with file_open(
+                "account_invoice_import_ubl/tests/files/" + sample_file, "rb"
+            ) as f:
+                invoice_files.append(
+                    {
+                        "invoice_file_b64": base64.b64encode(f.read()),
+                        "invoice_filename": sample_file,
+                    }
+                )
+        invoice_files.append(
+            {
+                "invoice_file_b64": base64.b64encode(b"<Invoice>broken"),
+                "invoice_filename": "broken.xml",
+            }
+        )
+        # An attachment that doesn't exist anymore fails alone
+        attach = self.env["ir.attachment"].create(
+            {"name": "deleted.xml", "datas": invoice_files[-1]["invoice_file_b64"]}
+        )
+        invoice_files.append({"attachment_id": attach.id})
+        attach.unlink()
+        report = aiio.create_invoices_webservice(invoice_files, "Test batch")
+        self.assertEqual(
+            [res["state"] for res in report],
+            ["done", "done", "done", "failed", "failed"],
+        )
+        self.assertEqual(report[0]["filename"], invoice_files[0]["invoice_filename"])
+        invoices = self.env["account.move"].browse(
+            [res["invoice_id"] for res in report[:3]]
+        )
+        self.assertEqual(invoices.mapped("ref"), ["20150101", "16117778", "6311117"])
+        self.assertEqual(
+            invoices[1].partner_id,
+            self.env.ref("account_invoice_import_ubl.exact_belgium"),
+        )
+        # A second import of the same files skips the existing invoices
+        report = aiio.create_invoices_webservice(invoice_files[:1], "Test batch")
+        self.assertEqual(report[0]["state"], "skipped")
+        self.assertFalse(report[0]["invoice_id"])
+
+    @mute_logger(
+        LOGGER, "odoo.addons.account_invoice_import.wizard.account_invoice_import"
+    )
+    def test_import_ubl_invoice_batch_finalize_error(self):
+        aiio = self.env["account.invoice.import"]
+        sample_file = "efff_BE0505890632_160421_Inv_16117778.xml"
+        with file_open(
+            "account_invoice_import_ubl/tests/files/" + sample_file, "rb"
+        ) as f:
+            invoice_files = [
+                {
+                    "invoice_file_b64": base64.b64encode(f.read()),
+                    "invoice_filename": sample_file,
+                }
+            ]
+
+        def post_and_fail(parsed_inv, invoice, import_config):
+            invoice.action_post()
+            raise UserError("Post-processing failed")
+
+        with mock.patch.object(
+            type(aiio), "post_process_invoice", side_effect=post_and_fail
+        ):
+            report = aiio.create_invoices_webservice(
+                invoice_files, "Test batch", company_id=self.env.company.id
+            )
+        self.assertEqual(report[0]["state"], "failed")
+        self.assertFalse(
+            self.env["account.move"].search(
+                [("ref", "=", "16117778"), ("move_type", "=", "in_invoice")]
+            )
+        )
+        # The invoice that can't be deleted nor cancelled is reported
+        move_class = type(self.env["account.move"])
+        with mock.patch.object(
+            type(aiio), "post_process_invoice", side_effect=post_and_fail
+        ), mock.patch.object(
+            move_class, "unlink", side_effect=UserError("Can't delete")
+        ), mock.patch.object(
+            move_class, "button_cancel", side_effect=UserError("Can't cancel")
+        ):
+            report = aiio.create_invoices_webservice(
+                invoice_files, "Test batch", company_id=self.env.company.id
+            )
+        self.assertEqual(report[0]["state"], "failed")
+        self.assertIn("Can't cancel", report[0]["message"])
+        self.assertEqual(
+            self.env["account.move"].browse(report[0]["invoice_id"]).ref, "16117778"
+        )
@@ -5,8 +5,6 @@
 import logging
 from datetime import datetime
 
-from lxml import etree
-
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 from odoo.tools import float_compare
@@ -129,13 +127,10 @@ class AccountInvoiceImport(models.TransientModel):
         inv_xmlns = namespaces.pop(None)
         namespaces["inv"] = inv_xmlns
         logger.debug("XML file namespaces=%s", namespaces)
-        xml_string = etree.tostring(
-            xml_root, pretty_print=True, encoding="UTF-8", xml_declaration=True
-        )
         ubl_version_xpath = xml_root.xpath("//cbc:UBLVersionID", namespaces=namespaces)
         ubl_version = ubl_version_xpath and ubl_version_xpath[0].text or "2.1"
         # Check XML schema to avoid headaches trying to import invalid files
-        self._ubl_check_xml_schema(xml_string, "Invoice", version=ubl_version)
+        self._ubl_check_xml_schema(xml_root, "Invoice", version=ubl_version)
         doc_type_xpath = xml_root.xpath(
             "/inv:Invoice/cbc:InvoiceTypeCode[@listAgencyID='6']", namespaces=namespaces
         )
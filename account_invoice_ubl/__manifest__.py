@@ -16,7 +16,11 @@
         "base_ubl_payment",
         "account_tax_unece",
     ],
-    "data": ["views/account_move.xml", "views/res_config_settings.xml"],
+    "data": [
+        "security/ir.model.access.csv",
+        "views/account_move.xml",
+        "views/res_config_settings.xml",
+    ],
     "post_init_hook": "set_xml_format_in_pdf_invoice_to_ubl",
     "uninstall_hook": "remove_ubl_xml_format_in_pdf_invoice",
     "installable": True,
@@ -3,4 +3,5 @@
 from . import res_company
 from . import res_config_settings
 from . import account_move
+from . import account_move_ubl_cache
 from . import ir_actions_report
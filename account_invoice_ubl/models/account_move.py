@@ -4,8 +4,10 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import base64
+import hashlib
 import logging
 
+import psycopg2
 from lxml import etree
 
 from odoo import fields, models
@@ -18,6 +20,17 @@ class AccountMove(models.Model):
     _name = "account.move"
     _inherit = ["account.move", "base.ubl"]
 
+    def write(self, vals):
+        res = super().write(vals)
+        # The fingerprint of the cached XML files relies on the write dates,
+        # which don't change within a transaction
+        moves = self.filtered(lambda m: m.state == "posted" and m.is_sale_document())
+        if moves:
+            self.env["account.move.ubl.cache"].sudo().search(
+                [("move_id", "in", moves.ids)]
+            ).unlink()
+        return res
+
     def _ubl_add_header(self, parent_node, ns, version="2.1"):
         self.ensure_one()
         ubl_version = etree.SubElement(parent_node, ns["cbc"] + "UBLVersionID")
@@ -351,6 +364,120 @@ class AccountMove(models.Model):
         logger.debug(xml_string.decode("utf-8"))
         return xml_string
 
+    def _ubl_xml_fingerprint(self, version="2.1"):
+        """Fingerprint of the data used to generate the UBL XML file.
+
+        It is based on the last update of the records read by
+        generate_invoice_ubl_xml_etree(), so the cached XML file is
+        generated again as soon as one of them changes.
+        """
+        self.ensure_one()
+        lines = self.invoice_line_ids
+        partners = (
+            self.partner_id
+            | self.commercial_partner_id
+            | self.partner_shipping_id
+            | self.company_id.partner_id
+        )
+        records = (
+            self
+            | lines
+            | lines.product_id
+            | lines.product_id.product_tmpl_id
+            | lines.product_id.product_tmpl_id.seller_ids
+            | lines.product_id.attribute_line_ids.value_ids
+            | lines.product_uom_id
+            | lines.tax_ids
+            | partners
+            | partners.country_id
+            | partners.state_id
+            | self.company_id
+            | self.partner_bank_id
+            | self.partner_bank_id.bank_id
+            | self.payment_mode_id
+            | self.invoice_payment_term_id
+            | self.currency_id
+        )
+        data = [
+            version,
+            self.get_ubl_lang(),
+            bool(self.env.context.get("no_embedded_pdf")),
+        ]
+        for record in records:
+            data.append((record._name, record.id, str(record.write_date)))
+        return hashlib.sha1(repr(data).encode("utf-8")).hexdigest()
+
+    def _get_ubl_cache(self, version="2.1"):
+        self.ensure_one()
+        return (
+            self.env["account.move.ubl.cache"]
+            .sudo()
+            .search([("move_id", "=", self.id), ("version", "=", version)], limit=1)
+        )
+
+    def get_ubl_xml_string_cached(self, version="2.1"):
+        """Same as generate_ubl_xml_string(), but the XML file is only
+        generated again when the invoice changed."""
+        self.ensure_one()
+        fingerprint = self._ubl_xml_fingerprint(version=version)
+        cache = self._get_ubl_cache(version=version)
+        if cache and cache.fingerprint == fingerprint:
+            logger.debug(
+                "UBL XML file of invoice ID %d read from cache (version %s)",
+                self.id,
+                version,
+            )
+            return base64.b64decode(cache.xml_file)
+        xml_string = self.generate_ubl_xml_string(version=version)
+        vals = {
+            "fingerprint": fingerprint,
+            "xml_file": base64.b64encode(xml_string),
+            "pdf_fingerprint": False,
+        }
+        try:
+            # Concurrent downloads of the same invoice may try to create
+            # the cache at the same time: it must not make the download fail
+            with self.env.cr.savepoint():
+                if cache:
+                    cache.write(vals)
+                else:
+                    vals.update({"move_id": self.id, "version": version})
+                    self.env["account.move.ubl.cache"].sudo().create(vals)
+        except psycopg2.Error as e:
+            logger.info("Could not store the UBL XML file in cache: %s", e)
+        return xml_string
+
+    def _ubl_pdf_fingerprint(self, report, version="2.1"):
+        self.ensure_one()
+        return "%d-%s" % (report.id, self._ubl_xml_fingerprint(version=version))
+
+    def _is_ubl_xml_embedded_in_stored_pdf(self, report):
+        """Return True if the PDF of the report stored as attachment
+        already embeds the current UBL XML file"""
+        self.ensure_one()
+        version = self.get_ubl_version()
+        cache = self._get_ubl_cache(version=version)
+        return bool(
+            cache
+            and cache.pdf_fingerprint
+            and cache.pdf_fingerprint == self._ubl_pdf_fingerprint(report, version)
+        )
+
+    def _set_ubl_xml_embedded_in_stored_pdf(self, report):
+        self.ensure_one()
+        version = self.get_ubl_version()
+        cache = self._get_ubl_cache(version=version)
+        if cache:
+            cache.pdf_fingerprint = self._ubl_pdf_fingerprint(report, version)
+
+    def generate_ubl_xml_cache(self):
+        """Generate in advance the UBL XML files of the posted invoices,
+        so that the PDF downloads don't have to do it."""
+        version = self.get_ubl_version()
+        for move in self:
+            if move.is_ubl_sale_invoice_posted():
+                move.get_ubl_xml_string_cached(version=version)
+
     def get_ubl_filename(self, version="2.1"):
         """This method is designed to be inherited"""
         return "UBL-Invoice-%s.xml" % version
@@ -367,7 +494,7 @@ class AccountMove(models.Model):
         if self.is_ubl_sale_invoice_posted():
             version = self.get_ubl_version()
             xml_filename = self.get_ubl_filename(version=version)
-            xml_string = self.generate_ubl_xml_string(version=version)
+            xml_string = self.get_ubl_xml_string_cached(version=version)
             buffer = self._ubl_add_xml_in_pdf_buffer(xml_string, xml_filename, buffer)
         return buffer
 
@@ -376,7 +503,7 @@ class AccountMove(models.Model):
         if self.is_ubl_sale_invoice_posted():
             version = self.get_ubl_version()
             xml_filename = self.get_ubl_filename(version=version)
-            xml_string = self.generate_ubl_xml_string(version=version)
+            xml_string = self.get_ubl_xml_string_cached(version=version)
             pdf_content = self.embed_xml_in_pdf(
                 xml_string, xml_filename, pdf_content=pdf_content
             )
@@ -387,7 +514,7 @@ class AccountMove(models.Model):
         assert self.move_type in ("out_invoice", "out_refund")
         assert self.state == "posted"
         version = self.get_ubl_version()
-        xml_string = self.generate_ubl_xml_string(version=version)
+        xml_string = self.get_ubl_xml_string_cached(version=version)
         filename = self.get_ubl_filename(version=version)
         attach = (
             self.env["ir.attachment"]
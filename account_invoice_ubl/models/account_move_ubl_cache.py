@@ -0,0 +1,31 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class AccountMoveUblCache(models.Model):
+    _name = "account.move.ubl.cache"
+    _description = "Generated UBL XML of customer invoices"
+
+    move_id = fields.Many2one(
+        "account.move", required=True, index=True, ondelete="cascade"
+    )
+    version = fields.Char(required=True)
+    fingerprint = fields.Char(
+        required=True,
+        help="Fingerprint of the invoice data used to generate the XML file. "
+        "The XML file is generated again when it changes.",
+    )
+    xml_file = fields.Binary(attachment=False)
+    pdf_fingerprint = fields.Char(
+        help="Fingerprint of the XML file embedded in the PDF of the invoice "
+        "stored as attachment."
+    )
+
+    _sql_constraints = [
+        (
+            "move_version_uniq",
+            "unique(move_id, version)",
+            "There is already a cached UBL XML file for this invoice and version.",
+        )
+    ]
@@ -12,6 +12,9 @@ class IrActionsReport(models.Model):
     def postprocess_pdf_report(self, record, buffer):
         if self.is_ubl_xml_to_embed_in_invoice():
             buffer = record.add_xml_in_pdf_buffer(buffer)
+            # This PDF is stored as attachment by super()
+            if record.is_ubl_sale_invoice_posted():
+                record._set_ubl_xml_embedded_in_stored_pdf(self)
         return super().postprocess_pdf_report(record, buffer)
 
     def _post_pdf(self, save_in_attachment, pdf_content=None, res_ids=None):
@@ -24,7 +27,11 @@ class IrActionsReport(models.Model):
         if res_ids and len(res_ids) == 1:
             if self.is_ubl_xml_to_embed_in_invoice():
                 invoice = self.env["account.move"].browse(res_ids)
-                if invoice.is_ubl_sale_invoice_posted():
+                # No need to embed again the XML file in the PDF read from
+                # the attachment if the invoice didn't change since then
+                if invoice.is_ubl_sale_invoice_posted() and not (
+                    self.attachment and invoice._is_ubl_xml_embedded_in_stored_pdf(self)
+                ):
                     pdf_content = invoice.embed_ubl_xml_in_pdf(pdf_content)
         return pdf_content
 
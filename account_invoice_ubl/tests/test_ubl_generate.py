@@ -3,6 +3,8 @@
 # Copyright 2019 Onestein (<https://www.onestein.eu>)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from unittest import mock
+
 from odoo.tests.common import HttpSavepointCase, tagged
 from odoo.tools import mute_logger
 
@@ -58,6 +60,42 @@ class TestUblInvoice(HttpSavepointCase, TestUblInvoiceMixin):
         self.assertEqual(action["view_mode"], "form,tree")
         self.assertFalse(action["views"])
 
+    def test_ubl_xml_cache(self):
+        invoice = self._create_invoice()
+        if invoice.company_id.xml_format_in_pdf_invoice != "ubl":
+            invoice.company_id.xml_format_in_pdf_invoice = "ubl"
+        move_class = type(invoice)
+        generate = move_class.generate_ubl_xml_string
+        with mute_logger(MUTE_LOGGER), mock.patch.object(
+            move_class, "generate_ubl_xml_string", autospec=True, side_effect=generate
+        ) as generate_mock:
+            invoice.generate_ubl_xml_cache()
+            self.assertEqual(generate_mock.call_count, 1)
+            xml_string = invoice.get_ubl_xml_string_cached()
+            self.assertEqual(generate_mock.call_count, 1)
+            self.assertEqual(xml_string, generate(invoice))
+            # A change on the invoice generates the XML file again
+            invoice.write({"narration": "Updated note"})
+            invoice.get_ubl_xml_string_cached()
+            self.assertEqual(generate_mock.call_count, 2)
+            invoice.get_ubl_xml_string_cached(version="2.0")
+            self.assertEqual(generate_mock.call_count, 3)
+            # So does a change on the product template of a line
+            invoice.invoice_line_ids.product_id.product_tmpl_id.write(
+                {"name": "Renamed product"}
+            )
+            xml_string = invoice.get_ubl_xml_string_cached()
+            self.assertEqual(generate_mock.call_count, 4)
+            self.assertIn(b"Renamed product", xml_string)
+        self.assertEqual(
+            len(
+                self.env["account.move.ubl.cache"].search(
+                    [("move_id", "=", invoice.id)]
+                )
+            ),
+            2,
+        )
+
     def test_install_uninstall_hooks(self):
         set_xml_format_in_pdf_invoice_to_ubl(self.env.cr, None)
         self.assertTrue(
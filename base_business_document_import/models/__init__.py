@@ -1 +1,3 @@
 from . import business_document_import
+from . import res_partner
+from . import account
@@ -0,0 +1,50 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+# Fields of the code indexes of business.document.import
+CODE_INDEX_FIELDS = {"code", "company_id", "deprecated", "active"}
+
+
+class CodeIndexMixin(models.AbstractModel):
+    _name = "business.document.import.code.index.mixin"
+    _description = "Clear the code indexes of the business document import"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._clear_code_index()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if CODE_INDEX_FIELDS & set(vals):
+            self._clear_code_index()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._clear_code_index()
+        return res
+
+    @api.model
+    def _clear_code_index(self):
+        self.env["business.document.import"]._clear_code_index(self._name)
+
+
+class AccountAccount(models.Model):
+    _name = "account.account"
+    _inherit = ["account.account", "business.document.import.code.index.mixin"]
+
+
+class AccountAnalyticAccount(models.Model):
+    _name = "account.analytic.account"
+    _inherit = [
+        "account.analytic.account",
+        "business.document.import.code.index.mixin",
+    ]
+
+
+class AccountJournal(models.Model):
+    _name = "account.journal"
+    _inherit = ["account.journal", "business.document.import.code.index.mixin"]
@@ -3,21 +3,119 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
 from urllib.parse import urlparse
 
 from odoo import _, api, models
 from odoo.exceptions import UserError
+from odoo.osv import expression
 from odoo.tools import float_compare
+from odoo.tools.lru import LRU
 
 from odoo.addons.base_iban.models.res_partner_bank import validate_iban
 
 logger = logging.getLogger(__name__)
 
+# Key of the current match cache in the cache of the cursor
+MATCH_CACHE_KEY = "business_document_import.match_cache"
+
+
+class MatchCache:
+    """Results of the searches done to match the records of an import,
+    negative results included, with the number of hits and misses"""
+
+    def __init__(self):
+        self.memo = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def __contains__(self, kind_key):
+        return kind_key in self.memo
+
+    def get(self, kind, key, compute):
+        if (kind, key) in self.memo:
+            self.hits[kind] += 1
+        else:
+            self.misses[kind] += 1
+            self.memo[(kind, key)] = compute()
+        return self.memo[(kind, key)]
+
+    def set(self, kind, key, value):
+        self.memo[(kind, key)] = value
+
+    def drop(self, kind):
+        """Forget the results of this kind, when the records they were
+        searched in are modified"""
+        for kind_key in [kk for kk in self.memo if kk[0] == kind]:
+            del self.memo[kind_key]
+
+
+# Code indexes shared by the imports of the server process, and sequence
+# per database and model increased when the codes of the model are modified
+_CODE_INDEXES = LRU(64)
+_CODE_INDEX_SEQUENCES = Counter()
+_CODE_INDEX_LOCK = threading.Lock()
+
+
+class CodeIndex(dict):
+    """Speed dict {code: id}, which also finds the first code starting
+    with a prefix by bisection in the sorted codes. It is shared by all the
+    imports of the company, so it must not be modified."""
+
+    def __init__(self, code_ids):
+        super().__init__(code_ids)
+        self.sorted_codes = sorted(self)
+
+    def first_with_prefix(self, prefix):
+        i = bisect_left(self.sorted_codes, prefix)
+        if i < len(self.sorted_codes) and self.sorted_codes[i].startswith(prefix):
+            return self.sorted_codes[i]
+        return None
+
 
 class BusinessDocumentImport(models.AbstractModel):
     _name = "business.document.import"
     _description = "Common methods to import business documents"
 
+    @contextmanager
+    def _match_cache(self):
+        """Within this block, the searches of the products, units of measure,
+        currencies and taxes are memoized. A block nested in another one
+        (an invoice in a batch for instance) uses the cache of the outer one.
+        Usage:
+        with self._match_cache():
+            self._prefetch_match_products(product_dicts)
+            ...
+        """
+        caches = self.env.cr.cache
+        if MATCH_CACHE_KEY in caches:
+            yield caches[MATCH_CACHE_KEY]
+            return
+        cache = caches[MATCH_CACHE_KEY] = MatchCache()
+        try:
+            yield cache
+        finally:
+            caches.pop(MATCH_CACHE_KEY, None)
+            logger.debug(
+                "Match cache: hits %s, misses %s", dict(cache.hits), dict(cache.misses)
+            )
+
+    @api.model
+    def _get_match_cache(self):
+        """Return the current match cache, None outside a match cache block"""
+        return self.env.cr.cache.get(MATCH_CACHE_KEY)
+
+    @api.model
+    def _match_cache_get(self, kind, key, compute):
+        """Return compute(), memoized in the current match cache if any"""
+        cache = self.env.cr.cache.get(MATCH_CACHE_KEY)
+        if cache is None:
+            return compute()
+        return cache.get(kind, key, compute)
+
     @api.model
     def user_error_wrap(self, method, data_dict, error_msg):
         """The method and data_dict arguments are useful when you want to
@@ -159,34 +257,88 @@ class BusinessDocumentImport(models.AbstractModel):
         return False
 
     @api.model
-    def _match_partner_contact(self, partner_dict, chatter_msg, domain, order):
+    def _get_match_partner_values(self, partner_dict):
+        """Return the normalized values of partner_dict to search in the
+        match_* fields of res.partner, by matching step:
+        {step: [(field_name, {values})]}"""
         rpo = self.env["res.partner"]
-        if partner_dict.get("email") and "@" in partner_dict["email"]:
-            partner = rpo.search(
-                domain + [("email", "=ilike", partner_dict["email"])],
-                limit=1,
-                order=order,
-            )
-            if partner:
-                return partner
-        if partner_dict.get("contact"):
-            partner = rpo.search(
-                domain + [("name", "=ilike", partner_dict["contact"])],
-                limit=1,
-                order=order,
+        match_values = {}
+        vat = rpo._match_normalize_vat(partner_dict.get("vat"))
+        if vat:
+            match_values["vat"] = [("match_vat", {vat})]
+        email = rpo._match_normalize_email(partner_dict.get("email"))
+        if email:
+            match_values["email"] = [("match_email", {email})]
+        contact = rpo._match_normalize_name(partner_dict.get("contact"))
+        if contact:
+            match_values["contact"] = [("match_name", {contact})]
+        phone = rpo._match_normalize_phone(partner_dict.get("phone"))
+        if phone:
+            match_values["phone"] = [
+                ("match_mobile", {phone}),
+                ("match_phone", {phone}),
+            ]
+        name = rpo._match_normalize_name(partner_dict.get("name"))
+        if name:
+            match_values["name"] = [("match_name", {name})]
+        website_host = rpo._match_normalize_website(partner_dict.get("website"))
+        website_domain = self._get_partner_website_domain(partner_dict)
+        if website_host or website_domain:
+            hosts = {website_host, website_domain and website_domain.lower()}
+            match_values["website"] = [("match_website_host", hosts - {False})]
+        email_domain = self._get_partner_email_domain(partner_dict)
+        if email_domain:
+            match_values["email_domain"] = [
+                ("match_website_host", {email_domain.lower()})
+            ]
+        return match_values
+
+    @api.model
+    def _get_match_partner_candidates(self, partner_dict, domain, order):
+        """Search at once the partners matching any of the normalized values
+        of partner_dict. Return a dict {step: first partner of the step}"""
+        rpo = self.env["res.partner"]
+        match_values = self._get_match_partner_values(partner_dict)
+        conditions = [
+            [(field_name, "in", list(values))]
+            for field_values in match_values.values()
+            for (field_name, values) in field_values
+        ]
+        candidates = {}
+        if not conditions:
+            return candidates
+        partners = rpo.search(domain + expression.OR(conditions), order=order)
+        for step, field_values in match_values.items():
+            for partner in partners:
+                if any(
+                    partner[field_name] in values
+                    for (field_name, values) in field_values
+                ):
+                    candidates[step] = partner
+                    break
+        return candidates
+
+    @api.model
+    def _get_partner_match_candidate(self, partner_dict, step, domain, order):
+        """Return the first partner of the step, among the candidates searched
+        once per domain and order"""
+        candidates = partner_dict.setdefault("match_candidates", {})
+        key = (repr(domain), order)
+        if key not in candidates:
+            candidates[key] = self._get_match_partner_candidates(
+                partner_dict, domain, order
             )
-            if partner:
-                return partner
-        if partner_dict.get("phone"):
-            partner = rpo.search(
-                domain
-                + [
-                    "|",
-                    ("mobile", "=", partner_dict["phone"]),
-                    ("phone", "=", partner_dict["phone"]),
-                ],
-                limit=1,
-                order=order,
+        return candidates[key].get(step, False)
+
+    @api.model
+    def _match_partner_vat(self, partner_dict, chatter_msg, domain, order):
+        return self._get_partner_match_candidate(partner_dict, "vat", domain, order)
+
+    @api.model
+    def _match_partner_contact(self, partner_dict, chatter_msg, domain, order):
+        for step in ("email", "contact", "phone"):
+            partner = self._get_partner_match_candidate(
+                partner_dict, step, domain, order
             )
             if partner:
                 return partner
@@ -194,13 +346,7 @@ class BusinessDocumentImport(models.AbstractModel):
 
     @api.model
     def _match_partner_name(self, partner_dict, chatter_msg, domain, order):
-        if partner_dict.get("name"):
-            return self.env["res.partner"].search(
-                domain + [("name", "=ilike", partner_dict["name"])],
-                limit=1,
-                order=order,
-            )
-        return False
+        return self._get_partner_match_candidate(partner_dict, "name", domain, order)
 
     @api.model
     def _get_partner_website_domain(self, partner_dict):
@@ -215,14 +361,7 @@ class BusinessDocumentImport(models.AbstractModel):
 
     @api.model
     def _match_partner_website(self, partner_dict, chatter_msg, domain, order):
-        website_domain = self._get_partner_website_domain(partner_dict)
-        if website_domain:
-            return self.env["res.partner"].search(
-                domain + [("website", "=ilike", "%" + website_domain + "%")],
-                limit=1,
-                order=order,
-            )
-        return False
+        return self._get_partner_match_candidate(partner_dict, "website", domain, order)
 
     @api.model
     def _get_partner_email_domain(self, partner_dict):
@@ -239,14 +378,12 @@ class BusinessDocumentImport(models.AbstractModel):
         # email_domain because of the emails such as
         # @gmail.com, @yahoo.com that may match random partners
         if email_domain:
-            partner = self.env["res.partner"].search(
-                domain + [("website", "=ilike", "%" + email_domain + "%")],
-                limit=1,
-                order=order,
+            partner = self._get_partner_match_candidate(
+                partner_dict, "email_domain", domain, order
             )
             if not partner:
                 partner = self.env["res.partner"].search(
-                    domain + [("email", "=ilike", "%@" + email_domain)],
+                    domain + [("match_email_domain", "=", email_domain.lower())],
                     limit=1,
                     order=order,
                 )
@@ -257,7 +394,7 @@ class BusinessDocumentImport(models.AbstractModel):
                         "The %s has been identified by the domain name '%s' "
                         "so please check carefully that the %s is correct."
                     )
-                    % (partner_type_label, domain, partner_type_label)
+                    % (partner_type_label, email_domain, partner_type_label)
                 )
                 return partner
 
@@ -308,12 +445,14 @@ class BusinessDocumentImport(models.AbstractModel):
             if state_domain:
                 domain += state_domain
 
+        # The partners matching the VAT, contact, name, website and email
+        # domain are searched at once, then picked in this order
+        partner_dict["match_candidates"] = {}
+
         # Search on VAT
-        if partner_dict.get("vat"):
-            vat = partner_dict["vat"].replace(" ", "").upper()
-            partner = rpo.search(domain + [("vat", "=", vat)], limit=1, order=order)
-            if partner:
-                return partner
+        partner = self._match_partner_vat(partner_dict, chatter_msg, domain, order)
+        if partner:
+            return partner
 
         # Hook to plug alternative matching methods
         partner = self._hook_match_partner(partner_dict, chatter_msg, domain, order)
@@ -372,6 +511,13 @@ class BusinessDocumentImport(models.AbstractModel):
     def _hook_match_partner(self, partner_dict, chatter_msg, domain, order):
         return False
 
+    @api.model
+    def _prefetch_match_partners(self, partner_dicts):
+        """Hook called with all the partner dicts of a batch of documents
+        before they are matched, to prefetch what the matching needs
+        with set-based queries."""
+        return
+
     @api.model
     def _match_shipping_partner(
         self, partner_dict, partner, chatter_msg, domain=None, raise_exception=True
@@ -580,22 +726,17 @@ class BusinessDocumentImport(models.AbstractModel):
         if product:
             return product
         elif seller:
-            # WARNING: Won't work for multi-variant products
-            # because product.supplierinfo is attached to product template
-            sinfo = self.env["product.supplierinfo"].search(
-                self._match_company_domain()
-                + [
-                    ("name", "=", seller.id),
-                    ("product_code", "=", product_dict["code"]),
-                ],
-                limit=1,
+            product = self._match_cache_get(
+                "product_seller",
+                (
+                    tuple(self._match_company_domain()),
+                    seller.id,
+                    product_dict.get("code"),
+                ),
+                lambda: self._match_product_seller(product_dict, seller),
             )
-            if (
-                sinfo
-                and sinfo.product_tmpl_id.product_variant_ids
-                and len(sinfo.product_tmpl_id.product_variant_ids) == 1
-            ):
-                return sinfo.product_tmpl_id.product_variant_ids[0]
+            if product:
+                return product
         raise self.user_error_wrap(
             "_match_product",
             product_dict,
@@ -613,8 +754,91 @@ class BusinessDocumentImport(models.AbstractModel):
             ),
         )
 
+    @api.model
+    def _match_product_seller(self, product_dict, seller):
+        # WARNING: Won't work for multi-variant products
+        # because product.supplierinfo is attached to product template
+        sinfo = self.env["product.supplierinfo"].search(
+            self._match_company_domain()
+            + [
+                ("name", "=", seller.id),
+                ("product_code", "=", product_dict["code"]),
+            ],
+            limit=1,
+        )
+        if (
+            sinfo
+            and sinfo.product_tmpl_id.product_variant_ids
+            and len(sinfo.product_tmpl_id.product_variant_ids) == 1
+        ):
+            return sinfo.product_tmpl_id.product_variant_ids[0]
+        return self.env["product.product"]
+
+    @api.model
+    def _match_product_search_key(self, product_dict):
+        return (
+            tuple(self._match_company_domain()),
+            product_dict.get("barcode") or False,
+            product_dict.get("code") or False,
+        )
+
+    @api.model
+    def _prefetch_match_products(self, product_dicts):
+        """Search at once the products of the product_dicts by barcode,
+        packaging barcode and code, and put them in the current match cache,
+        with the same result as _match_product_search()."""
+        cache = self.env.cr.cache.get(MATCH_CACHE_KEY)
+        if cache is None:
+            return
+        keys = set()
+        for product_dict in product_dicts:
+            if not product_dict or any(
+                product_dict.get(k) for k in ("recordset", "id", "xmlid")
+            ):
+                continue
+            product_dict = product_dict.copy()
+            self._strip_cleanup_dict(product_dict)
+            key = self._match_product_search_key(product_dict)
+            if ("product", key) not in cache and (key[1] or key[2]):
+                keys.add(key)
+        if not keys:
+            return
+        barcodes = {key[1] for key in keys if key[1]}
+        codes = {key[2] for key in keys if key[2]}
+        products = self.env["product.product"].search(
+            self._match_company_domain()
+            + expression.OR(
+                [
+                    [("barcode", "in", list(barcodes | codes))],
+                    [("packaging_ids.barcode", "in", list(barcodes))],
+                    [("default_code", "in", list(codes))],
+                ]
+            )
+        )
+        for key in keys:
+            barcode, code = key[1], key[2]
+            product = self.env["product.product"]
+            if barcode:
+                product = products.filtered(
+                    lambda p: p.barcode == barcode
+                    or barcode in p.packaging_ids.mapped("barcode")
+                )[:1]
+            if not product and code:
+                product = products.filtered(
+                    lambda p: p.barcode == code or p.default_code == code
+                )[:1]
+            cache.set("product", key, product)
+
     @api.model
     def _match_product_search(self, product_dict):
+        return self._match_cache_get(
+            "product",
+            self._match_product_search_key(product_dict),
+            lambda: self._search_match_product(product_dict),
+        )
+
+    @api.model
+    def _search_match_product(self, product_dict):
         product = self.env["product.product"].browse()
         cdomain = self._match_company_domain()
         if product_dict.get("barcode"):
@@ -658,7 +882,11 @@ class BusinessDocumentImport(models.AbstractModel):
             return currency
         if currency_dict.get("iso"):
             currency_iso = currency_dict["iso"].upper()
-            currency = rco.search([("name", "=", currency_iso)], limit=1)
+            currency = self._match_cache_get(
+                "currency_iso",
+                currency_iso,
+                lambda: rco.search([("name", "=", currency_iso)], limit=1),
+            )
             if currency:
                 return currency
             else:
@@ -673,7 +901,11 @@ class BusinessDocumentImport(models.AbstractModel):
                     % currency_iso,
                 )
         if currency_dict.get("symbol"):
-            currencies = rco.search([("symbol", "=", currency_dict["symbol"])])
+            currencies = self._match_cache_get(
+                "currency_symbol",
+                currency_dict["symbol"],
+                lambda: rco.search([("symbol", "=", currency_dict["symbol"])]),
+            )
             if len(currencies) == 1:
                 return currencies[0]
             else:
@@ -686,12 +918,16 @@ class BusinessDocumentImport(models.AbstractModel):
                     % currency_dict["symbol"]
                 )
         if currency_dict.get("iso_or_symbol"):
-            currencies = rco.search(
-                [
-                    "|",
-                    ("name", "=", currency_dict["iso_or_symbol"].upper()),
-                    ("symbol", "=", currency_dict["iso_or_symbol"]),
-                ]
+            currencies = self._match_cache_get(
+                "currency_iso_or_symbol",
+                currency_dict["iso_or_symbol"],
+                lambda: rco.search(
+                    [
+                        "|",
+                        ("name", "=", currency_dict["iso_or_symbol"].upper()),
+                        ("symbol", "=", currency_dict["iso_or_symbol"]),
+                    ]
+                ),
             )
             if len(currencies) == 1:
                 return currencies[0]
@@ -708,8 +944,12 @@ class BusinessDocumentImport(models.AbstractModel):
                 )
         if currency_dict.get("country_code"):
             country_code = currency_dict["country_code"]
-            country = self.env["res.country"].search(
-                [("code", "=", country_code)], limit=1
+            country = self._match_cache_get(
+                "country",
+                country_code,
+                lambda: self.env["res.country"].search(
+                    [("code", "=", country_code)], limit=1
+                ),
             )
             if country:
                 if country.currency_id:
@@ -767,7 +1007,12 @@ class BusinessDocumentImport(models.AbstractModel):
             # Map NIU to Unit
             if uom_dict["unece_code"] == "NIU":
                 uom_dict["unece_code"] = "C62"
-            uom = uuo.search([("unece_code", "=", uom_dict["unece_code"])], limit=1)
+            unece_code = uom_dict["unece_code"]
+            uom = self._match_cache_get(
+                "uom_unece",
+                unece_code,
+                lambda: uuo.search([("unece_code", "=", unece_code)], limit=1),
+            )
             if uom:
                 return uom
             else:
@@ -782,7 +1027,12 @@ class BusinessDocumentImport(models.AbstractModel):
                     % uom_dict["unece_code"]
                 )
         if uom_dict.get("name"):
-            uom = uuo.search([("name", "=ilike", uom_dict["name"] + "%")], limit=1)
+            uom_name = uom_dict["name"]
+            uom = self._match_cache_get(
+                "uom_name",
+                uom_name,
+                lambda: uuo.search([("name", "=ilike", uom_name + "%")], limit=1),
+            )
             if uom:
                 return uom
         if product:
@@ -800,6 +1050,28 @@ class BusinessDocumentImport(models.AbstractModel):
         )
         return self.env.ref("uom.product_uom_unit")
 
+    @api.model
+    def _prefetch_match_uoms(self, uom_dicts):
+        """Search at once the units of measure of the uom_dicts by UNECE code,
+        and put them in the current match cache"""
+        cache = self.env.cr.cache.get(MATCH_CACHE_KEY)
+        if cache is None:
+            return
+        codes = set()
+        for uom_dict in uom_dicts:
+            code = uom_dict and (uom_dict.get("unece_code") or "").strip()
+            if code:
+                code = code == "NIU" and "C62" or code
+                if ("uom_unece", code) not in cache:
+                    codes.add(code)
+        if not codes:
+            return
+        uoms = self.env["uom.uom"].search([("unece_code", "in", list(codes))])
+        for code in codes:
+            cache.set(
+                "uom_unece", code, uoms.filtered(lambda u: u.unece_code == code)[:1]
+            )
+
     @api.model
     def _match_taxes(
         self, taxes_list, chatter_msg, type_tax_use="purchase", price_include=False
@@ -875,7 +1147,7 @@ class BusinessDocumentImport(models.AbstractModel):
         domain = self._prepare_match_tax_domain(
             tax_dict, type_tax_use=type_tax_use, price_include=price_include
         )
-        taxes = ato.search(domain)
+        taxes = self._match_cache_get("taxes", repr(domain), lambda: ato.search(domain))
         for tax in taxes:
             tax_amount = tax.amount  # 'amount' field : digits=(16, 4)
             if not float_compare(tax_dict["amount"], tax_amount, precision_digits=4):
@@ -1065,13 +1337,73 @@ class BusinessDocumentImport(models.AbstractModel):
 
     def _prepare_account_speed_dict(self):
         company_id = self._context.get("force_company") or self.env.company.id
-        res = self.env["account.account"].search_read(
-            [("company_id", "=", company_id), ("deprecated", "=", False)], ["code"]
+        return self._get_account_code_index(company_id)
+
+    @api.model
+    def _get_account_code_index(self, company_id):
+        return self._get_code_index(
+            "account.account",
+            company_id,
+            [("company_id", "=", company_id), ("deprecated", "=", False)],
+        )
+
+    @api.model
+    def _get_code_index(self, model_name, company_id, domain):
+        """Code index of the records of the model found with the domain.
+
+        The index is kept by the server process for the user and the
+        allowed companies, since the access rules apply to the search. It is
+        built again when the records of the company are modified, by this
+        process or by another one.
+        """
+        return self._match_cache_get(
+            "code_index",
+            (model_name, company_id, repr(domain)),
+            lambda: self._get_shared_code_index(model_name, company_id, domain),
+        )
+
+    @api.model
+    def _get_shared_code_index(self, model_name, company_id, domain):
+        key = (
+            self.env.cr.dbname,
+            model_name,
+            repr(domain),
+            self.env.uid,
+            self.env.su,
+            tuple(self.env.companies.ids),
+            _CODE_INDEX_SEQUENCES[(self.env.cr.dbname, model_name)],
+            self._get_code_index_marker(model_name, company_id),
         )
-        speed_dict = {}
-        for line in res:
-            speed_dict[line["code"].upper()] = line["id"]
-        return speed_dict
+        index = _CODE_INDEXES.get(key)
+        if index is None:
+            res = self.env[model_name].search_read(domain, ["code"])
+            index = _CODE_INDEXES[key] = CodeIndex(
+                (line["code"].upper(), line["id"]) for line in res if line["code"]
+            )
+        return index
+
+    @api.model
+    def _get_code_index_marker(self, model_name, company_id):
+        """Return what changes when the records of the company are created,
+        modified or deleted, even by another server process"""
+        model = self.env[model_name]
+        model.flush()
+        self.env.cr.execute(
+            "SELECT count(*), max(id), max(write_date) FROM %s "
+            "WHERE company_id = %%s" % model._table,
+            (company_id,),
+        )
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _clear_code_index(self, model_name):
+        """Build again the code indexes of the model, in all the processes
+        when the transaction is committed, and in this one right now"""
+        with _CODE_INDEX_LOCK:
+            _CODE_INDEX_SEQUENCES[(self.env.cr.dbname, model_name)] += 1
+        cache = self._get_match_cache()
+        if cache is not None:
+            cache.drop("code_index")
 
     @api.model
     def _match_account(self, account_dict, chatter_msg, speed_dict=None):
@@ -1105,16 +1437,19 @@ class BusinessDocumentImport(models.AbstractModel):
                     return aao.browse(speed_dict[acc_code_tmp])
             # Match when account_dict['code'] is shorter than Odoo's accounts
             # -> warns the user about this
-            for code, account_id in speed_dict.items():
-                if code.startswith(acc_code):
-                    chatter_msg.append(
-                        _(
-                            "Approximate match: account %s has been matched "
-                            "with account %s"
-                        )
-                        % (account_dict["code"], code)
+            if isinstance(speed_dict, CodeIndex):
+                code = speed_dict.first_with_prefix(acc_code)
+            else:
+                code = next((c for c in speed_dict if c.startswith(acc_code)), None)
+            if code:
+                chatter_msg.append(
+                    _(
+                        "Approximate match: account %s has been matched "
+                        "with account %s"
                     )
-                    return aao.browse(account_id)
+                    % (account_dict["code"], code)
+                )
+                return aao.browse(speed_dict[code])
         raise self.user_error_wrap(
             "_match_account",
             account_dict,
@@ -1128,14 +1463,15 @@ class BusinessDocumentImport(models.AbstractModel):
 
     def _prepare_analytic_account_speed_dict(self):
         company_id = self._context.get("force_company") or self.env.company.id
-        res = self.env["account.analytic.account"].search_read(
-            [("company_id", "=", company_id)], ["code"]
+        return self._get_analytic_account_code_index(company_id)
+
+    @api.model
+    def _get_analytic_account_code_index(self, company_id):
+        return self._get_code_index(
+            "account.analytic.account",
+            company_id,
+            [("company_id", "=", company_id)],
         )
-        speed_dict = {}
-        for line in res:
-            if line["code"]:
-                speed_dict[line["code"].upper()] = line["id"]
-        return speed_dict
 
     @api.model
     def _match_analytic_account(self, aaccount_dict, chatter_msg, speed_dict=None):
@@ -1172,13 +1508,13 @@ class BusinessDocumentImport(models.AbstractModel):
 
     def _prepare_journal_speed_dict(self):
         company_id = self._context.get("force_company") or self.env.company.id
-        res = self.env["account.journal"].search_read(
-            [("company_id", "=", company_id)], ["code"]
+        return self._get_journal_code_index(company_id)
+
+    @api.model
+    def _get_journal_code_index(self, company_id):
+        return self._get_code_index(
+            "account.journal", company_id, [("company_id", "=", company_id)]
         )
-        speed_dict = {}
-        for line in res:
-            speed_dict[line["code"].upper()] = line["id"]
-        return speed_dict
 
     @api.model
     def _match_journal(self, journal_dict, chatter_msg, speed_dict=None):
@@ -0,0 +1,70 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import re
+from urllib.parse import urlparse
+
+from odoo import api, fields, models
+
+NOT_ALNUM = re.compile(r"[^0-9A-Z]")
+NOT_PHONE = re.compile(r"[^0-9+]")
+
+
+class ResPartner(models.Model):
+    _inherit = "res.partner"
+
+    # Normalized values searched by business.document.import._match_partner(),
+    # so that the matching is done with indexed equality lookups
+    match_vat = fields.Char(compute="_compute_match_fields", store=True, index=True)
+    match_email = fields.Char(compute="_compute_match_fields", store=True, index=True)
+    match_email_domain = fields.Char(
+        compute="_compute_match_fields", store=True, index=True
+    )
+    match_website_host = fields.Char(
+        compute="_compute_match_fields", store=True, index=True
+    )
+    match_name = fields.Char(compute="_compute_match_fields", store=True, index=True)
+    match_phone = fields.Char(compute="_compute_match_fields", store=True, index=True)
+    match_mobile = fields.Char(compute="_compute_match_fields", store=True, index=True)
+
+    @api.depends("vat", "email", "website", "name", "phone", "mobile")
+    def _compute_match_fields(self):
+        for partner in self:
+            email = self._match_normalize_email(partner.email)
+            partner.match_vat = self._match_normalize_vat(partner.vat)
+            partner.match_email = email
+            partner.match_email_domain = email and email.split("@")[1]
+            partner.match_website_host = self._match_normalize_website(partner.website)
+            partner.match_name = self._match_normalize_name(partner.name)
+            partner.match_phone = self._match_normalize_phone(partner.phone)
+            partner.match_mobile = self._match_normalize_phone(partner.mobile)
+
+    @api.model
+    def _match_normalize_vat(self, vat):
+        return vat and NOT_ALNUM.sub("", vat.upper()) or False
+
+    @api.model
+    def _match_normalize_email(self, email):
+        email = email and email.strip().lower()
+        return email and "@" in email and email or False
+
+    @api.model
+    def _match_normalize_website(self, website):
+        """Return the host of the website, without 'www.'"""
+        if not website:
+            return False
+        urlp = urlparse(website.strip().lower())
+        host = urlp.netloc
+        if not urlp.scheme and not host:
+            host = urlp.path.split("/")[0]
+        host = host.split("@")[-1].split(":")[0]
+        if host.startswith("www."):
+            host = host[4:]
+        return host or False
+
+    @api.model
+    def _match_normalize_name(self, name):
+        return name and " ".join(name.split()).casefold() or False
+
+    @api.model
+    def _match_normalize_phone(self, phone):
+        return phone and NOT_PHONE.sub("", phone) or False
@@ -0,0 +1,89 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+"""
+Benchmark of the matching of the partner of a business document.
+
+Synthetic partners are created, then the partners of synthetic documents are
+matched, each document on a different information (VAT number, e-mail, phone,
+name, website, e-mail domain or nothing known), and everything is rolled back.
+To be run from an Odoo shell, on a test database with
+base_business_document_import installed:
+
+    odoo shell -d <database> < \\
+        base_business_document_import/scripts/match_partner_benchmark.py
+"""
+import time
+
+PARTNER_COUNT = 100000
+DOCUMENT_COUNT = 500
+
+DOCUMENT_KEYS = [
+    lambda i: {"vat": "XX %09d" % i},
+    lambda i: {"email": "Contact%d@benchmark%d.example" % (i, i)},
+    lambda i: {"phone": "+33 1 %08d" % i},
+    lambda i: {"name": "benchmark partner %d " % i},
+    lambda i: {"website": "http://benchmark%d.example/" % i},
+    lambda i: {"email": "sales@benchmark%d.example" % i},
+    lambda i: {"name": "Unknown %d" % i},
+]
+
+
+def create_partners(env, partner_count):
+    env["res.partner"].create(
+        [
+            {
+                "name": "Benchmark Partner %d" % i,
+                "vat": "XX%09d" % i,
+                "email": "contact%d@benchmark%d.example" % (i, i),
+                "website": "https://www.benchmark%d.example" % i,
+                "phone": "+33 1 %08d" % i,
+            }
+            for i in range(partner_count)
+        ]
+    )
+    env["res.partner"].flush()
+
+
+def time_matches(bdio, partner_count, document_count):
+    durations = []
+    matched = 0
+    for doc in range(document_count):
+        i = doc * partner_count // document_count
+        partner_dict = DOCUMENT_KEYS[doc % len(DOCUMENT_KEYS)](i)
+        start = time.perf_counter()
+        partner = bdio._match_partner(
+            partner_dict, [], partner_type=False, raise_exception=False
+        )
+        durations.append(time.perf_counter() - start)
+        matched += partner and 1 or 0
+    return sorted(durations), matched
+
+
+def main(env, partner_count=PARTNER_COUNT, document_count=DOCUMENT_COUNT):
+    try:
+        start = time.perf_counter()
+        create_partners(env, partner_count)
+        print(
+            "%d partners created in %.1f s"
+            % (partner_count, time.perf_counter() - start)
+        )
+        durations, matched = time_matches(
+            env["business.document.import"], partner_count, document_count
+        )
+        print(
+            "%d/%d documents matched: %.3f ms on average, %.3f ms at the 95th "
+            "percentile, %.3f ms at most"
+            % (
+                matched,
+                document_count,
+                sum(durations) * 1000 / len(durations),
+                durations[int(len(durations) * 0.95)] * 1000,
+                durations[-1] * 1000,
+            )
+        )
+    finally:
+        env.cr.rollback()
+        env.clear()
+
+
+main(env)  # noqa: F821
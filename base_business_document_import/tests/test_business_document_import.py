@@ -30,6 +30,53 @@ class TestBaseBusinessDocumentImport(TransactionCase):
         res = bdio._match_partner(partner_dict, [], partner_type=False)
         self.assertEqual(res, partner1)
 
+    def test_match_partner_normalized(self):
+        rpo = self.env["res.partner"]
+        bdio = self.env["business.document.import"]
+        partner1 = rpo.create(
+            {
+                "name": "Normalized  Corp",
+                "vat": "fr 12 345678901",
+                "email": " Contact@Normalized.example ",
+                "website": "https://www.normalized.example/contact",
+                "phone": "+33 4.72.00.00.00",
+            }
+        )
+        self.assertEqual(partner1.match_vat, "FR12345678901")
+        self.assertEqual(partner1.match_email, "contact@normalized.example")
+        self.assertEqual(partner1.match_email_domain, "normalized.example")
+        self.assertEqual(partner1.match_website_host, "normalized.example")
+        self.assertEqual(partner1.match_name, "normalized corp")
+        self.assertEqual(partner1.match_phone, "+33472000000")
+        partner2 = rpo.create({"name": "Other Corp", "vat": "FR99999999999"})
+        # The VAT has precedence over the name
+        partner_dict = {"vat": "FR12345678901", "name": "Other Corp"}
+        res = bdio._match_partner(partner_dict, [], partner_type=False)
+        self.assertEqual(res, partner1)
+        partner_dict = {"vat": "FR00000000000", "name": "other corp"}
+        res = bdio._match_partner(partner_dict, [], partner_type=False)
+        self.assertEqual(res, partner2)
+        for partner_dict in (
+            {"email": "CONTACT@normalized.example"},
+            {"phone": "+33 472 00 00 00"},
+            {"name": "NORMALIZED CORP"},
+            {"website": "normalized.example"},
+        ):
+            res = bdio._match_partner(partner_dict, [], partner_type=False)
+            self.assertEqual(res, partner1)
+        partner1.email = "sales@normalized.example"
+        partner1.website = False
+        warn = []
+        res = bdio._match_partner(
+            {"email": "info@normalized.example"}, warn, partner_type=False
+        )
+        self.assertEqual(res, partner1)
+        self.assertIn("normalized.example", warn[0])
+        res = bdio._match_partner(
+            {"name": "Unknown Corp"}, [], partner_type=False, raise_exception=False
+        )
+        self.assertFalse(res)
+
     def test_match_shipping_partner(self):
         rpo = self.env["res.partner"]
         bdio = self.env["business.document.import"]
@@ -190,6 +237,58 @@ class TestBaseBusinessDocumentImport(TransactionCase):
         res = bdio._match_uom(uom_dict, [], product=product)
         self.assertEqual(res, product.uom_id)
 
+    def test_match_cache(self):
+        bdio = self.env["business.document.import"]
+        product1 = self.env["product.product"].create(
+            {
+                "name": "Cached Product",
+                "default_code": "CACHED1",
+                "packaging_ids": [(0, 0, {"name": "Pack", "barcode": "CACHED-PACK"})],
+            }
+        )
+        product_dicts = [
+            {"code": "CACHED1 "},
+            {"barcode": "CACHED-PACK"},
+            {"code": "FURN_7777"},
+            {"code": "UNKNOWN-CODE"},
+        ]
+        with bdio._match_cache() as cache:
+            bdio._prefetch_match_products(product_dicts)
+            bdio._prefetch_match_uoms([{"unece_code": "KGM"}, {"unece_code": "NIU"}])
+            self.assertEqual(bdio._match_product({"code": "CACHED1"}, []), product1)
+            self.assertEqual(
+                bdio._match_product({"barcode": "CACHED-PACK"}, []), product1
+            )
+            self.assertEqual(
+                bdio._match_product({"code": "FURN_7777"}, []),
+                self.env.ref("product.product_delivery_01"),
+            )
+            # Negative results are cached too
+            for _i in range(2):
+                with self.assertRaises(UserError):
+                    bdio._match_product({"code": "UNKNOWN-CODE"}, [])
+            self.assertEqual(cache.hits["product"], 5)
+            self.assertFalse(cache.misses["product"])
+            for _i in range(3):
+                self.assertEqual(
+                    bdio._match_uom({"unece_code": "NIU"}, []),
+                    self.env.ref("uom.product_uom_unit"),
+                )
+                self.assertEqual(
+                    bdio._match_currency({"iso": "usd"}, []),
+                    self.env.ref("base.USD"),
+                )
+            self.assertEqual(cache.hits["uom_unece"], 3)
+            self.assertEqual(cache.misses["currency_iso"], 1)
+            self.assertEqual(cache.hits["currency_iso"], 2)
+            # A nested block uses the same cache
+            with bdio._match_cache() as nested_cache:
+                self.assertIs(nested_cache, cache)
+        # Out of the block, nothing is cached
+        with bdio._match_cache() as cache2:
+            self.assertIsNot(cache2, cache)
+            self.assertFalse(cache2.memo)
+
     def test_match_tax(self):
         # on purpose, I use a rate that doesn't exist
         # so that this test works even if the l10n_de is installed
@@ -291,3 +390,55 @@ class TestBaseBusinessDocumentImport(TransactionCase):
         res = bdio._match_account({"code": "898999"}, chatter)
         self.assertEqual(acc, res)
         self.assertEqual(len(chatter), 1)
+
+    def test_match_account_code_index(self):
+        bdio = self.env["business.document.import"]
+        user_type_id = self.env.ref("account.data_account_type_expenses").id
+        index = bdio._prepare_account_speed_dict()
+        self.assertIs(bdio._prepare_account_speed_dict(), index)
+        acc = self.env["account.account"].create(
+            {"name": "Test 89899920", "code": "89899920", "user_type_id": user_type_id}
+        )
+        # The index of the company is rebuilt after the creation of an account
+        index = bdio._prepare_account_speed_dict()
+        self.assertEqual(index["89899920"], acc.id)
+        self.assertEqual(index.first_with_prefix("898999"), "89899920")
+        self.assertIsNone(index.first_with_prefix("898999999"))
+        acc2 = self.env["account.account"].create(
+            {"name": "Test 89899910", "code": "89899910", "user_type_id": user_type_id}
+        )
+        chatter = []
+        res = bdio._match_account({"code": "898999"}, chatter)
+        self.assertEqual(res, acc2)
+        self.assertEqual(len(chatter), 1)
+        acc2.write({"deprecated": True})
+        res = bdio._match_account({"code": "898999"}, [])
+        self.assertEqual(res, acc)
+
+    def test_match_account_code_index_access_rules(self):
+        bdio = self.env["business.document.import"]
+        company = self.env.company
+        acc = self.env["account.account"].create(
+            {
+                "name": "Test 89899930",
+                "code": "89899930",
+                "user_type_id": self.env.ref("account.data_account_type_expenses").id,
+            }
+        )
+        company2 = self.env["res.company"].create({"name": "Code index company"})
+        user = self.env["res.users"].create(
+            {
+                "name": "Code index user",
+                "login": "code_index_user",
+                "company_id": company2.id,
+                "company_ids": [(6, 0, company2.ids)],
+                "groups_id": [
+                    (6, 0, self.env.ref("account.group_account_invoice").ids)
+                ],
+            }
+        )
+        self.assertEqual(bdio._get_account_code_index(company.id)["89899930"], acc.id)
+        # The accounts of a company not allowed for the user are not indexed
+        index = bdio.with_user(user)._get_account_code_index(company.id)
+        self.assertNotIn("89899930", index)
+        self.assertIn("89899930", bdio._get_account_code_index(company.id))
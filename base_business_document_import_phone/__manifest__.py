@@ -4,7 +4,7 @@
 
 {
     "name": "Base Business Document Import Phone",
-    "version": "14.0.1.0.0",
+    "version": "14.0.1.1.0",
     "category": "Hidden",
     "license": "AGPL-3",
     "summary": "Use phone numbers to match partners upon import of "
@@ -17,6 +17,8 @@
         "base_business_document_import",
     ],
     "external_dependencies": {"python": ["phonenumbers"]},
+    "pre_init_hook": "pre_init_hook",
+    "post_init_hook": "post_init_hook",
     "installable": True,
     "auto_install": True,
 }
@@ -0,0 +1,26 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools.sql import column_exists, create_column
+
+
+def create_phone_e164_columns(cr):
+    """Create the columns before the module is loaded, so that the ORM
+    doesn't compute the E.164 numbers of all the partners at once"""
+    for column in ("phone_e164", "mobile_e164"):
+        if not column_exists(cr, "res_partner", column):
+            create_column(cr, "res_partner", column, "varchar")
+
+
+def backfill_phone_e164(cr):
+    with api.Environment.manage():
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        env["res.partner"]._backfill_phone_e164()
+
+
+def pre_init_hook(cr):
+    create_phone_e164_columns(cr)
+
+
+def post_init_hook(cr, registry):
+    backfill_phone_e164(cr)
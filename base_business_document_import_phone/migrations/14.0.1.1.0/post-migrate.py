@@ -0,0 +1,9 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo.addons.base_business_document_import_phone.hooks import backfill_phone_e164
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    backfill_phone_e164(cr)
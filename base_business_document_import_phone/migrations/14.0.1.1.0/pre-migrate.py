@@ -0,0 +1,11 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo.addons.base_business_document_import_phone.hooks import (
+    create_phone_e164_columns,
+)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    create_phone_e164_columns(cr)
@@ -7,10 +7,6 @@ import logging
 from odoo import api, models
 
 logger = logging.getLogger(__name__)
-try:
-    import phonenumbers
-except ImportError:
-    logger.debug("Cannot import phonenumbers")
 
 
 class BusinessDocumentImport(models.AbstractModel):
@@ -21,29 +17,16 @@ class BusinessDocumentImport(models.AbstractModel):
         rpo = self.env["res.partner"]
         # 'domain' already contains the company_id criteria
         if partner_dict.get("country_code") and partner_dict.get("phone"):
-            phone_num_e164 = False
             country_code = partner_dict["country_code"].upper()
-            try:
-                phone_num = phonenumbers.parse(partner_dict["phone"], country_code)
-                phone_num_e164 = phonenumbers.format_number(
-                    phone_num, phonenumbers.PhoneNumberFormat.E164
-                )
-                logger.debug("_hook_match_partner phone_num_e164: %s", phone_num_e164)
-            except Exception as e:
-                logger.debug(
-                    "Could not reformat phone number '%s' with country code '%s'. "
-                    "Error: %s'",
-                    partner_dict["phone"],
-                    country_code,
-                    e,
-                )
+            phone_num_e164 = rpo._phone_to_e164(partner_dict["phone"], country_code)
+            logger.debug("_hook_match_partner phone_num_e164: %s", phone_num_e164)
             if phone_num_e164:
                 partner = rpo.search(
                     domain
                     + [
                         "|",
-                        ("phone", "=", phone_num_e164),
-                        ("mobile", "=", phone_num_e164),
+                        ("phone_e164", "=", phone_num_e164),
+                        ("mobile_e164", "=", phone_num_e164),
                     ],
                     limit=1,
                     order=order,
@@ -0,0 +1,98 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+import time
+
+from odoo import api, fields, models
+from odoo.tools import split_every
+
+logger = logging.getLogger(__name__)
+try:
+    import phonenumbers
+except ImportError:
+    logger.debug("Cannot import phonenumbers")
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+class ResPartner(models.Model):
+    _inherit = "res.partner"
+
+    # The columns are created by the pre_init_hook and filled by
+    # _backfill_phone_e164() by chunks, not by a compute of all the partners
+    phone_e164 = fields.Char(
+        string="Phone (E.164)",
+        compute="_compute_phone_e164",
+        store=True,
+        index=True,
+    )
+    mobile_e164 = fields.Char(
+        string="Mobile (E.164)",
+        compute="_compute_phone_e164",
+        store=True,
+        index=True,
+    )
+
+    @api.depends("phone", "mobile", "country_id", "company_id.country_id")
+    def _compute_phone_e164(self):
+        for partner in self:
+            country_code = partner.country_id.code or partner.company_id.country_id.code
+            partner.phone_e164 = self._phone_to_e164(partner.phone, country_code)
+            partner.mobile_e164 = self._phone_to_e164(partner.mobile, country_code)
+
+    @api.model
+    def _phone_to_e164(self, number, country_code=None):
+        if not number:
+            return False
+        try:
+            phone_num = phonenumbers.parse(number, country_code or None)
+            return phonenumbers.format_number(
+                phone_num, phonenumbers.PhoneNumberFormat.E164
+            )
+        except Exception as e:
+            logger.debug(
+                "Could not reformat phone number '%s' with country code '%s'. "
+                "Error: %s'",
+                number,
+                country_code,
+                e,
+            )
+        return False
+
+    @api.model
+    def _backfill_phone_e164(self, chunk_size=BACKFILL_CHUNK_SIZE):
+        """Compute the E.164 phone numbers of all the partners, by chunks.
+
+        :return: dict with the number of partners, the duration
+            and the throughput
+        """
+        partner_ids = (
+            self.with_context(active_test=False)
+            .search(["|", ("phone", "!=", False), ("mobile", "!=", False)])
+            .ids
+        )
+        fnames = ["phone_e164", "mobile_e164"]
+        start = time.perf_counter()
+        done = 0
+        for chunk_ids in split_every(chunk_size, partner_ids):
+            partners = self.with_context(active_test=False).browse(chunk_ids)
+            for fname in fnames:
+                self.env.add_to_compute(self._fields[fname], partners)
+            partners.flush(fnames)
+            partners.invalidate_cache()
+            done += len(chunk_ids)
+            duration = time.perf_counter() - start
+            logger.info(
+                "E.164 phone backfill: %d/%d partners, %.0f partners/s",
+                done,
+                len(partner_ids),
+                duration and done / duration or 0.0,
+            )
+        duration = time.perf_counter() - start
+        res = {
+            "partners": done,
+            "duration": duration,
+            "throughput": duration and done / duration or 0.0,
+        }
+        logger.info("E.164 phone backfill done: %s", res)
+        return res
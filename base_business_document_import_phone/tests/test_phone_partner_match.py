@@ -30,3 +30,43 @@ class TestPhonePartnerMatch(TransactionCase):
         }
         res = bdoo._match_partner(partner_dict, [])
         self.assertEqual(res, partner)
+
+    def test_phone_e164_fields(self):
+        rpo = self.env["res.partner"]
+        partner = rpo.create(
+            {
+                "name": "Akretion",
+                "country_id": self.env.ref("base.fr").id,
+                "phone": "01 41 98 12 42",
+                "mobile": "not a number",
+            }
+        )
+        self.assertEqual(partner.phone_e164, "+33141981242")
+        self.assertFalse(partner.mobile_e164)
+        partner.write({"mobile": "06.99.88.77.66"})
+        self.assertEqual(partner.mobile_e164, "+33699887766")
+        partner.write({"phone": False})
+        self.assertFalse(partner.phone_e164)
+        # The backfill computes the numbers of the existing partners
+        self.env.cr.execute(
+            "UPDATE res_partner SET mobile_e164 = NULL WHERE id = %s", (partner.id,)
+        )
+        partner.invalidate_cache()
+        res = rpo._backfill_phone_e164(chunk_size=10)
+        self.assertGreaterEqual(res["partners"], 1)
+        self.assertEqual(partner.mobile_e164, "+33699887766")
+
+    def test_phone_e164_company_country(self):
+        company = self.env["res.company"].create(
+            {"name": "Akretion Belgium", "country_id": self.env.ref("base.be").id}
+        )
+        partner = self.env["res.partner"].create(
+            {
+                "name": "Akretion contact",
+                "company_id": company.id,
+                "phone": "02 123 45 67",
+            }
+        )
+        self.assertEqual(partner.phone_e164, "+3221234567")
+        company.country_id = self.env.ref("base.fr")
+        self.assertTrue(partner.phone_e164.startswith("+33"))
@@ -4,16 +4,28 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import logging
+import threading
+import time
 from io import BytesIO
 
 from lxml import etree
 
 from odoo import _, api, models
 from odoo.exceptions import UserError
-from odoo.tools import file_open, float_is_zero, float_round
+from odoo.tools import config, file_open, float_is_zero, float_round
 
 logger = logging.getLogger(__name__)
 
+# Compiled XSD schemas shared by the whole process, by (document, version)
+_XML_SCHEMAS = {}
+_XML_SCHEMAS_LOCK = threading.Lock()
+_XML_SCHEMAS_STATS = {
+    "compile_count": 0,
+    "compile_time": 0.0,
+    "validate_count": 0,
+    "validate_time": 0.0,
+}
+
 try:
     from PyPDF2 import PdfFileReader, PdfFileWriter
     from PyPDF2.generic import NameObject
@@ -563,19 +575,81 @@ class BaseUbl(models.AbstractModel):
             )
         return version_xpath[0].text.strip()
 
+    @api.model
+    def _ubl_get_xml_schema(self, document, version="2.1"):
+        """Return the compiled XSD for given document and version.
+
+        Schemas are compiled once and kept in memory for the whole process.
+        """
+        key = (document, version)
+        schema = _XML_SCHEMAS.get(key)
+        if schema is not None:
+            return schema
+        with _XML_SCHEMAS_LOCK:
+            schema = _XML_SCHEMAS.get(key)
+            if schema is None:
+                start = time.perf_counter()
+                xsd_file = "base_ubl/data/xsd-{}/maindoc/UBL-{}-{}.xsd".format(
+                    version, document, version
+                )
+                with file_open(xsd_file) as xsd_fd:
+                    schema = etree.XMLSchema(etree.parse(xsd_fd))
+                _XML_SCHEMAS[key] = schema
+                _XML_SCHEMAS_STATS["compile_count"] += 1
+                _XML_SCHEMAS_STATS["compile_time"] += time.perf_counter() - start
+        return schema
+
+    @api.model
+    def _ubl_preload_xml_schemas(self, documents):
+        """Compile XSD schemas in advance.
+
+        :param documents: list of `(document, version)` tuples
+        """
+        for document, version in documents:
+            try:
+                self._ubl_get_xml_schema(document, version=version)
+            except (OSError, etree.LxmlError) as e:
+                logger.warning(
+                    "Cannot preload UBL schema %s %s: %s", document, version, e
+                )
+
+    def _register_hook(self):
+        res = super()._register_hook()
+        # Server option like `ubl_xsd_preload = Invoice:2.1,Order:2.1`
+        preload = config.get("ubl_xsd_preload")
+        if preload:
+            documents = [
+                tuple(item.strip().split(":", 1))
+                for item in preload.split(",")
+                if ":" in item
+            ]
+            self._ubl_preload_xml_schemas(documents)
+        return res
+
+    @api.model
+    def _ubl_xml_schema_stats(self):
+        """Return counters and timings of XSD compilation and validation."""
+        return dict(_XML_SCHEMAS_STATS, cached=len(_XML_SCHEMAS))
+
     @api.model
     def _ubl_check_xml_schema(self, xml_string, document, version="2.1"):
-        """Validate the XML file against the XSD"""
-        xsd_file = "base_ubl/data/xsd-{}/maindoc/UBL-{}-{}.xsd".format(
-            version, document, version
-        )
-        xsd_etree_obj = etree.parse(file_open(xsd_file))
-        official_schema = etree.XMLSchema(xsd_etree_obj)
+        """Validate the XML file against the XSD
+
+        :param xml_string: XML content as bytes or as an already parsed
+            lxml element (or tree), which avoids parsing the content again
+        """
+        official_schema = self._ubl_get_xml_schema(document, version=version)
+        start = time.perf_counter()
         try:
-            t = etree.parse(BytesIO(xml_string))
-            official_schema.assertValid(t)
+            if isinstance(xml_string, bytes):
+                xml_doc = etree.parse(BytesIO(xml_string))
+            else:
+                xml_doc = xml_string
+            official_schema.assertValid(xml_doc)
         except Exception as e:
             # if the validation of the XSD fails, we arrive here
+            if not isinstance(xml_string, bytes):
+                xml_string = etree.tostring(xml_string, pretty_print=True)
             logger = logging.getLogger(__name__)
             logger.warning("The XML file is invalid against the XML Schema Definition")
             logger.warning(xml_string)
@@ -590,6 +664,9 @@ class BaseUbl(models.AbstractModel):
                 )
                 % str(e)
             )
+        finally:
+            _XML_SCHEMAS_STATS["validate_count"] += 1
+            _XML_SCHEMAS_STATS["validate_time"] += time.perf_counter() - start
         return True
 
     # TODO: move to pdf_helper
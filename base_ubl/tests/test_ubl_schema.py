@@ -0,0 +1,35 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from lxml import etree
+
+from odoo.exceptions import UserError
+from odoo.tests.common import TransactionCase
+from odoo.tools import mute_logger
+
+
+class TestUblSchema(TransactionCase):
+    def test_schema_cache(self):
+        ubl = self.env["base.ubl"]
+        schema = ubl._ubl_get_xml_schema("Invoice", version="2.1")
+        stats = ubl._ubl_xml_schema_stats()
+        self.assertIs(ubl._ubl_get_xml_schema("Invoice", version="2.1"), schema)
+        self.assertEqual(
+            ubl._ubl_xml_schema_stats()["compile_count"], stats["compile_count"]
+        )
+
+    @mute_logger("odoo.addons.base_ubl.models.ubl")
+    def test_check_parsed_tree(self):
+        ubl = self.env["base.ubl"]
+        nsmap, ns = ubl._ubl_get_nsmap_namespace("Invoice-2")
+        xml_string = etree.tostring(etree.Element("Invoice", nsmap=nsmap))
+        xml_root = etree.fromstring(xml_string)
+        stats = ubl._ubl_xml_schema_stats()
+        # Both bytes and parsed trees are validated
+        with self.assertRaises(UserError):
+            ubl._ubl_check_xml_schema(xml_string, "Invoice", version="2.1")
+        with self.assertRaises(UserError):
+            ubl._ubl_check_xml_schema(xml_root, "Invoice", version="2.1")
+        self.assertEqual(
+            ubl._ubl_xml_schema_stats()["validate_count"],
+            stats["validate_count"] + 2,
+        )
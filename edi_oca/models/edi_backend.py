@@ -11,14 +11,20 @@ import traceback
 from io import StringIO
 
 from odoo import _, exceptions, fields, models, tools
+from odoo.tools import groupby, split_every
 
+from odoo.addons.component.core import _component_databases
 from odoo.addons.component.exception import NoComponentError
 from odoo.addons.queue_job.exception import RetryableJobError
 
 from ..exceptions import EDIValidationError
+from ..utils import ComponentClassCache
 
 _logger = logging.getLogger(__name__)
 
+# States of the jobs which are still going to run
+PENDING_JOB_STATES = ("wait_dependencies", "pending", "enqueued", "started")
+
 
 def _get_exception_msg():
     buff = StringIO()
@@ -57,6 +63,15 @@ class EDIBackend(models.Model):
     """
     )
     active = fields.Boolean(default=True)
+    job_batch_size = fields.Integer(
+        string="Job batch size",
+        help="""
+    When set, pending exchange records found by the crons
+    are handled in chunks of this size: one job per chunk
+    instead of one job per record.
+    Can be overridden per exchange type.
+    """,
+    )
 
     def _get_component(self, exchange_record, key):
         record_conf = self._get_component_conf_for_record(exchange_record, key)
@@ -81,7 +96,7 @@ class EDIBackend(models.Model):
         )
 
     def _get_component_env_ctx(self, record_conf, key):
-        env_ctx = record_conf.get("env_ctx", {})
+        env_ctx = dict(record_conf.get("env_ctx", {}))
         # You can use `edi_session` down in the stack to control logics.
         env_ctx.update(dict(edi_framework_action=key))
         return env_ctx
@@ -101,12 +116,25 @@ class EDIBackend(models.Model):
 
         The order can be very important if your implementation
         allow generic / default components to be registered.
+
+        NOTE: matched component classes are cached.
+        If your override depends on the state of the backend
+        make sure to extend `_component_cache_key` accordingly.
         """
         return (
             1 if component_class._backend_type else 0,
             1 if component_class._exchange_type else 0,
         )
 
+    def _component_cache_key(self, model, usage_candidates, **kw):
+        """Key identifying a component lookup in the component cache.
+
+        :param model: model name of the work context
+        :param usage_candidates: list of usages to try by priority
+        :param kw: keyword args to lookup for components
+        """
+        return (model, tuple(usage_candidates), tuple(sorted(kw.items())))
+
     def _find_component(self, model, usage_candidates, safe=True, work_ctx=None, **kw):
         """Retrieve component for current backend.
 
@@ -121,25 +149,71 @@ class EDIBackend(models.Model):
         if "backend" not in work_ctx:
             work_ctx["backend"] = self
         with self.work_on(model, **work_ctx) as work:
-            for usage in usage_candidates:
-                components, c_work_ctx = work._matching_components(usage=usage, **kw)
-                if not components:
-                    continue
-                # Sort components and pick the 1st one matching.
-                # In this way we support generic components registration
-                # and specific components registrations
-                components = sorted(
-                    components, key=lambda x: self._component_sort_key(x), reverse=True
-                )
-                component = components[0](c_work_ctx)
+            component_class = self._find_component_class(work, usage_candidates, **kw)
+            if component_class:
+                component = component_class(work)
                 _logger.debug("using component %s", component._name)
-                break
         if not component and not safe:
             raise NoComponentError(
                 "No component found matching any of: {}".format(usage_candidates)
             )
         return component or None
 
+    def _find_component_class(self, work, usage_candidates, **kw):
+        """Retrieve the class of the 1st component matching usage candidates.
+
+        Results are cached on the components registry.
+        """
+        cache = ComponentClassCache.from_registry(work.components_registry)
+        try:
+            cache_key = self._component_cache_key(
+                work.model_name, usage_candidates, **kw
+            )
+            return cache[cache_key]
+        except TypeError:
+            # Unhashable lookup args: no cache
+            cache_key = None
+        except KeyError:
+            pass
+        component_class = None
+        for usage in usage_candidates:
+            components, __ = work._matching_components(usage=usage, **kw)
+            if not components:
+                continue
+            # Sort components and pick the 1st one matching.
+            # In this way we support generic components registration
+            # and specific components registrations
+            components = sorted(
+                components, key=lambda x: self._component_sort_key(x), reverse=True
+            )
+            component_class = components[0]
+            break
+        if cache_key is not None:
+            cache[cache_key] = component_class
+        return component_class
+
+    def _get_components_registry(self):
+        # Tests can provide their own registry via ctx
+        return self.env.context.get("components_registry") or _component_databases.get(
+            self.env.cr.dbname
+        )
+
+    def _component_cache_clear(self):
+        """Drop cached component lookups for current database."""
+        registry = self._get_components_registry()
+        if registry is not None:
+            ComponentClassCache.from_registry(registry).clear()
+
+    def _component_cache_stats(self):
+        """Return usage statistics of the component cache for current database.
+
+        :return: dictionary with keys `hits`, `misses`, `size`, `hit_rate`
+        """
+        registry = self._get_components_registry()
+        if registry is None:
+            return ComponentClassCache().stats()
+        return ComponentClassCache.from_registry(registry).stats()
+
     def _get_component_usage_candidates(self, exchange_record, key):
         """Retrieve usage candidates for components."""
         # fmt:off
@@ -396,7 +470,13 @@ class EDIBackend(models.Model):
             "EDI Exchange output sync: found %d new records to process.",
             len(new_records),
         )
-        for rec in new_records:
+        new_records = self._exclude_records_with_pending_job(
+            new_records, ("action_exchange_generate", "action_exchange_generate_batch")
+        )
+        for batched, rec in self._split_records_for_jobs(new_records):
+            if batched:
+                rec.with_delay().action_exchange_generate_batch(send=not skip_send)
+                continue
             job1 = rec.delayable().action_exchange_generate()
             if not skip_send:
                 # Chain send job.
@@ -415,12 +495,74 @@ class EDIBackend(models.Model):
             "EDI Exchange output sync: found %d pending records to process.",
             len(pending_records),
         )
-        for rec in pending_records:
-            if rec.edi_exchange_state == "output_pending":
-                rec.with_delay().action_exchange_send()
+        to_send = self._exclude_records_with_pending_job(
+            pending_records.filtered(
+                lambda x: x.edi_exchange_state == "output_pending"
+            ),
+            (
+                "action_exchange_send",
+                "action_exchange_send_batch",
+                "action_exchange_generate_batch",
+            ),
+        )
+        for batched, records in self._split_records_for_jobs(to_send):
+            if batched:
+                records.with_delay().action_exchange_send_batch()
             else:
-                # TODO: run in job as well?
-                self._exchange_output_check_state(rec)
+                records.with_delay().action_exchange_send()
+        for rec in pending_records - to_send:
+            # TODO: run in job as well?
+            self._exchange_output_check_state(rec)
+
+    def _get_job_batch_size(self, exchange_type):
+        """Return the size of job chunks for given exchange type.
+
+        0 means batch mode is disabled: one job per record.
+        """
+        return exchange_type.job_batch_size or self.job_batch_size
+
+    def _exclude_records_with_pending_job(self, exchange_records, method_names):
+        """Return the exchange records without a pending job of these methods.
+
+        The chunks of the batch jobs change when records are added between
+        two runs of the cron, so the identity key of a chunk is not enough
+        to avoid queuing a record again in another chunk.
+        """
+        if not exchange_records:
+            return exchange_records
+        jobs = (
+            self.env["queue.job"]
+            .sudo()
+            .search_read(
+                [
+                    ("model_name", "=", exchange_records._name),
+                    ("method_name", "in", list(method_names)),
+                    ("state", "in", PENDING_JOB_STATES),
+                ],
+                ["record_ids"],
+            )
+        )
+        queued_ids = {
+            record_id for job in jobs for record_id in job["record_ids"] or []
+        }
+        return exchange_records.filtered(lambda x: x.id not in queued_ids)
+
+    def _split_records_for_jobs(self, exchange_records):
+        """Split given exchange records into job chunks.
+
+        Records are grouped by exchange type, so that every chunk
+        gets the job channel of its type.
+
+        :return: generator of tuples `(batched, records)`.
+            When batch mode is disabled for the type
+            `batched` is False and `records` contains a single record.
+        """
+        by_type = groupby(exchange_records, key=lambda x: x.type_id)
+        for exchange_type, records in by_type:
+            batch_size = self._get_job_batch_size(exchange_type)
+            record_ids = [x.id for x in records]
+            for chunk_ids in split_every(batch_size or 1, record_ids):
+                yield bool(batch_size), exchange_records.browse(chunk_ids)
 
     def _output_new_records_domain(self, record_ids=None):
         """Domain for output records needing output content generation."""
@@ -606,8 +748,15 @@ class EDIBackend(models.Model):
             "EDI Exchange input sync: found %d pending records to receive.",
             len(pending_records),
         )
-        for rec in pending_records:
-            rec.with_delay().action_exchange_receive()
+        pending_records = self._exclude_records_with_pending_job(
+            pending_records,
+            ("action_exchange_receive", "action_exchange_receive_batch"),
+        )
+        for batched, records in self._split_records_for_jobs(pending_records):
+            if batched:
+                records.with_delay().action_exchange_receive_batch()
+            else:
+                records.with_delay().action_exchange_receive()
 
         pending_process_records = self.exchange_record_model.search(
             self._input_pending_process_records_domain(record_ids=record_ids)
@@ -616,8 +765,15 @@ class EDIBackend(models.Model):
             "EDI Exchange input sync: found %d pending records to process.",
             len(pending_process_records),
         )
-        for rec in pending_process_records:
-            rec.with_delay().action_exchange_process()
+        pending_process_records = self._exclude_records_with_pending_job(
+            pending_process_records,
+            ("action_exchange_process", "action_exchange_process_batch"),
+        )
+        for batched, records in self._split_records_for_jobs(pending_process_records):
+            if batched:
+                records.with_delay().action_exchange_process_batch()
+            else:
+                records.with_delay().action_exchange_process()
 
     def _input_pending_records_domain(self, record_ids=None):
         domain = [
@@ -6,8 +6,13 @@
 import base64
 import logging
 from collections import defaultdict
+from contextlib import contextmanager
 
 from odoo import _, api, exceptions, fields, models
+from odoo.osv import expression
+from odoo.osv.query import Query
+
+from odoo.addons.queue_job.exception import RetryableJobError
 
 from ..utils import exchange_record_job_identity_exact, get_checksum
 
@@ -306,19 +311,100 @@ class EDIExchangeRecord(models.Model):
 
     def action_exchange_generate(self, **kw):
         self.ensure_one()
-        return self.backend_id.exchange_generate(self, **kw)
+        with self._access_check_memo():
+            return self.backend_id.exchange_generate(self, **kw)
 
     def action_exchange_send(self):
         self.ensure_one()
-        return self.backend_id.exchange_send(self)
+        with self._access_check_memo():
+            return self.backend_id.exchange_send(self)
 
     def action_exchange_process(self):
         self.ensure_one()
-        return self.backend_id.exchange_process(self)
+        with self._access_check_memo():
+            return self.backend_id.exchange_process(self)
 
     def action_exchange_receive(self):
         self.ensure_one()
-        return self.backend_id.exchange_receive(self)
+        with self._access_check_memo():
+            return self.backend_id.exchange_receive(self)
+
+    def action_exchange_generate_batch(self, send=False):
+        """Generate output content for a batch of exchange records.
+
+        :param send: send each record right after its generation
+        """
+
+        def _generate(rec):
+            res = rec.action_exchange_generate()
+            if send and rec.edi_exchange_state == "output_pending":
+                res = rec.action_exchange_send()
+            return res
+
+        return self._exchange_batch_run(
+            _generate, "action_exchange_generate_batch", send=send
+        )
+
+    def action_exchange_send_batch(self):
+        """Send a batch of exchange records."""
+        return self._exchange_batch_run(
+            lambda rec: rec.action_exchange_send(), "action_exchange_send_batch"
+        )
+
+    def action_exchange_process_batch(self):
+        """Process a batch of exchange records."""
+        return self._exchange_batch_run(
+            lambda rec: rec.action_exchange_process(), "action_exchange_process_batch"
+        )
+
+    def action_exchange_receive_batch(self):
+        """Receive a batch of exchange records."""
+        return self._exchange_batch_run(
+            lambda rec: rec.action_exchange_receive(), "action_exchange_receive_batch"
+        )
+
+    def _exchange_batch_run(self, action, method_name, **kw):
+        """Run given action on each record of the batch.
+
+        Every record runs in its own savepoint:
+        if the action fails for one record only its changes are rolled back
+        and the rest of the batch is handled anyway.
+        Failed records keep their state and will be picked up by the next cron.
+        Records failing with a retryable error are retried by queue_job:
+        the whole job if no record was handled, otherwise a new job
+        calling `method_name` with `kw` on these records only.
+        """
+        failed = retry = self.browse()
+        retry_error = None
+        for rec in self:
+            try:
+                with self.env.cr.savepoint():
+                    action(rec)
+            except RetryableJobError as err:
+                _logger.info(
+                    "EDI batch action to retry for %s: %s", rec.identifier, err
+                )
+                retry |= rec
+                retry_error = err
+            except Exception:
+                _logger.exception("EDI batch action failed for %s", rec.identifier)
+                failed |= rec
+        if retry:
+            if not self - failed - retry:
+                raise retry_error
+            delayed = retry.with_delay(eta=retry_error.seconds)
+            getattr(delayed, method_name)(**kw)
+        res = _("%(done)d records handled, %(failed)d failed: %(failed_ids)s") % {
+            "done": len(self) - len(failed) - len(retry),
+            "failed": len(failed),
+            "failed_ids": failed.ids,
+        }
+        if retry:
+            res += _(", %(retry)d to retry: %(retry_ids)s") % {
+                "retry": len(retry),
+                "retry_ids": retry.ids,
+            }
+        return res
 
     def exchange_create_ack_record(self, **kw):
         return self.exchange_create_child_record(
@@ -460,81 +546,105 @@ class EDIExchangeRecord(models.Model):
         count=False,
         access_rights_uid=None,
     ):
-        ids = super()._search(
+        if not self.env.is_system():
+            # restrictions do not apply to group "Settings"
+            access_domain = self._get_related_record_access_domain()
+            args = expression.AND([args, access_domain])
+        return super()._search(
             args,
             offset=offset,
             limit=limit,
             order=order,
-            count=False,
+            count=count,
             access_rights_uid=access_rights_uid,
         )
-        if self.env.is_system():
-            # restrictions do not apply to group "Settings"
-            return len(ids) if count else ids
 
-        # TODO highlight orphaned EDI records in UI:
-        #  - self.model + self.res_id are set
-        #  - self.record returns empty recordset
-        # Remark: self.record is @property, not field
+    @api.model
+    def _get_related_models(self):
+        """Return the models referenced by exchange records.
 
-        if not ids:
-            return 0 if count else []
-        orig_ids = ids
-        ids = set(ids)
-        result = []
-        model_data = defaultdict(
-            lambda: defaultdict(set)
-        )  # {res_model: {res_id: set(ids)}}
-        for sub_ids in self._cr.split_for_in_conditions(ids):
-            self._cr.execute(
-                """
-                            SELECT id, res_id, model
-                            FROM "%s"
-                            WHERE id = ANY (%%(ids)s)"""
-                % self._table,
-                dict(ids=list(sub_ids)),
+        The distinct values are read in the index of `model`,
+        one lookup per model, without scanning the records.
+        """
+        self.flush(["model"])
+        self._cr.execute(
+            """
+            WITH RECURSIVE models AS (
+                (
+                    SELECT model FROM "%(table)s"
+                    WHERE model IS NOT NULL ORDER BY model LIMIT 1
+                )
+                UNION ALL
+                SELECT (
+                    SELECT model FROM "%(table)s"
+                    WHERE model > models.model ORDER BY model LIMIT 1
+                )
+                FROM models
+                WHERE models.model IS NOT NULL
             )
-            for eid, res_id, model in self._cr.fetchall():
-                if not model:
-                    result.append(eid)
-                    continue
-                model_data[model][res_id].add(eid)
-
-        for model, targets in model_data.items():
-            if not self.env[model].check_access_rights("read", False):
+            SELECT model FROM models WHERE model IS NOT NULL
+            """
+            % {"table": self._table}
+        )
+        return [model for (model,) in self._cr.fetchall()]
+
+    @api.model
+    def _get_related_record_access_domain(self):
+        """Domain restricting records to the ones w/ a readable related record.
+
+        Records w/o related record are always visible.
+        For each related model, readable ids are pushed down to SQL
+        as sub-queries, hence access is checked w/o loading any id in memory.
+        Records referencing deleted records are hidden:
+        see `_cron_log_orphan_records` to find them.
+        """
+        domain = [("model", "=", False)]
+        for model in self._get_related_models():
+            if model not in self.env:
                 continue
-            recs = self.env[model].browse(list(targets))
-            missing = recs - recs.exists()
-            if missing:
-                for res_id in missing.ids:
-                    _logger.warning(
-                        "Deleted record %s,%s is referenced by edi.exchange.record %s",
-                        model,
-                        res_id,
-                        list(targets[res_id]),
-                    )
-                recs = recs - missing
-            allowed = (
-                self.env[model]
-                .with_context(active_test=False)
-                ._search([("id", "in", recs.ids)])
-            )
-            for target_id in allowed:
-                result += list(targets[target_id])
-        if len(orig_ids) == limit and len(result) < len(orig_ids):
-            result.extend(
-                self._search(
-                    args,
-                    offset=offset + len(orig_ids),
-                    limit=limit,
-                    order=order,
-                    count=count,
-                    access_rights_uid=access_rights_uid,
-                )[: limit - len(result)]
+            target_model = self.env[model].with_context(active_test=False)
+            if target_model._abstract or not target_model.check_access_rights(
+                "read", False
+            ):
+                continue
+            allowed = target_model._search([])
+            if isinstance(allowed, Query):
+                allowed_leaf = ("res_id", "inselect", allowed.subselect())
+            else:
+                allowed_leaf = ("res_id", "in", allowed)
+            domain = expression.OR([domain, [("model", "=", model), allowed_leaf]])
+        return domain
+
+    @api.model
+    def _cron_log_orphan_records(self):
+        """Warn about exchange records referencing deleted records."""
+        for model in self._get_related_models():
+            if model in self.env and not self.env[model]._abstract:
+                self._log_orphan_records(self.env[model])
+
+    @api.model
+    def _log_orphan_records(self, target_model):
+        self.flush(["model", "res_id"])
+        self._cr.execute(
+            """
+            SELECT rec.res_id, array_agg(rec.id ORDER BY rec.id)
+            FROM "%s" rec
+            WHERE rec.model = %%s
+                AND NOT EXISTS (
+                    SELECT 1 FROM "%s" target WHERE target.id = rec.res_id
+                )
+            GROUP BY rec.res_id
+            """
+            % (self._table, target_model._table),
+            [target_model._name],
+        )
+        for res_id, ids in self._cr.fetchall():
+            _logger.warning(
+                "Deleted record %s,%s is referenced by edi.exchange.record %s",
+                target_model._name,
+                res_id,
+                ids,
             )
-        # Restore original ordering
-        result = [x for x in orig_ids if x in result]
-        return len(result) if count else list(result)
 
     def read(self, fields=None, load="_classic_read"):
         """Override to explicitely call check_access_rule, that is not called
@@ -550,25 +660,42 @@ class EDIExchangeRecord(models.Model):
             return
         default_checker = self.env["edi.exchange.consumer.mixin"].get_edi_access
         by_model_rec_ids = defaultdict(set)
-        by_model_checker = {}
         for exc_rec in self.sudo():
-            if not exc_rec.related_record_exists:
-                continue
-            by_model_rec_ids[exc_rec.model].add(exc_rec.res_id)
-            if exc_rec.model not in by_model_checker:
-                by_model_checker[exc_rec.model] = getattr(
-                    self.env[exc_rec.model], "get_edi_access", default_checker
-                )
-
+            if exc_rec.model and exc_rec.res_id:
+                by_model_rec_ids[exc_rec.model].add(exc_rec.res_id)
+        memo = getattr(self.env.cr, "_edi_access_check_memo", None)
         for model, rec_ids in by_model_rec_ids.items():
-            records = self.env[model].browse(rec_ids).with_user(self._uid)
-            checker = by_model_checker[model]
-            for record in records:
-                check_operation = checker(
-                    [record.id], operation, model_name=record._name
-                )
-                record.check_access_rights(check_operation)
-                record.check_access_rule(check_operation)
+            checker = getattr(self.env[model], "get_edi_access", default_checker)
+            check_operation = checker(list(rec_ids), operation, model_name=model)
+            memo_key = (self._uid, model, check_operation)
+            if memo is not None:
+                rec_ids -= memo[memo_key]
+            records = self.env[model].browse(rec_ids).with_user(self._uid).exists()
+            if not records:
+                continue
+            # Rules are evaluated once for all the records
+            records.check_access_rights(check_operation)
+            records.check_access_rule(check_operation)
+            if memo is not None:
+                memo[memo_key].update(records.ids)
+
+    @contextmanager
+    def _access_check_memo(self):
+        """Remember granted access on related records within the block.
+
+        Exchange actions write the same exchange records several times:
+        related records are checked only once for the whole action.
+        """
+        cr = self.env.cr
+        if getattr(cr, "_edi_access_check_memo", None) is not None:
+            # Already remembering
+            yield
+            return
+        cr._edi_access_check_memo = defaultdict(set)
+        try:
+            yield
+        finally:
+            cr._edi_access_check_memo = None
 
     def write(self, vals):
         self.check_access_rule("write")
@@ -2,10 +2,12 @@
 # Copyright 2021 Camptocamp SA
 # @author Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import copy
 import logging
 from datetime import datetime
+from functools import lru_cache
 
-from pytz import timezone, utc
+from pytz import UnknownTimeZoneError, timezone, utc
 
 from odoo import _, api, exceptions, fields, models
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT as DATETIME_FORMAT, groupby
@@ -22,6 +24,18 @@ except ImportError:
     _logger.debug("`yaml` lib is missing")
 
 
+@lru_cache(maxsize=512)
+def _parse_advanced_settings(yaml_text):
+    """Parse YAML settings once per process.
+
+    The cache is keyed on the YAML text itself,
+    hence any change of the settings is picked up immediately.
+    The returned object is shared: use `_load_advanced_settings`
+    to get a copy of it.
+    """
+    return yaml.safe_load(yaml_text or "") or {}
+
+
 class EDIExchangeType(models.Model):
     """
     Define a kind of exchange.
@@ -45,6 +59,12 @@ class EDIExchangeType(models.Model):
     job_channel_id = fields.Many2one(
         comodel_name="queue.job.channel",
     )
+    job_batch_size = fields.Integer(
+        string="Job batch size",
+        help="Handle pending records of this type in chunks of this size: "
+        "one job per chunk instead of one job per record. "
+        "If not set, the value from the backend is used.",
+    )
     name = fields.Char(required=True)
     code = fields.Char(required=True, copy=False)
     direction = fields.Selection(
@@ -173,10 +193,89 @@ class EDIExchangeType(models.Model):
             rec.advanced_settings = rec._load_advanced_settings()
 
     def _load_advanced_settings(self):
-        # TODO: validate settings w/ a schema.
-        # Could be done w/ Cerberus or JSON-schema.
-        # This would help documenting core and custom keys.
-        return yaml.safe_load(self.advanced_settings_edit or "") or {}
+        # Copy the cached settings, so that callers can't alter them
+        return copy.deepcopy(
+            _parse_advanced_settings(self.advanced_settings_edit or "")
+        )
+
+    # Actions supported in `components` settings
+    _advanced_settings_component_keys = (
+        "generate",
+        "validate",
+        "check",
+        "send",
+        "receive",
+        "process",
+    )
+
+    @api.constrains("advanced_settings_edit")
+    def _check_advanced_settings(self):
+        for rec in self:
+            try:
+                settings = rec._load_advanced_settings()
+            except yaml.YAMLError as err:
+                raise exceptions.ValidationError(
+                    _("Advanced settings for %(name)s are not valid YAML: %(err)s")
+                    % {"name": rec.name, "err": err}
+                ) from err
+            errors = rec._validate_advanced_settings(settings)
+            if errors:
+                raise exceptions.ValidationError(
+                    _("Advanced settings for %(name)s are not valid:\n%(errors)s")
+                    % {"name": rec.name, "errors": "\n".join(errors)}
+                )
+
+    def _validate_advanced_settings(self, settings):
+        """Validate the structure of parsed advanced settings.
+
+        Only core keys are checked, unknown keys are ignored.
+        Override to validate your own keys.
+
+        :return: list of error messages
+        """
+        if not isinstance(settings, dict):
+            return [_("Settings must be a dictionary.")]
+        errors = []
+        components = settings.get("components", {})
+        if not isinstance(components, dict):
+            errors.append(_("`components` must be a dictionary."))
+            components = {}
+        for key in self._advanced_settings_component_keys:
+            conf = components.get(key)
+            if conf is None:
+                continue
+            if not isinstance(conf, dict):
+                errors.append(_("`components.%s` must be a dictionary.") % key)
+                continue
+            if "usage" in conf and not isinstance(conf["usage"], str):
+                errors.append(_("`components.%s.usage` must be a string.") % key)
+            for ctx_key in ("work_ctx", "env_ctx"):
+                if not isinstance(conf.get(ctx_key, {}), dict):
+                    errors.append(
+                        _("`components.%(key)s.%(ctx_key)s` must be a dictionary.")
+                        % {"key": key, "ctx_key": ctx_key}
+                    )
+        pattern_settings = settings.get("filename_pattern", {})
+        if not isinstance(pattern_settings, dict):
+            errors.append(_("`filename_pattern` must be a dictionary."))
+            pattern_settings = {}
+        force_tz = pattern_settings.get("force_tz")
+        if force_tz:
+            try:
+                timezone(str(force_tz))
+            except UnknownTimeZoneError:
+                errors.append(_("`filename_pattern.force_tz`: unknown timezone."))
+        date_pattern = pattern_settings.get("date_pattern")
+        if date_pattern is not None and not isinstance(date_pattern, str):
+            errors.append(_("`filename_pattern.date_pattern` must be a string."))
+        return errors
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "advanced_settings_edit" in vals:
+            # Component lookups depend on settings
+            self.env["edi.backend"]._component_cache_clear()
+        return res
 
     def _compute_ack_for_type_ids(self):
         ack_for = self.search([("ack_type_id", "in", self.ids)])
@@ -185,6 +284,10 @@ class EDIExchangeType(models.Model):
             rec.ack_for_type_ids = [x.id for x in by_type_id.get(rec.id, [])]
 
     def get_settings(self):
+        """Return advanced settings parsed as dictionary.
+
+        YAML is parsed only once per process for the same settings.
+        """
         return self.advanced_settings
 
     def set_settings(self, val):
@@ -0,0 +1,95 @@
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+"""
+Benchmark of the searches of exchange records by a user without the group
+"Settings", whose results are restricted to the readable related records.
+
+Synthetic exchange records related to partners are created, the searches of a
+page and the counts are timed, then everything is rolled back.
+To be run from an Odoo shell, on a test database with edi_oca installed:
+
+    odoo shell -d <database> < edi_oca/scripts/search_benchmark.py
+"""
+import time
+
+RECORD_COUNT = 20000
+SEARCH_COUNT = 20
+PAGE_SIZE = 80
+
+
+def create_exchange_records(env, record_count):
+    backend_type = env["edi.backend.type"].create(
+        {"name": "Search benchmark", "code": "search_benchmark"}
+    )
+    backend = env["edi.backend"].create(
+        {"name": "Search benchmark", "backend_type_id": backend_type.id}
+    )
+    exchange_type = env["edi.exchange.type"].create(
+        {
+            "name": "Search benchmark",
+            "code": "search_benchmark",
+            "direction": "output",
+            "backend_type_id": backend_type.id,
+            "backend_id": backend.id,
+        }
+    )
+    partners = env["res.partner"].create(
+        [{"name": "EDI search benchmark %d" % i} for i in range(record_count)]
+    )
+    # A part of the records reference deleted partners
+    orphans = partners[: record_count // 10]
+    record_model = env["edi.exchange.record"].with_context(edi__skip_quick_exec=True)
+    for partner in partners:
+        record_model.create(
+            {
+                "backend_id": backend.id,
+                "type_id": exchange_type.id,
+                "model": partner._name,
+                "res_id": partner.id,
+            }
+        )
+    orphans.unlink()
+    env["edi.exchange.record"].flush()
+
+
+def time_searches(record_model, search_count, page_size):
+    start = time.perf_counter()
+    for i in range(search_count):
+        record_model.search([], offset=i * page_size, limit=page_size)
+    page_time = (time.perf_counter() - start) / search_count
+    start = time.perf_counter()
+    for _i in range(search_count):
+        record_model.search_count([])
+    count_time = (time.perf_counter() - start) / search_count
+    return page_time, count_time
+
+
+def main(env, record_count=RECORD_COUNT, search_count=SEARCH_COUNT):
+    try:
+        create_exchange_records(env, record_count)
+        user = env["res.users"].create(
+            {
+                "name": "EDI search benchmark",
+                "login": "edi_search_benchmark",
+                "groups_id": [(6, 0, env.ref("base.group_user").ids)],
+            }
+        )
+        record_model = env["edi.exchange.record"].with_user(user)
+        page_time, count_time = time_searches(record_model, search_count, PAGE_SIZE)
+        print(
+            "%d exchange records, %d visible: page of %d in %.1f ms, "
+            "count in %.1f ms"
+            % (
+                env["edi.exchange.record"].search_count([]),
+                record_model.search_count([]),
+                PAGE_SIZE,
+                page_time * 1000,
+                count_time * 1000,
+            )
+        )
+    finally:
+        env.cr.rollback()
+        env.clear()
+
+
+main(env)  # noqa: F821
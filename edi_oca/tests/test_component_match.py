@@ -69,3 +69,32 @@ class EDIBackendTestMatchCase(EDIBackendCommonComponentRegistryTestCase):
             exchange_type="test_csv_output",
         )
         self.assertEqual(component._name, MatchByExchangeTypeOnly._name)
+
+    def test_component_cache(self):
+        class MatchCached(Component):
+            _name = "cached.match"
+            _inherit = "edi.component.mixin"
+            _usage = "cached.generate"
+            _backend_type = "demo_backend"
+            _apply_on = ["res.partner"]
+
+        self._build_components(MatchCached)
+        work_ctx = {"exchange_record": self.env["edi.exchange.record"].browse()}
+        self.backend._component_cache_clear()
+        stats = self.backend._component_cache_stats()
+        self.assertEqual(stats["size"], 0)
+        for __ in range(3):
+            component = self.backend._find_component(
+                "res.partner",
+                ["cached.generate"],
+                work_ctx=dict(work_ctx),
+                backend_type="demo_backend",
+            )
+            self.assertEqual(component._name, MatchCached._name)
+        new_stats = self.backend._component_cache_stats()
+        self.assertEqual(new_stats["size"], 1)
+        self.assertEqual(new_stats["hits"], stats["hits"] + 2)
+        self.assertEqual(new_stats["misses"], stats["misses"] + 1)
+        # Changing settings drops the cache
+        self.exchange_type_out.advanced_settings_edit = "foo: 1"
+        self.assertEqual(self.backend._component_cache_stats()["size"], 0)
@@ -2,8 +2,13 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import mock
+from requests.exceptions import ConnectionError as ReqConnectionError
+
 from odoo.tools import mute_logger
 
+from odoo.addons.queue_job.exception import RetryableJobError
+
 from .common import EDIBackendCommonComponentRegistryTestCase
 from .fake_components import FakeOutputChecker, FakeOutputGenerator, FakeOutputSender
 
@@ -92,3 +97,96 @@ class EDIBackendTestCronCase(EDIBackendCommonComponentRegistryTestCase):
         self.assertTrue(FakeOutputGenerator.check_not_called_for(self.record1))
         self.assertTrue(FakeOutputSender.check_not_called_for(self.record1))
         self.assertTrue(FakeOutputChecker.check_called_for(self.record1))
+
+    def test_split_records_for_jobs(self):
+        records = self.record1 + self.record2 + self.record3
+        chunks = list(self.backend._split_records_for_jobs(records))
+        self.assertEqual(chunks, [(False, rec) for rec in records])
+        self.backend.job_batch_size = 2
+        chunks = list(self.backend._split_records_for_jobs(records))
+        self.assertEqual(
+            chunks, [(True, self.record1 + self.record2), (True, self.record3)]
+        )
+        # Type settings win over backend ones
+        self.exchange_type_out.job_batch_size = 5
+        chunks = list(self.backend._split_records_for_jobs(records))
+        self.assertEqual(chunks, [(True, records)])
+
+    @mute_logger(*LOGGERS)
+    def test_exchange_generate_new_auto_send_batch(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.exchange_type_out.job_batch_size = 2
+        self.backend._cron_check_output_exchange_sync()
+        for rec in self.records:
+            self.assertEqual(rec.edi_exchange_state, "output_sent")
+            self.assertTrue(FakeOutputGenerator.check_called_for(rec))
+            self.assertTrue(FakeOutputSender.check_called_for(rec))
+
+    @mute_logger(*LOGGERS, "odoo.addons.edi_oca.models.edi_exchange_record")
+    def test_exchange_batch_failure_isolated(self):
+        self.record1._set_file_content("READY")
+        self.record1.edi_exchange_state = "output_pending"
+        # record2 is not generated yet: sending it must fail
+        res = (self.record1 + self.record2).action_exchange_send_batch()
+        self.assertEqual(res, "1 records handled, 1 failed: [%d]" % self.record2.id)
+        self.assertEqual(self.record1.edi_exchange_state, "output_sent")
+        self.assertEqual(self.record2.edi_exchange_state, "new")
+
+    def _batch_jobs(self, method_name):
+        return self.env["queue.job"].search(
+            [
+                ("model_name", "=", "edi.exchange.record"),
+                ("method_name", "=", method_name),
+            ]
+        )
+
+    @mute_logger(*LOGGERS)
+    def test_exchange_generate_batch_skip_queued_records(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.exchange_type_out.job_batch_size = 2
+        backend = self.backend.with_context(test_queue_job_no_delay=False)
+        backend._cron_check_output_exchange_sync()
+        jobs = self._batch_jobs("action_exchange_generate_batch")
+        self.assertEqual(len(jobs), 2)
+        # A new record shifts the chunks:
+        # the records already queued are not queued again
+        record4 = self.backend.create_record(
+            "test_csv_output",
+            {
+                "model": self.partner._name,
+                "res_id": self.env.ref("base.res_partner_2").id,
+            },
+        )
+        backend._cron_check_output_exchange_sync()
+        new_jobs = self._batch_jobs("action_exchange_generate_batch") - jobs
+        self.assertEqual(len(new_jobs), 1)
+        self.assertEqual(new_jobs.record_ids, record4.ids)
+
+    @mute_logger(*LOGGERS, "odoo.addons.edi_oca.models.edi_exchange_record")
+    def test_exchange_batch_retry(self):
+        records = self.record1 + self.record2
+        for rec in records:
+            rec._set_file_content("READY")
+            rec.edi_exchange_state = "output_pending"
+
+        def _send(exchange_record):
+            if exchange_record == self.record2:
+                raise ReqConnectionError("Connection broken")
+            return "ok"
+
+        records = records.with_context(test_queue_job_no_delay=False)
+        with mock.patch.object(type(self.backend), "_exchange_send") as mocked:
+            mocked.side_effect = _send
+            res = records.action_exchange_send_batch()
+            self.assertEqual(
+                res,
+                "1 records handled, 0 failed: [], 1 to retry: [%d]" % self.record2.id,
+            )
+            self.assertEqual(self.record1.edi_exchange_state, "output_sent")
+            self.assertEqual(self.record2.edi_exchange_state, "output_pending")
+            # The record to retry is sent again in a new job
+            job = self._batch_jobs("action_exchange_send_batch")
+            self.assertEqual(job.record_ids, self.record2.ids)
+            # When no record was handled, the job is retried
+            with self.assertRaises(RetryableJobError):
+                records[1:].action_exchange_send_batch()
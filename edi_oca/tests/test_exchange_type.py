@@ -3,10 +3,14 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import mock
+import yaml
 from freezegun import freeze_time
 
+from odoo import exceptions
 from odoo.tools import mute_logger
 
+from ..models.edi_exchange_type import _parse_advanced_settings
 from .common import EDIBackendCommonTestCase
 
 
@@ -148,3 +152,47 @@ class EDIExchangeTypeTestCase(EDIBackendCommonTestCase):
         rule2.invalidate_cache()
         self.assertFalse(rule1.active)
         self.assertFalse(rule2.active)
+
+    def test_advanced_settings_validation(self):
+        exc_type = self.exchange_type_out
+        with self.assertRaisesRegex(exceptions.ValidationError, "not valid YAML"):
+            exc_type.advanced_settings_edit = "components: [foo"
+        with self.assertRaisesRegex(exceptions.ValidationError, "must be a dictionary"):
+            exc_type.advanced_settings_edit = "- foo\n- bar"
+        with self.assertRaisesRegex(exceptions.ValidationError, "components.send"):
+            exc_type.advanced_settings_edit = "components:\n  send: foo"
+        with self.assertRaisesRegex(exceptions.ValidationError, "unknown timezone"):
+            exc_type.advanced_settings_edit = "filename_pattern:\n  force_tz: Nowhere"
+
+    def test_advanced_settings_parsed_once(self):
+        settings = "components:\n  send:\n    usage: my.send\n"
+        self.exchange_type_out.advanced_settings_edit = settings
+        self.exchange_type_in.advanced_settings_edit = settings
+        with mock.patch.object(yaml, "safe_load") as mocked:
+            self.exchange_type_out.invalidate_cache()
+            self.assertEqual(
+                self.exchange_type_out.get_settings()["components"]["send"]["usage"],
+                "my.send",
+            )
+            self.assertEqual(
+                self.exchange_type_in.get_settings()["components"]["send"]["usage"],
+                "my.send",
+            )
+            mocked.assert_not_called()
+
+    def test_advanced_settings_not_altered(self):
+        settings = "components:\n  send:\n    env_ctx:\n      foo: 1\n"
+        self.exchange_type_out.advanced_settings_edit = settings
+        record = self.backend.create_record(
+            self.exchange_type_out.code,
+            {"model": self.partner._name, "res_id": self.partner.id},
+        )
+        for __ in range(2):
+            record_conf = self.backend._get_component_conf_for_record(record, "send")
+            env_ctx = self.backend._get_component_env_ctx(record_conf, "send")
+            self.assertEqual(env_ctx, {"foo": 1, "edi_framework_action": "send"})
+        self.assertEqual(
+            _parse_advanced_settings(settings),
+            {"components": {"send": {"env_ctx": {"foo": 1}}}},
+        )
+        self.assertEqual(record_conf["env_ctx"], {"foo": 1})
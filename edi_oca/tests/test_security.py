@@ -2,6 +2,7 @@
 # @author: Enric Tobella
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import mock
 from odoo_test_helper import FakeModelLoader
 
 from odoo.exceptions import AccessError
@@ -179,14 +180,16 @@ class TestEDIExchangeRecordSecurity(EDIBackendCommonTestCase):
             f"Deleted record {exchange_record.model},{exchange_record.res_id} "
             f"is referenced by edi.exchange.record [{exchange_record.id}]"
         )
+        self.assertEqual(
+            0,
+            self.env["edi.exchange.record"]
+            .with_user(self.user)
+            .search_count([("id", "=", exchange_record.id)]),
+        )
+        # The orphan records are reported by a cron, not by the searches
         with self.assertLogs(logger_name, "WARNING") as watcher:
-            self.assertEqual(
-                0,
-                self.env["edi.exchange.record"]
-                .with_user(self.user)
-                .search_count([("id", "=", exchange_record.id)]),
-            )
-            self.assertEqual(watcher.output, [expected_msg])
+            self.env["edi.exchange.record"]._cron_log_orphan_records()
+            self.assertIn(expected_msg, watcher.output)
 
     def test_search_no_record_admin(self):
         # Consumer record no longer exists:
@@ -223,3 +226,44 @@ class TestEDIExchangeRecordSecurity(EDIBackendCommonTestCase):
         msg = rf"not allowed to modify '{model._description}' \({model._name}\)"
         with self.assertRaisesRegex(AccessError, msg):
             exchange_record.with_user(self.user).write({"external_identifier": "1234"})
+
+    def test_search_paging(self):
+        self.user.write({"groups_id": [(4, self.group.id)]})
+        hidden_consumer = self.env["edi.exchange.consumer.test"].create(
+            {"name": "no_rule"}
+        )
+        visible = self.create_record() | self.create_record()
+        hidden = self.backend.create_record(
+            "test_csv_output",
+            {"model": hidden_consumer._name, "res_id": hidden_consumer.id},
+        )
+        no_model = self.backend.create_record("test_csv_output", {})
+        all_records = visible | hidden | no_model
+        domain = [("id", "in", all_records.ids)]
+        model = self.env["edi.exchange.record"].with_user(self.user)
+        self.assertEqual(model.search_count(domain), 3)
+        expected = model.search(domain, order="id")
+        self.assertEqual(expected.ids, (visible | no_model).sorted("id").ids)
+        # Pages are filled even if hidden records are in the middle
+        paged = model.browse()
+        for offset in range(3):
+            paged |= model.search(domain, order="id", offset=offset, limit=1)
+        self.assertEqual(paged.ids, expected.ids)
+
+    def test_access_check_memo(self):
+        self.user.write({"groups_id": [(4, self.group.id)]})
+        exchange_record = self.create_record().with_user(self.user)
+        consumer_cls = type(self.consumer_record)
+        with mock.patch.object(
+            consumer_cls,
+            "check_access_rule",
+            autospec=True,
+            side_effect=consumer_cls.check_access_rule,
+        ) as mocked:
+            with exchange_record._access_check_memo():
+                exchange_record.write({"external_identifier": "1"})
+                exchange_record.write({"external_identifier": "2"})
+            self.assertEqual(mocked.call_count, 1)
+            # Memo is gone after the block
+            exchange_record.write({"external_identifier": "3"})
+            self.assertEqual(mocked.call_count, 2)
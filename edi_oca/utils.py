@@ -24,3 +24,51 @@ def exchange_record_job_identity_exact(job_):
         str(sorted(job_.recordset.mapped("exchange_filechecksum"))).encode("utf-8")
     )
     return hasher.hexdigest()
+
+
+class ComponentClassCache(object):
+    """Cache component classes resolved by `edi.backend._find_component`.
+
+    The cache is attached to a components registry,
+    hence it's dropped as soon as the registry is rebuilt
+    (eg: on module install or upgrade).
+    """
+
+    _registry_attr = "_edi_component_class_cache"
+
+    def __init__(self):
+        self._classes = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_registry(cls, components_registry):
+        cache = getattr(components_registry, cls._registry_attr, None)
+        if cache is None:
+            cache = cls()
+            setattr(components_registry, cls._registry_attr, cache)
+        return cache
+
+    def __getitem__(self, key):
+        try:
+            value = self._classes[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        self._classes[key] = value
+
+    def clear(self):
+        self._classes.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._classes),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
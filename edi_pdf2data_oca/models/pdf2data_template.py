@@ -9,6 +9,7 @@ import shutil
 import subprocess
 import unicodedata
 from collections import OrderedDict
+from functools import lru_cache
 from tempfile import NamedTemporaryFile
 
 import dateparser
@@ -18,6 +19,17 @@ from odoo import api, fields, models
 
 _logger = logging.getLogger(__name__)
 
+# A keyword without these characters can be searched as a plain string
+REGEX_SPECIAL_CHARS = frozenset("()[]{}?*+|^$\\.")
+
+
+@lru_cache(maxsize=2048)
+def compile_pattern(pattern):
+    """Compile the patterns of the templates once per worker.
+    The cache is keyed on the pattern itself, so a modified keyword
+    is compiled again."""
+    return re.compile(pattern)
+
 
 class Pdf2dataTemplate(models.Model):
     _name = "pdf2data.template"
@@ -81,13 +93,37 @@ class Pdf2dataTemplate(models.Model):
         return extracted_str
 
     def _parse_pdf(self, data):
+        """Return the first template of self matching the PDF.
+
+        Templates with the same input options share the same optimized
+        text, and the plain string keywords are searched once per text.
+        """
         extracted_str = self._extract_pdf(data)
+        optimized_strs = {}
+        found_keywords = {}
         for template in self:
-            optimized_str = template._prepare_input(extracted_str)
+            input_key = template._get_prepare_input_key()
+            if input_key not in optimized_strs:
+                optimized_strs[input_key] = template._prepare_input(extracted_str)
+                found_keywords[input_key] = {}
+            optimized_str = optimized_strs[input_key]
+            if not template._may_match_input(optimized_str, found_keywords[input_key]):
+                _logger.debug("Template: %s. Missing plain keyword.", template.name)
+                continue
             if template._matches_input(optimized_str):
                 return optimized_str, template._extract_data(optimized_str), template
         return False, False, False
 
+    def _get_prepare_input_key(self):
+        """Options of _prepare_input(): templates with the same key
+        give the same optimized text"""
+        return (
+            self.remove_whitespace,
+            self.remove_accents,
+            self.lowercase,
+            tuple((replace.from_char, replace.to_char) for replace in self.replace_ids),
+        )
+
     def _prepare_input(self, extracted_str):
         """
         Input raw string and do transformations, as set in template file.
@@ -113,10 +149,28 @@ class Pdf2dataTemplate(models.Model):
 
         # specific replace
         for replace in self.replace_ids:
-            optimized_str = re.sub(replace.from_char, replace.to_char, optimized_str)
+            optimized_str = compile_pattern(replace.from_char).sub(
+                replace.to_char, optimized_str
+            )
 
         return optimized_str
 
+    def _may_match_input(self, optimized_str, found_keywords):
+        """Cheap check before _matches_input(): all the keywords that are
+        plain strings must be in the text.
+
+        :param found_keywords: cache {keyword: found} for optimized_str
+        """
+        for keyword in self.keyword_ids:
+            pattern = keyword.keyword
+            if REGEX_SPECIAL_CHARS.intersection(pattern):
+                continue
+            if pattern not in found_keywords:
+                found_keywords[pattern] = pattern in optimized_str
+            if not found_keywords[pattern]:
+                return False
+        return True
+
     def _matches_input(self, optimized_str):
         """See if string matches all keyword patterns and no exclude_keyword
         patterns set in template file.
@@ -130,16 +184,15 @@ class Pdf2dataTemplate(models.Model):
             - False if either not all keywords are found or at least one
                 exclude_keyword is found."""
         if all(
-            [re.search(keyword.keyword, optimized_str) for keyword in self.keyword_ids]
+            compile_pattern(keyword.keyword).search(optimized_str)
+            for keyword in self.keyword_ids
         ):
             # All keyword patterns matched
             exclude_keywords = self.exclude_keyword_ids
             if exclude_keywords:
                 if any(
-                    [
-                        re.search(exclude_keyword.keyword, optimized_str)
-                        for exclude_keyword in exclude_keywords
-                    ]
+                    compile_pattern(exclude_keyword.keyword).search(optimized_str)
+                    for exclude_keyword in exclude_keywords
                 ):
                     # At least one exclude_keyword matches
                     _logger.debug(
@@ -352,7 +405,7 @@ class Pdf2dataTemplateField(models.Model):
         regexes = self.value.split("\n")
         result = []
         for regex in regexes:
-            matches = re.findall(regex, content)
+            matches = compile_pattern(regex).findall(content)
             if matches:
                 for match in matches:
                     if isinstance(match, tuple):
@@ -84,3 +84,20 @@ class Pdf2DataTestCase(common.EDIBackendCommonComponentRegistryTestCase):
         self.assertFalse(template.file_result)
         template.check_pdf()
         self.assertTrue(template.file_result)
+
+    def test_parse_pdf_template_order(self):
+        template_google = self.import_template("com.amazon.aws-include.yml")
+        template = self.import_template()
+        templates = template_google | template
+        self.assertEqual(
+            template_google._get_prepare_input_key(),
+            template._get_prepare_input_key(),
+        )
+        found_keywords = {}
+        self.assertFalse(template_google._may_match_input("Amazon", found_keywords))
+        self.assertEqual(found_keywords, {"Google": False})
+        _text, data, matched_template = templates._parse_pdf(
+            base64.b64encode(self.file)
+        )
+        self.assertEqual(matched_template, template)
+        self.assertTrue(data)
@@ -84,6 +84,11 @@ class EDIBackend(models.Model):
             1 if getattr(component_class, "_storage_backend_type", False) else 0,
         ) + res
 
+    def _component_cache_key(self, model, usage_candidates, **kw):
+        # Sort key depends on the storage
+        res = super()._component_cache_key(model, usage_candidates, **kw)
+        return res + (("storage", bool(self.storage_id)),)
+
     def _storage_cron_check_pending_input(self, **kw):
         for backend in self:
             backend._storage_check_pending_input(**kw)
@@ -3,7 +3,7 @@
 {
     "name": "Voxel",
     "summary": "Base module for connecting with Voxel",
-    "version": "14.0.1.0.0",
+    "version": "14.0.1.1.0",
     "category": "Hidden",
     "author": "Tecnativa, Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/edi",
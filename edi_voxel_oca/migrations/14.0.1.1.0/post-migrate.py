@@ -0,0 +1,29 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+FOLDER_BY_CHANNEL = {
+    "root.voxel_import": "Inbox",
+    "root.voxel_status": "Error",
+}
+
+
+def migrate(cr, version):
+    """Set the identity key on the Voxel jobs created before it was used
+    to detect the files already being processed."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    jobs = env["queue.job"].search(
+        [
+            ("channel", "in", list(FOLDER_BY_CHANNEL)),
+            ("identity_key", "=", False),
+        ]
+    )
+    for job in jobs:
+        if len(job.args) != 2 or job.model_name not in env:
+            continue
+        filename, company = job.args
+        job.identity_key = env[job.model_name]._voxel_job_identity_key(
+            FOLDER_BY_CHANNEL[job.channel], company, filename
+        )
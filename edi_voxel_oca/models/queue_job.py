@@ -2,12 +2,15 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 
-from odoo import models
+from odoo import fields, models
 
 
 class QueueJob(models.Model):
     _inherit = "queue.job"
 
+    # Voxel looks up the existing jobs of each file by their identity key
+    identity_key = fields.Char(index=True)
+
     def voxel_do_now(self):
         self.sudo().write({"eta": False})
 
@@ -1,8 +1,29 @@
 # Copyright 2019 Tecnativa - Ernesto Tejeda
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from odoo import fields, models
 
+_logger = logging.getLogger(__name__)
+
+# Connect and read timeouts of the requests to Voxel, in seconds
+VOXEL_TIMEOUT = (10, 60)
+VOXEL_MAX_RETRIES = 3
+VOXEL_RETRY_BACKOFF = 0.5
+
+# HTTP sessions and request metrics per database and login, shared by the
+# threads of the Odoo process
+_SESSIONS = {}
+_METRICS = {}
+_SESSIONS_LOCK = threading.Lock()
+
 
 class VoxelLogin(models.Model):
     _name = "voxel.login"
@@ -13,3 +34,115 @@ class VoxelLogin(models.Model):
     user = fields.Char(string="User", required=True)
     password = fields.Char(string="Password", required=True)
     company_id = fields.Many2one(comodel_name="res.company", string="Company")
+    request_count = fields.Integer(
+        compute="_compute_request_metrics",
+        help="Number of requests sent to Voxel with this login "
+        "by this Odoo process since its start.",
+    )
+    request_error_count = fields.Integer(
+        compute="_compute_request_metrics",
+        string="Request errors",
+        help="Number of requests to Voxel with this login that failed, "
+        "among the requests sent by this Odoo process since its start.",
+    )
+    request_avg_time = fields.Float(
+        compute="_compute_request_metrics",
+        string="Average request time (ms)",
+        digits=(16, 1),
+    )
+    request_max_time = fields.Float(
+        compute="_compute_request_metrics",
+        string="Maximum request time (ms)",
+        digits=(16, 1),
+    )
+
+    def _compute_request_metrics(self):
+        for login in self:
+            with _SESSIONS_LOCK:
+                metrics = dict(_METRICS.get(login._voxel_session_key(), {}))
+            count = metrics.get("count", 0)
+            login.request_count = count
+            login.request_error_count = metrics.get("error_count", 0)
+            login.request_avg_time = (
+                count and metrics["total_time"] * 1000 / count or 0.0
+            )
+            login.request_max_time = metrics.get("max_time", 0.0) * 1000
+
+    def _voxel_session_key(self):
+        return (self.env.cr.dbname, self.id)
+
+    def _new_voxel_session(self):
+        """HTTP session keeping the connections to Voxel alive, and retrying
+        the requests on connection errors and server errors."""
+        retry = Retry(
+            total=VOXEL_MAX_RETRIES,
+            backoff_factor=VOXEL_RETRY_BACKOFF,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(max_retries=retry))
+        session.mount("https://", HTTPAdapter(max_retries=retry))
+        return session
+
+    def _get_voxel_session(self):
+        self.ensure_one()
+        key = self._voxel_session_key()
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(key)
+            if session is None:
+                session = _SESSIONS[key] = self._new_voxel_session()
+        return session
+
+    def _record_voxel_request(self, duration, error):
+        key = self._voxel_session_key()
+        with _SESSIONS_LOCK:
+            metrics = _METRICS.setdefault(
+                key, {"count": 0, "error_count": 0, "total_time": 0.0, "max_time": 0.0}
+            )
+            metrics["count"] += 1
+            metrics["error_count"] += error and 1 or 0
+            metrics["total_time"] += duration
+            metrics["max_time"] = max(metrics["max_time"], duration)
+
+    def voxel_request(self, method, url, data=None):
+        """Send a request to Voxel with the pooled session of the login.
+
+        :param method: HTTP method, such as "GET", "PUT" or "DELETE"
+        :return: the response, after the retries
+        """
+        self.ensure_one()
+        session = self._get_voxel_session()
+        start = time.perf_counter()
+        error = True
+        try:
+            response = session.request(
+                method,
+                url,
+                auth=(self.user, self.password),
+                data=data,
+                timeout=VOXEL_TIMEOUT,
+            )
+            error = response.status_code != 200
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            self._record_voxel_request(duration, error)
+            _logger.debug("Voxel %s %s done in %.3fs", method, url, duration)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"url", "user", "password"} & set(vals):
+            self._close_voxel_sessions()
+        return res
+
+    def unlink(self):
+        self._close_voxel_sessions()
+        return super().unlink()
+
+    def _close_voxel_sessions(self):
+        with _SESSIONS_LOCK:
+            for login in self:
+                session = _SESSIONS.pop(login._voxel_session_key(), None)
+                if session:
+                    session.close()
@@ -9,11 +9,18 @@ import requests
 from lxml import etree
 
 from odoo import _, api, exceptions, fields, models
-from odoo.modules.registry import Registry
+from odoo.tools import split_every
 
 _logger = logging.getLogger(__name__)
 
+# Default number of documents sent to Voxel by an export job
+VOXEL_SEND_BATCH_SIZE = 50
+# Delay in seconds before sending again the documents of a batch
+# interrupted by a Voxel outage
+VOXEL_OUTAGE_RETRY_DELAY = 600
+
 try:
+    from odoo.addons.queue_job.exception import RetryableJobError
     from odoo.addons.queue_job.job import job
 except ImportError:
     _logger.debug("Can not `import queue_job`.")
@@ -23,6 +30,7 @@ except ImportError:
         return functools.partial
 
     job = empty_decorator_factory
+    RetryableJobError = Exception
 
 
 class VoxelMixin(models.AbstractModel):
@@ -51,8 +59,7 @@ class VoxelMixin(models.AbstractModel):
     # Export methods
     # --------------
     def enqueue_voxel_report(self, report_name):
-        eta = self.company_id._get_voxel_report_eta()
-        queue_obj = self.env["queue.job"].sudo()
+        records_by_company = {}
         for record in self.sudo():
             # Look first if there's a failing job. If so, retry that one
             failing_job = record.voxel_job_ids.filtered(lambda x: x.state == "failed")[
@@ -61,17 +68,117 @@ class VoxelMixin(models.AbstractModel):
             if failing_job:
                 failing_job.voxel_requeue_sudo()
                 continue
-            # If not, create a new one
-            new_delay = (
-                record.with_context(company_id=self.company_id.id)
-                .with_delay(eta=eta)
-                ._get_and_send_voxel_report(report_name)
+            # If not, send it in a new batch of documents of its company
+            records_by_company.setdefault(record.company_id, []).append(record.id)
+        batch_size = self._get_voxel_send_batch_size()
+        for company, record_ids in records_by_company.items():
+            eta = company._get_voxel_report_eta()
+            for batch in split_every(batch_size, record_ids, self.sudo().browse):
+                batch._enqueue_voxel_reports_job(report_name, company, eta)
+
+    def _enqueue_voxel_reports_job(self, report_name, company, eta=None):
+        new_delay = (
+            self.with_context(company_id=company.id)
+            .with_delay(eta=eta)
+            ._send_voxel_reports(report_name)
+        )
+        job = self.env["queue.job"].sudo().search([("uuid", "=", new_delay.uuid)])
+        self.write({"voxel_job_ids": [(4, job.id)]})
+
+    @api.model
+    def _get_voxel_send_batch_size(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("edi_voxel_oca.send_batch_size", VOXEL_SEND_BATCH_SIZE)
+        )
+
+    @job(default_channel="root.voxel_export")
+    def _send_voxel_reports(self, report_name):
+        """Send the reports of the documents to Voxel. A document that can't
+        be sent is set in 'Sending error' without stopping the others.
+
+        When Voxel is not available, the job is retried if no document has
+        been sent yet. Otherwise, the documents not sent yet are sent later
+        in a new job. The job fails when no document could be sent.
+        """
+        sent = failed = self.browse()
+        error = False
+        for record in self:
+            try:
+                with self.env.cr.savepoint():
+                    record._send_voxel_report_document(report_name)
+            except Exception as e:
+                if self._is_voxel_outage(e):
+                    if not sent:
+                        raise RetryableJobError(
+                            _("Voxel is not available: %s") % e,
+                            seconds=VOXEL_OUTAGE_RETRY_DELAY,
+                        ) from e
+                    # The documents already sent can't be sent again
+                    remaining = self - sent - failed
+                    _logger.warning(
+                        "Voxel is not available (%s): %d document(s) will be "
+                        "sent later",
+                        e,
+                        len(remaining),
+                    )
+                    remaining._enqueue_voxel_reports_job(
+                        report_name,
+                        remaining[:1].company_id,
+                        eta=VOXEL_OUTAGE_RETRY_DELAY,
+                    )
+                    break
+                _logger.warning("Error sending %s to Voxel: %s", record.display_name, e)
+                failed |= record
+                error = e
+                continue
+            sent |= record
+        if failed and not sent:
+            # The state must be kept when the job fails
+            failed._write_voxel_sent_errors()
+            raise exceptions.UserError(
+                _("None of the %d document(s) could be sent to Voxel: %s")
+                % (len(failed), error)
             )
-            job = queue_obj.search([("uuid", "=", new_delay.uuid)], limit=1)
-            record.voxel_job_ids |= job
+        failed.write({"voxel_state": "sent_errors"})
+        return _("%d document(s) sent to Voxel, %d failed.") % (
+            len(sent),
+            len(failed),
+        )
+
+    def _write_voxel_sent_errors(self):
+        """Set the documents in 'Sending error' in a new cursor, committed
+        even if the transaction of the job is rolled back"""
+        with self.env.registry.cursor() as new_cr:
+            self.with_env(self.env(cr=new_cr)).write({"voxel_state": "sent_errors"})
+        self.invalidate_cache(["voxel_state"])
+
+    @api.model
+    def _is_voxel_outage(self, error):
+        """Return True if the error means that Voxel can't be reached,
+        rather than an error of the document"""
+        if isinstance(
+            error,
+            (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.RetryError,
+            ),
+        ):
+            return True
+        return (
+            isinstance(error, requests.HTTPError)
+            and error.response is not None
+            and error.response.status_code >= 500
+        )
 
     @job(default_channel="root.voxel_export")
     def _get_and_send_voxel_report(self, report_name):
+        self.ensure_one()
+        return self._send_voxel_reports(report_name)
+
+    def _send_voxel_report_document(self, report_name):
         self.ensure_one()
         report = self.env.ref(report_name)
         report_xml = report.render_qweb_xml(self.ids, {})[0]
@@ -91,45 +198,56 @@ class VoxelMixin(models.AbstractModel):
     # export error detection methods
     # ------------------------------
     def _cron_update_voxel_export_status(self):
+        # Companies sharing the same Voxel login read the same folders:
+        # list each folder only once for all of them
+        listings = {}
         for company in self.env["res.company"].search([]):
             if company.voxel_enabled and self.get_voxel_login(company):
-                self._update_voxel_export_status(company)
+                self._update_voxel_export_status(company, listings=listings)
 
-    def _update_voxel_export_status(self, company):
+    def _update_voxel_export_status(self, company, listings=None):
         sent_docs = self.search([("voxel_state", "=", "sent")])
         if not sent_docs:
             return
         queue_obj = self.env["queue.job"].sudo()
         # Determine processed documents
-        filenames = self._list_voxel_document_filenames("Outbox", company)
+        filenames = self._list_voxel_document_filenames(
+            "Outbox", company, listings=listings
+        )
         processed = sent_docs.filtered(lambda r: r.voxel_filename not in filenames)
         # Determine documents with errors
-        filenames = self._list_voxel_document_filenames("Error", company)
+        filenames = self._list_voxel_document_filenames(
+            "Error", company, listings=listings
+        )
         with_errors = processed.filtered(lambda r: r.voxel_filename in filenames)
         doc_dict = {}
         for doc in with_errors:
             if doc.voxel_filename:
                 doc_dict[doc.voxel_filename] = doc
-        for filename in filenames:
-            if filename.endswith(".log"):
-                xml_file_name = filename[:-4] + ".xml"
-                if xml_file_name in doc_dict:
-                    document = doc_dict[xml_file_name]
-                    # Look first if there's a job for the current filename.
-                    # If not, create it
-                    file_job = queue_obj.search(
-                        [("channel", "=", "root.voxel_status")]
-                    ).filtered(lambda r: r.args == [filename, company])[:1]
-                    if not file_job:
-                        error_msg = (
-                            document.with_context(company_id=company.id)
-                            .with_delay()
-                            ._update_error_status(company, filename)
-                        )
-                        # search queue job to add it to voxel job list
-                        document.voxel_job_ids |= queue_obj.search(
-                            [("uuid", "=", error_msg.uuid)], limit=1
-                        )
+        log_filenames = [
+            filename
+            for filename in filenames
+            if filename.endswith(".log") and filename[:-4] + ".xml" in doc_dict
+        ]
+        # Look first if there's a job for the current filename.
+        # If not, create it
+        existing_keys = self._get_voxel_existing_job_keys(
+            "Error", company, log_filenames
+        )
+        for filename in log_filenames:
+            identity_key = self._voxel_job_identity_key("Error", company, filename)
+            if identity_key in existing_keys:
+                continue
+            document = doc_dict[filename[:-4] + ".xml"]
+            error_msg = (
+                document.with_context(company_id=company.id)
+                .with_delay(identity_key=identity_key)
+                ._update_error_status(company, filename)
+            )
+            # search queue job to add it to voxel job list
+            document.voxel_job_ids |= queue_obj.search(
+                [("uuid", "=", error_msg.uuid)], limit=1
+            )
         # Update state of accepted documents
         (processed - with_errors).write({"voxel_state": "accepted"})
 
@@ -152,21 +270,26 @@ class VoxelMixin(models.AbstractModel):
 
     # Import methods
     # --------------
-    def enqueue_import_voxel_documents(self, company):
-        queue_job_obj = self.env["queue.job"]
+    def enqueue_import_voxel_documents(self, company, listings=None):
         # list document names
-        voxel_filenames = self._list_voxel_document_filenames("Inbox", company)
+        voxel_filenames = self._list_voxel_document_filenames(
+            "Inbox", company, listings=listings
+        )
+        # Look first if there's a job for the current filename.
+        # If not, create it
+        existing_keys = self._get_voxel_existing_job_keys(
+            "Inbox", company, voxel_filenames
+        )
         # iterate the list to import documents one by one
         for voxel_filename in voxel_filenames:
-            # Look first if there's a job for the current filename.
-            # If not, create it
-            file_job = queue_job_obj.search(
-                [("channel", "=", "root.voxel_import")]
-            ).filtered(lambda r: r.args == [voxel_filename, company])[:1]
-            if not file_job:
-                self.with_context(
-                    company_id=company.id
-                ).with_delay()._import_voxel_document(voxel_filename, company)
+            identity_key = self._voxel_job_identity_key(
+                "Inbox", company, voxel_filename
+            )
+            if identity_key in existing_keys:
+                continue
+            self.with_context(company_id=company.id).with_delay(
+                identity_key=identity_key
+            )._import_voxel_document(voxel_filename, company)
 
     @job(default_channel="root.voxel_import")
     def _import_voxel_document(self, voxel_filename, company):
@@ -192,12 +315,13 @@ class VoxelMixin(models.AbstractModel):
         login = self.get_voxel_login(company)
         if not login:
             raise Exception
+        # Also accept the functions of requests, such as `requests.get`
+        if callable(request_method):
+            request_method = request_method.__name__.upper()
         url = urljoin(login.url, folder)
         url += url.endswith("/") and "" or "/"
-        response = request_method(
-            url=urljoin(url, voxel_filename),
-            auth=(login.user, login.password),
-            data=data,
+        response = login.voxel_request(
+            request_method, urljoin(url, voxel_filename), data=data
         )
         _logger.debug("Voxel request response: %s", str(response))
         if response.status_code != 200:
@@ -205,22 +329,23 @@ class VoxelMixin(models.AbstractModel):
         return response
 
     def _send_voxel_report(self, folder, file_name, file_data):
+        self._request_to_voxel("PUT", folder, voxel_filename=file_name, data=file_data)
+
+    def _list_voxel_document_filenames(self, folder, company, listings=None):
+        """Return the file names of the given Voxel folder.
+
+        When a ``listings`` dict is given, the result is kept in it per
+        login and folder, so the folder is requested only once for all
+        the companies sharing the same login.
+        """
+        if listings is not None:
+            login = self.get_voxel_login(company)
+            key = (login.url, login.user, folder)
+            if key not in listings:
+                listings[key] = self._list_voxel_document_filenames(folder, company)
+            return listings[key]
         try:
-            self._request_to_voxel(
-                requests.put, folder, voxel_filename=file_name, data=file_data
-            )
-        except Exception:
-            new_cr = Registry(self.env.cr.dbname).cursor()
-            env = api.Environment(new_cr, self.env.uid, self.env.context)
-            record = env[self._name].browse(self.id)
-            record.voxel_state = "sent_errors"
-            new_cr.commit()
-            new_cr.close()
-            raise
-
-    def _list_voxel_document_filenames(self, folder, company):
-        try:
-            response = self._request_to_voxel(requests.get, folder, company)
+            response = self._request_to_voxel("GET", folder, company)
         except Exception:
             raise Exception("Error reading '{}' folder from Voxel".format(folder))
         # if no error, return list of documents file names
@@ -229,7 +354,7 @@ class VoxelMixin(models.AbstractModel):
 
     def _read_voxel_document(self, folder, company, filename, encoding="utf-8"):
         try:
-            response = self._request_to_voxel(requests.get, folder, company, filename)
+            response = self._request_to_voxel("GET", folder, company, filename)
         except Exception:
             raise Exception(
                 "Error reading document {} from folder {}".format(filename, folder)
@@ -240,7 +365,7 @@ class VoxelMixin(models.AbstractModel):
 
     def _delete_voxel_document(self, folder, voxel_filename, company):
         try:
-            self._request_to_voxel(requests.delete, folder, company, voxel_filename)
+            self._request_to_voxel("DELETE", folder, company, voxel_filename)
         except Exception:
             raise Exception(
                 "Error deleting document {} from folder {}".format(
@@ -256,6 +381,28 @@ class VoxelMixin(models.AbstractModel):
         date_time_seq = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
         return "{}_{}.xml".format(document_type, date_time_seq)
 
+    @api.model
+    def _voxel_job_identity_key(self, folder, company, filename):
+        """Identity key of the job processing a file of a Voxel folder."""
+        return "voxel:{}:{}:{}".format(company.id, folder, filename)
+
+    @api.model
+    def _get_voxel_existing_job_keys(self, folder, company, filenames):
+        """Return the identity keys of the jobs, whatever their state,
+        already created for the given files of a Voxel folder."""
+        identity_keys = [
+            self._voxel_job_identity_key(folder, company, filename)
+            for filename in filenames
+        ]
+        if not identity_keys:
+            return set()
+        jobs = (
+            self.env["queue.job"]
+            .sudo()
+            .search_read([("identity_key", "in", identity_keys)], ["identity_key"])
+        )
+        return {rec["identity_key"] for rec in jobs}
+
     def _cancel_voxel_jobs(self):
         # Remove not started jobs
         not_started_jobs = self.env["queue.job"]
@@ -0,0 +1,23 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import exceptions, fields, models
+
+
+class VoxelDocumentTest(models.Model):
+    _name = "voxel.document.test"
+    _inherit = ["voxel.mixin"]
+    _description = "Model used only for test"
+
+    name = fields.Char()
+    company_id = fields.Many2one(
+        comodel_name="res.company", default=lambda self: self.env.company
+    )
+    voxel_job_ids = fields.Many2many(comodel_name="queue.job")
+
+    def _send_voxel_report_document(self, report_name):
+        self.ensure_one()
+        if not self.name:
+            raise exceptions.UserError("The document has no name")
+        file_name = "%s.xml" % self.name
+        self._send_voxel_report("Outbox", file_name, b"<doc/>")
+        self.write({"voxel_state": "sent", "voxel_filename": file_name})
@@ -0,0 +1,145 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from odoo.tests.common import SavepointCase
+
+
+class VoxelStubHandler(BaseHTTPRequestHandler):
+    # Keep the connections alive, as Voxel does
+    protocol_version = "HTTP/1.1"
+    files = {}
+    client_ports = set()
+    failures = {}
+
+    def _reply(self, status, data=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        self.client_ports.add(self.client_address[1])
+        if self.failures.get(self.path):
+            self.failures[self.path] -= 1
+            return self._reply(503)
+        return None
+
+    def do_GET(self):
+        if self._handle() is not None:
+            return
+        if self.path.endswith("/"):
+            folder = self.path
+            names = [
+                name[len(folder) :] for name in self.files if name.startswith(folder)
+            ]
+            return self._reply(200, "\n".join(sorted(names)).encode())
+        if self.path not in self.files:
+            return self._reply(404)
+        return self._reply(200, self.files[self.path])
+
+    def do_PUT(self):
+        if self._handle() is not None:
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        self.files[self.path] = self.rfile.read(length)
+        return self._reply(200)
+
+    def do_DELETE(self):
+        if self._handle() is not None:
+            return
+        self.files.pop(self.path, None)
+        return self._reply(200)
+
+    def log_message(self, format, *args):
+        return
+
+
+class VoxelStubCase(SavepointCase):
+    """Send the requests to Voxel to a stub server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), VoxelStubHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.start()
+        cls.login = cls.env["voxel.login"].create(
+            {
+                "name": "Voxel stub",
+                "url": "http://127.0.0.1:%d/" % cls.server.server_port,
+                "user": "user",
+                "password": "password",
+            }
+        )
+        cls.mixin = cls.env["voxel.mixin"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.login._close_voxel_sessions()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        VoxelStubHandler.files.clear()
+        VoxelStubHandler.client_ports.clear()
+        VoxelStubHandler.failures.clear()
+        patcher = mock.patch.object(
+            type(self.mixin), "get_voxel_login", return_value=self.login
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestVoxelRequest(VoxelStubCase):
+    def test_pooled_requests(self):
+        self.mixin._send_voxel_report("Outbox", "doc_1.xml", b"<doc/>")
+        self.mixin._send_voxel_report("Outbox", "doc_2.xml", b"<doc/>")
+        self.assertEqual(
+            self.mixin._list_voxel_document_filenames("Outbox", False),
+            ["doc_1.xml", "doc_2.xml"],
+        )
+        self.assertEqual(
+            self.mixin._read_voxel_document("Outbox", False, "doc_1.xml"), "<doc/>"
+        )
+        self.mixin._delete_voxel_document("Outbox", "doc_1.xml", False)
+        self.assertEqual(list(VoxelStubHandler.files), ["/Outbox/doc_2.xml"])
+        # All the requests used the same connection
+        self.assertEqual(len(VoxelStubHandler.client_ports), 1)
+        self.login.invalidate_cache()
+        self.assertGreaterEqual(self.login.request_count, 5)
+        self.assertGreater(self.login.request_avg_time, 0.0)
+
+    def test_retry_server_error(self):
+        VoxelStubHandler.files["/Inbox/order.xml"] = b"<order/>"
+        VoxelStubHandler.failures["/Inbox/"] = 2
+        self.login.invalidate_cache()
+        error_count = self.login.request_error_count
+        self.assertEqual(
+            self.mixin._list_voxel_document_filenames("Inbox", False), ["order.xml"]
+        )
+        self.assertFalse(VoxelStubHandler.failures["/Inbox/"])
+        self.login.invalidate_cache()
+        self.assertEqual(self.login.request_error_count, error_count)
+
+    def test_listing_shared_by_login(self):
+        VoxelStubHandler.files["/Inbox/order.xml"] = b"<order/>"
+        listings = {}
+        for _i in range(3):
+            self.assertEqual(
+                self.mixin._list_voxel_document_filenames(
+                    "Inbox", False, listings=listings
+                ),
+                ["order.xml"],
+            )
+        self.assertEqual(len(listings), 1)
+
+    def test_request_error(self):
+        with self.assertRaises(Exception):
+            self.mixin._read_voxel_document("Inbox", False, "missing.xml")
+        self.login.invalidate_cache()
+        self.assertTrue(self.login.request_error_count)
@@ -0,0 +1,91 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo_test_helper import FakeModelLoader
+
+from odoo import exceptions
+
+from odoo.addons.queue_job.exception import RetryableJobError
+
+from .test_voxel_request import VoxelStubCase, VoxelStubHandler
+
+
+class TestVoxelSend(VoxelStubCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.loader = FakeModelLoader(cls.env, cls.__module__)
+        cls.loader.backup_registry()
+        from .fake_models import VoxelDocumentTest
+
+        cls.loader.update_registry((VoxelDocumentTest,))
+        cls.document_model = cls.env["voxel.document.test"]
+        cls.company = cls.env.company
+        cls.company_2 = cls.env["res.company"].create({"name": "Voxel company 2"})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loader.restore_registry()
+        super().tearDownClass()
+
+    def _create_documents(self, names, company=None):
+        company = company or self.company
+        return self.document_model.create(
+            [{"name": name, "company_id": company.id} for name in names]
+        )
+
+    def test_send_reports(self):
+        documents = self._create_documents(["doc_1", "doc_2"])
+        documents._send_voxel_reports("report_name")
+        self.assertEqual(set(documents.mapped("voxel_state")), {"sent"})
+        self.assertEqual(
+            sorted(VoxelStubHandler.files), ["/Outbox/doc_1.xml", "/Outbox/doc_2.xml"]
+        )
+
+    def test_send_reports_document_error(self):
+        documents = self._create_documents(["doc_1", False])
+        documents._send_voxel_reports("report_name")
+        self.assertEqual(documents[0].voxel_state, "sent")
+        self.assertEqual(documents[1].voxel_state, "sent_errors")
+
+    def test_send_reports_all_failed(self):
+        documents = self._create_documents([False, False])
+        # The state is written with a new cursor, sharing the test transaction
+        self.registry.enter_test_mode(self.env.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        with self.assertRaises(exceptions.UserError):
+            documents._send_voxel_reports("report_name")
+        self.assertEqual(set(documents.mapped("voxel_state")), {"sent_errors"})
+
+    def test_send_reports_outage(self):
+        documents = self._create_documents(["doc_1", "doc_2"])
+        VoxelStubHandler.failures["/Outbox/doc_1.xml"] = 10
+        with self.assertRaises(RetryableJobError):
+            documents._send_voxel_reports("report_name")
+        self.assertFalse(VoxelStubHandler.files)
+
+    def test_send_reports_outage_after_sent(self):
+        documents = self._create_documents(["doc_1", "doc_2", "doc_3"])
+        VoxelStubHandler.failures["/Outbox/doc_2.xml"] = 10
+        documents._send_voxel_reports("report_name")
+        self.assertEqual(documents[0].voxel_state, "sent")
+        self.assertFalse(documents[0].voxel_job_ids)
+        # The documents not sent yet are sent later in a new job
+        remaining = documents[1:]
+        self.assertEqual(set(remaining.mapped("voxel_state")), {"not_sent"})
+        job = remaining.mapped("voxel_job_ids")
+        self.assertEqual(len(job), 1)
+        self.assertEqual(job.method_name, "_send_voxel_reports")
+        self.assertEqual(job.record_ids, remaining.ids)
+
+    def test_enqueue_batches_per_company(self):
+        self.env["ir.config_parameter"].sudo().set_param(
+            "edi_voxel_oca.send_batch_size", 2
+        )
+        documents = self._create_documents(["doc_1", "doc_2", "doc_3"])
+        documents_2 = self._create_documents(["doc_4"], self.company_2)
+        (documents | documents_2).enqueue_voxel_report("report_name")
+        jobs = (documents | documents_2).mapped("voxel_job_ids")
+        self.assertEqual(len(jobs), 3)
+        self.assertEqual(documents[:2].voxel_job_ids.record_ids, documents[:2].ids)
+        self.assertEqual(documents[2].voxel_job_ids.record_ids, documents[2].ids)
+        self.assertEqual(documents_2.voxel_job_ids.record_ids, documents_2.ids)
@@ -32,3 +32,8 @@ class EdiBackend(models.Model):
         return (
             1 if getattr(component_class, "_webservice_protocol", False) else 0,
         ) + res
+
+    def _component_cache_key(self, model, usage_candidates, **kw):
+        # Sort key depends on the webservice backend
+        res = super()._component_cache_key(model, usage_candidates, **kw)
+        return res + (("webservice", bool(self.webservice_backend_id)),)
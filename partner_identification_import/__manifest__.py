@@ -3,7 +3,7 @@
 
 {
     "name": "Partner Identification Import",
-    "version": "14.0.1.0.1",
+    "version": "14.0.1.1.0",
     "category": "Tools",
     "license": "AGPL-3",
     "summary": "Provides partner matching on extra ID",
@@ -1 +1,2 @@
 from . import business_document_import
+from . import res_partner_id_number
@@ -3,35 +3,113 @@
 
 from odoo import _, api, models
 
+# Kind of the matched ID numbers in the match cache
+ID_NUMBER_CACHE_KIND = "partner_id_number"
+
 
 class BusinessDocumentImport(models.AbstractModel):
     _inherit = "business.document.import"
 
+    @api.model
+    def _get_partner_identifiers(self, partner_dict):
+        """Return the normalized (schemeID, value) of the ID numbers
+        of the partner_dict which have a schemeID"""
+        return [
+            (ident["schemeID"].strip(), (ident.get("value") or "").strip())
+            for ident in partner_dict.get("id_number", [])
+            if ident.get("schemeID")
+        ]
+
+    @api.model
+    def _match_partner_id_numbers(self, identifiers):
+        """Match the partner ID numbers of many (schemeID, value) at once.
+
+        Within a match cache block, the results are kept in the match cache,
+        per user and allowed companies, since the record rules apply to the
+        search.
+
+        :return: dict {(schemeID, value): ID number}. The ID number is None
+            if no ID Number Category has this code, and an empty recordset
+            if no open ID number has this value.
+        """
+        id_number_obj = self.env["res.partner.id_number"]
+        cache = self._get_match_cache()
+        prefix = (self.env.uid, tuple(self.env.companies.ids))
+        id_number_ids = {}
+        if cache is not None:
+            for ident in identifiers:
+                if (ID_NUMBER_CACHE_KIND, prefix + ident) in cache:
+                    id_number_ids[ident] = cache.get(
+                        ID_NUMBER_CACHE_KIND, prefix + ident, None
+                    )
+            # The ID numbers found may have been removed since, by the
+            # rollback of a savepoint for instance
+            existing_ids = set(
+                id_number_obj.browse([i for i in id_number_ids.values() if i])
+                .exists()
+                .ids
+            )
+            id_number_ids = {
+                ident: id_number_id
+                for ident, id_number_id in id_number_ids.items()
+                if not id_number_id or id_number_id in existing_ids
+            }
+        missing = set(identifiers) - set(id_number_ids)
+        if missing:
+            categs = self.env["res.partner.id_category"].search(
+                [("code", "in", list({scheme for scheme, _value in missing}))]
+            )
+            id_numbers = id_number_obj.search(
+                [
+                    ("category_id", "in", categs.ids),
+                    ("name", "in", list({value for _scheme, value in missing})),
+                    ("status", "!=", "close"),
+                ]
+            )
+            found = {}
+            for id_number in id_numbers:
+                found.setdefault(
+                    (id_number.category_id.code, id_number.name), id_number
+                )
+            codes = set(categs.mapped("code"))
+            for ident in missing:
+                id_number_ids[ident] = (
+                    found.get(ident, id_number_obj).id if ident[0] in codes else None
+                )
+                if cache is not None:
+                    cache.set(
+                        ID_NUMBER_CACHE_KIND, prefix + ident, id_number_ids[ident]
+                    )
+        res = {}
+        for ident in identifiers:
+            id_number_id = id_number_ids[ident]
+            res[ident] = (
+                None if id_number_id is None else id_number_obj.browse(id_number_id)
+            )
+        return res
+
+    @api.model
+    def _prefetch_match_partners(self, partner_dicts):
+        identifiers = set()
+        for partner_dict in partner_dicts:
+            identifiers.update(self._get_partner_identifiers(partner_dict))
+        if identifiers:
+            self._match_partner_id_numbers(identifiers)
+        return super()._prefetch_match_partners(partner_dicts)
+
     @api.model
     def _hook_match_partner(self, partner_dict, chatter_msg, domain, order):
         # Loop on all the partner_dict["id_number"] and search for a partner
         # having one.  If the schemeID matches an existing Id Number Category,
         # then a match is required.
-        schemeIDs = [
-            e["schemeID"] for e in partner_dict.get("id_number", []) if e["schemeID"]
-        ]
-        if schemeIDs:
-            schemes = self.env["res.partner.id_category"].search(
-                [("code", "in", schemeIDs)]
-            )
+        identifiers = self._get_partner_identifiers(partner_dict)
+        if identifiers:
+            id_numbers = self._match_partner_id_numbers(identifiers)
             unmatched = []
-            for ident in partner_dict.get("id_number", []):
-                if ident.get("schemeID") not in schemes.mapped("code"):
+            for ident in identifiers:
+                id_number = id_numbers[ident]
+                if id_number is None:
                     continue
-                categ = schemes.filtered(lambda s: s.code == ident["schemeID"])
-                id_number = self.env["res.partner.id_number"].search(
-                    [
-                        ("category_id", "in", categ.ids),
-                        ("name", "=", ident["value"]),
-                        ("status", "!=", "close"),
-                    ],
-                    limit=1,
-                )
                 if id_number:
                     partner = id_number.partner_id
                     # Search for a contact of this partner
@@ -47,7 +125,7 @@ class BusinessDocumentImport(models.AbstractModel):
                     return id_number.partner_id
                 unmatched.append(
                     _("ID Number: {}\nID Number Category: {}\n\n").format(
-                        ident["value"], ident["schemeID"]
+                        ident[1], ident[0]
                     )
                 )
             if unmatched:
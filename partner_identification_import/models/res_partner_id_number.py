@@ -0,0 +1,44 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+from .business_document_import import ID_NUMBER_CACHE_KIND
+
+
+class ResPartnerIdNumber(models.Model):
+    _inherit = "res.partner.id_number"
+
+    def _clear_match_cache(self):
+        cache = self.env["business.document.import"]._get_match_cache()
+        if cache is not None:
+            cache.drop(ID_NUMBER_CACHE_KIND)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._clear_match_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self._clear_match_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self._clear_match_cache()
+        return super().unlink()
+
+
+class ResPartnerIdCategory(models.Model):
+    _inherit = "res.partner.id_category"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env["res.partner.id_number"]._clear_match_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env["res.partner.id_number"]._clear_match_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env["res.partner.id_number"]._clear_match_cache()
+        return super().unlink()
@@ -1,6 +1,9 @@
 # Copyright 2020 Jacques-Etienne Baudoux <je@bcim.be>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+from unittest import mock
+
+from odoo.exceptions import UserError
 from odoo.tests import common
 
 
@@ -45,3 +48,91 @@ class TestBaseBusinessDocumentImport(common.SavepointCase):
         self.partner_dict["contact"] = "Contact2"
         res = bdio._match_partner(self.partner_dict, warn, partner_type=False)
         self.assertEqual(res, self.partner1)
+
+    def test_match_partner_contact_other_company(self):
+        bdio = self.env["business.document.import"]
+        # A contact with the same name under another company is not matched
+        other_company = self.env["res.partner"].create(
+            {"name": "Other company", "is_company": True}
+        )
+        self.env["res.partner"].create(
+            {"name": "Contact", "parent_id": other_company.id, "type": "contact"}
+        )
+        self.env["res.partner"].create(
+            {"name": "Contact 2", "parent_id": other_company.id, "type": "contact"}
+        )
+        self.partner_dict["contact"] = "Contact"
+        res = bdio._match_partner(self.partner_dict, [], partner_type=False)
+        self.assertEqual(res, self.partner1_contact)
+        self.partner_dict["contact"] = "Contact 2"
+        res = bdio._match_partner(self.partner_dict, [], partner_type=False)
+        self.assertEqual(res, self.partner1)
+
+    def test_match_partner_unmatched(self):
+        bdio = self.env["business.document.import"]
+        # An unknown category is ignored
+        partner_dict = {"id_number": [{"value": "MYEXTID", "schemeID": "UNKNOWN"}]}
+        res = bdio._match_partner(
+            partner_dict, [], partner_type=False, raise_exception=False
+        )
+        self.assertFalse(res)
+        # A known category requires a match
+        partner_dict = {"id_number": [{"value": "OTHERID", "schemeID": "EXTCATEG"}]}
+        with self.assertRaises(UserError):
+            bdio._match_partner(partner_dict, [], partner_type=False)
+        # The cache is updated when an ID number is created
+        partner2 = self.env["res.partner"].create({"name": "Other ID"})
+        self.env["res.partner.id_number"].create(
+            {
+                "category_id": self.partner1.id_numbers.category_id.id,
+                "name": "OTHERID",
+                "partner_id": partner2.id,
+            }
+        )
+        res = bdio._match_partner(partner_dict, [], partner_type=False)
+        self.assertEqual(res, partner2)
+
+    def test_prefetch_match_partners(self):
+        bdio = self.env["business.document.import"]
+        partner_dicts = [
+            self.partner_dict,
+            {"id_number": [{"value": "NOID", "schemeID": "EXTCATEG"}]},
+        ]
+        with bdio._match_cache():
+            bdio._prefetch_match_partners(partner_dicts)
+            with mock.patch.object(
+                type(self.env["res.partner.id_number"]), "search"
+            ) as mocked:
+                res = bdio._match_partner_id_numbers(
+                    [("EXTCATEG", "MYEXTID"), ("EXTCATEG", "NOID")]
+                )
+                mocked.assert_not_called()
+        self.assertEqual(res[("EXTCATEG", "MYEXTID")].partner_id, self.partner1)
+        self.assertFalse(res[("EXTCATEG", "NOID")])
+        # Outside of a match cache block, the ID numbers are searched again
+        with mock.patch.object(
+            type(self.env["res.partner.id_number"]), "search"
+        ) as mocked:
+            bdio._match_partner_id_numbers([("EXTCATEG", "MYEXTID")])
+            mocked.assert_called()
+
+    def test_match_cache_rollback(self):
+        bdio = self.env["business.document.import"]
+        ident = ("EXTCATEG", "TMPID")
+        with bdio._match_cache():
+            with self.assertRaises(UserError):
+                with self.env.cr.savepoint():
+                    self.env["res.partner.id_number"].create(
+                        {
+                            "category_id": self.partner1.id_numbers.category_id.id,
+                            "name": "TMPID",
+                            "partner_id": self.partner1.id,
+                        }
+                    )
+                    res = bdio._match_partner_id_numbers([ident])
+                    self.assertEqual(res[ident].partner_id, self.partner1)
+                    raise UserError("Rollback")
+            # The ID number removed by the rollback is not matched anymore
+            res = bdio._match_partner_id_numbers([ident])
+            self.assertFalse(res[ident])
+            self.assertIsNotNone(res[ident])
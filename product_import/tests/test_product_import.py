@@ -137,6 +137,23 @@ class TestProductImport(TestCommon):
             self.assertEqual(pt_values, expected)
             self.assertEqual(product.seller_ids, product_tmpl.seller_ids)
 
+    def test_product_import_create_product_overridden(self):
+        # A module overriding create_product() gets the line by line import
+        with self._mock("create_product") as mocked:
+            mocked.side_effect = lambda parsed, chatter, seller=None: (
+                self.env["product.product"].create(
+                    {"name": parsed["name"], "barcode": parsed["barcode"]}
+                )
+            )
+            products = self.wiz_model._create_products(
+                self.parsed_catalog, seller=self.supplier
+            )
+        self.assertEqual(mocked.call_count, 3)
+        self.assertEqual(
+            products.mapped("barcode"),
+            [parsed["barcode"] for parsed in PARSED_CATALOG["products"]],
+        )
+
     def test_import_button(self):
         form = self.wiz_form
         with self._mock("_parse_file") as mocked:
@@ -151,3 +168,19 @@ class TestProductImport(TestCommon):
             mocked.assert_not_called()
             wiz.import_button()
             mocked.assert_called()
+
+    def test_import_button_create_product_overridden(self):
+        catalogue = dict(self.parsed_catalog, chatter_msg=[])
+        wiz = self.wiz_model.create(
+            {"product_file": "AA==", "product_filename": "test.xml"}
+        )
+        with self._mock("_parse_file") as mocked_parse, self._mock(
+            "create_product"
+        ) as mocked:
+            mocked_parse.return_value = catalogue
+            mocked.side_effect = lambda parsed, chatter, seller=None: (
+                self.env["product.product"].create({"name": parsed["name"]})
+            )
+            wiz.import_button()
+        self.assertEqual(mocked.call_count, 3)
+        self.assertEqual(catalogue["import_stats"]["lines"], 3)
@@ -2,6 +2,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import logging
+import time
 from base64 import b64decode, b64encode
 from datetime import date, timedelta
 
@@ -9,9 +10,13 @@ from lxml import etree
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import split_every
 
 logger = logging.getLogger(__name__)
 
+# Number of catalogue lines processed together
+PRODUCT_CHUNK_SIZE = 500
+
 
 class ProductImport(models.TransientModel):
     _name = "product.import"
@@ -148,6 +153,42 @@ class ProductImport(models.TransientModel):
             result.append((0, 0, seller_info))
         return result
 
+    @api.model
+    def _prefetch_products(self, parsed_products):
+        """Search the products of a chunk of catalogue lines with a single
+        query on their barcodes, and put them in the match cache of the import
+        (see _create_products()), where _prepare_product() finds them."""
+        barcodes = {
+            parsed_product["barcode"]
+            for parsed_product in parsed_products
+            if parsed_product.get("barcode")
+        }
+        products = (
+            self.env["product.product"]
+            .with_context(active_test=False)
+            .search([("barcode", "in", list(barcodes))])
+        )
+        # Read the existing supplier info of all the products at once
+        products.mapped("seller_ids")
+        by_barcode = {product.barcode: product for product in products}
+        with self._bdimport._match_cache() as cache:
+            for barcode in barcodes:
+                cache.set(
+                    "product_import_barcode",
+                    barcode,
+                    by_barcode.get(barcode, self.env["product.product"]),
+                )
+
+    @api.model
+    def _search_product(self, barcode):
+        return self._bdimport._match_cache_get(
+            "product_import_barcode",
+            barcode,
+            lambda: self.env["product.product"]
+            .with_context(active_test=False)
+            .search([("barcode", "=", barcode)], limit=1),
+        )
+
     @api.model
     def _prepare_product(self, parsed_product, chatter_msg, seller=None):
         # Important: barcode is unique key of product.template model
@@ -159,11 +200,7 @@ class ProductImport(models.TransientModel):
                 _("Cannot import product without barcode: %s") % (parsed_product,)
             )
             return False
-        product = (
-            self.env["product.product"]
-            .with_context(active_test=False)
-            .search([("barcode", "=", parsed_product["barcode"])], limit=1)
-        )
+        product = self._search_product(parsed_product["barcode"])
         uom = self._bdimport._match_uom(parsed_product["uom"], chatter_msg)
         currency = self._bdimport._match_currency(
             parsed_product["currency"], chatter_msg
@@ -196,6 +233,12 @@ class ProductImport(models.TransientModel):
 
     @api.model
     def create_product(self, parsed_product, chatter_msg, seller=None):
+        """Create or update the product of a single catalogue line.
+
+        Deprecated: the catalogues are imported by chunks with
+        _create_update_products_chunk(). This method is only called, line by
+        line, when a module overrides it (see _create_products()).
+        """
         product_vals = self._prepare_product(parsed_product, chatter_msg, seller=seller)
         if not product_vals:
             return False
@@ -214,10 +257,210 @@ class ProductImport(models.TransientModel):
             logger.info("Product %d created", product.id)
         return product
 
+    @api.model
+    def _get_product_changed_vals(self, product, product_vals):
+        """Only keep the values that differ from the existing product"""
+        changed_vals = {}
+        for field_name, value in product_vals.items():
+            field = product._fields[field_name]
+            if field.convert_to_write(product[field_name], product) != value:
+                changed_vals[field_name] = value
+        return changed_vals
+
+    @api.model
+    def _create_update_products_chunk(
+        self, parsed_products, seller, chatter_msg, stats
+    ):
+        """Create or update the products of a chunk of catalogue lines
+        with batched create() and write() calls.
+
+        :return: list of the products of the chunk
+        """
+        # The same barcode twice in a chunk would create 2 products:
+        # the repeated lines are processed afterwards, as updates
+        seen_barcodes = set()
+        first_lines, repeated_lines = [], []
+        for parsed_product in parsed_products:
+            barcode = parsed_product.get("barcode")
+            if barcode and barcode in seen_barcodes:
+                repeated_lines.append(parsed_product)
+            else:
+                first_lines.append(parsed_product)
+                seen_barcodes.add(barcode)
+        self._prefetch_products(first_lines)
+        lines = []
+        for parsed_product in first_lines:
+            product_vals = self._prepare_product(
+                parsed_product, chatter_msg, seller=seller
+            )
+            if not product_vals:
+                stats["skipped"] += 1
+                continue
+            lines.append(product_vals)
+        self._create_chunk_products(
+            [vals for vals in lines if not vals.get("recordset")], stats
+        )
+        self._update_chunk_products(lines, stats)
+        self._create_update_chunk_supplierinfos(lines, stats)
+        products = [vals["recordset"] for vals in lines]
+        if repeated_lines:
+            self.env["product.product"].invalidate_cache()
+            products += self._create_update_products_chunk(
+                repeated_lines, seller, chatter_msg, stats
+            )
+        return products
+
+    @api.model
+    def _create_chunk_products(self, lines, stats):
+        """Create the new products with a single create()"""
+        if not lines:
+            return
+        ppo = self.env["product.product"]
+        products = ppo.create(
+            [
+                {
+                    key: value
+                    for key, value in vals.items()
+                    if key not in ("active", "seller_ids")
+                }
+                for vals in lines
+            ]
+        )
+        # Products created first, then archived in order to replicate
+        # all characteristics into product.template
+        to_archive = ppo.browse(
+            [product.id for product, vals in zip(products, lines) if not vals["active"]]
+        )
+        if to_archive:
+            to_archive.flush()
+            to_archive.action_archive()
+        for product, vals in zip(products, lines):
+            vals["recordset"] = product
+            vals["created"] = True
+        stats["created"] += len(products)
+
+    @api.model
+    def _update_chunk_products(self, lines, stats):
+        """Write the existing products, only when something changed"""
+        for vals in lines:
+            if vals.get("created"):
+                continue
+            product = vals["recordset"]
+            changed_vals = self._get_product_changed_vals(
+                product,
+                {
+                    key: value
+                    for key, value in vals.items()
+                    if key not in ("recordset", "seller_ids")
+                },
+            )
+            if changed_vals:
+                product.write(changed_vals)
+                stats["updated"] += 1
+            else:
+                stats["unchanged"] += 1
+
+    @api.model
+    def _create_update_chunk_supplierinfos(self, lines, stats):
+        """Turn the seller_ids commands of the chunk into one create()
+        and one write() per set of values"""
+        psio = self.env["product.supplierinfo"]
+        to_create = []
+        to_write = {}
+        for vals in lines:
+            product_tmpl_id = vals["recordset"].product_tmpl_id.id
+            for command in vals["seller_ids"]:
+                if command[0] == 0:
+                    to_create.append(dict(command[2], product_tmpl_id=product_tmpl_id))
+                elif command[0] == 1:
+                    key = tuple(sorted(command[2].items()))
+                    to_write.setdefault(key, []).append(command[1])
+        if to_create:
+            psio.create(to_create)
+            stats["supplierinfo_created"] += len(to_create)
+        for key, supplierinfo_ids in to_write.items():
+            psio.browse(supplierinfo_ids).write(dict(key))
+            stats["supplierinfo_updated"] += len(supplierinfo_ids)
+
     @api.model
     def _create_products(self, catalogue, seller, filename=None):
+        """Create or update the products of the catalogue, by chunks.
+
+        catalogue["products"] can be a list or an iterator (streaming parser)
+        """
+        if self._is_create_product_overridden():
+            return self._create_products_by_line(catalogue, seller, filename=filename)
+        start = time.perf_counter()
+        product_ids = []
+        stats = {
+            "lines": 0,
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "skipped": 0,
+            "supplierinfo_created": 0,
+            "supplierinfo_updated": 0,
+        }
+        # The UoMs and currencies are matched once for the whole import
+        with self._bdimport._match_cache():
+            for parsed_products in split_every(
+                PRODUCT_CHUNK_SIZE, catalogue.get("products") or [], list
+            ):
+                products = self._create_update_products_chunk(
+                    parsed_products, seller, catalogue["chatter_msg"], stats
+                )
+                product_ids += [product.id for product in products]
+                stats["lines"] += len(parsed_products)
+                logger.info(
+                    "Product import: %d catalogue lines processed", stats["lines"]
+                )
+                # Free the memory of the processed chunk
+                self.env["product.product"].invalidate_cache()
+        stats["duration"] = time.perf_counter() - start
+        logger.info(
+            "Product import for vendor %d: %d catalogue lines processed in %.1fs, "
+            "%d products created, %d updated, %d unchanged, %d skipped, "
+            "%d supplier prices created, %d ended",
+            seller.id,
+            stats["lines"],
+            stats["duration"],
+            stats["created"],
+            stats["updated"],
+            stats["unchanged"],
+            stats["skipped"],
+            stats["supplierinfo_created"],
+            stats["supplierinfo_updated"],
+        )
+        catalogue["chatter_msg"].append(
+            _(
+                "Catalogue import: %(lines)d lines processed in %(duration).1fs, "
+                "%(created)d products created, %(updated)d updated, "
+                "%(unchanged)d unchanged, %(skipped)d skipped."
+            )
+            % stats
+        )
+        catalogue["import_stats"] = stats
+        self._bdimport.post_create_or_update(catalogue, seller, doc_filename=filename)
+        logger.info("Products updated for vendor %d", seller.id)
+        # Same result as the union of the products, in the catalogue order
+        return self.env["product.product"].browse(list(dict.fromkeys(product_ids)))
+
+    @api.model
+    def _is_create_product_overridden(self):
+        return type(self).create_product is not ProductImport.create_product
+
+    @api.model
+    def _create_products_by_line(self, catalogue, seller, filename=None):
+        """Former import, which calls create_product() for each line"""
+        logger.warning(
+            "create_product() is overridden: the products are imported line "
+            "by line. Override _prepare_product() or the methods of the chunks "
+            "instead, to import them in batch."
+        )
+        start = time.perf_counter()
         products = self.env["product.product"].browse()
-        for product in catalogue.get("products"):
+        lines = 0
+        for product in catalogue.get("products") or []:
             record = self.create_product(
                 product,
                 catalogue["chatter_msg"],
@@ -225,6 +468,11 @@ class ProductImport(models.TransientModel):
             )
             if record:
                 products |= record
+            lines += 1
+        catalogue["import_stats"] = {
+            "lines": lines,
+            "duration": time.perf_counter() - start,
+        }
         self._bdimport.post_create_or_update(catalogue, seller, doc_filename=filename)
         logger.info("Products updated for vendor %d", seller.id)
         return products
@@ -240,4 +488,8 @@ class ProductImport(models.TransientModel):
         self.with_context(product_company_id=company_id)._create_products(
             catalogue, seller, filename=self.product_filename
         )
+        # With a streaming parser, we only know at the end
+        # if the catalogue had lines
+        if not catalogue["import_stats"]["lines"]:
+            raise UserError(_("This catalogue doesn't have any product!"))
         return {"type": "ir.actions.act_window_close"}
@@ -1,8 +1,12 @@
 # Copyright 2022 Camptocamp
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import base64
+
+from lxml import etree
+
 from odoo.tests.common import SavepointCase
-from odoo.tools import mute_logger
+from odoo.tools import file_open, mute_logger
 
 from .common import get_test_data
 
@@ -61,3 +65,39 @@ class TestUblOrderImport(SavepointCase):
                     self.assertEqual(supplierinfo.company_id, p_expect["company"])
                 else:
                     self.assertFalse(supplierinfo.company_id)
+
+    def test_ubl_catalogue_stream(self):
+        wiz_model = self.env["product.import"]
+        for filename in get_test_data(self.env):
+            path = f"product_import_ubl/tests/files/{filename}"
+            with file_open(path, "rb") as fobj:
+                data = fobj.read()
+            catalogue = wiz_model.parse_ubl_catalogue(etree.fromstring(data))
+            stream = wiz_model._parse_file(filename, data)
+            self.assertNotIsInstance(stream["products"], list)
+            stream["products"] = list(stream["products"])
+            self.assertEqual(stream, catalogue)
+
+    @mute_logger("odoo.addons.product_import.wizard.product_import")
+    def test_ubl_catalogue_import_twice(self):
+        filename = "UBL-Catalogue_Example.xml"
+        expected = get_test_data(self.env)[filename]
+        wiz = self.env["product.import"].create(
+            {
+                "product_file": expected._as_base64(),
+                "product_filename": filename,
+            }
+        )
+        wiz.import_button()
+        products_before = self._all_products()
+        catalogue = wiz.parse_product_catalogue(
+            base64.b64decode(wiz.product_file), filename
+        )
+        products = wiz._create_products(catalogue, self.supplier)
+        self.assertEqual(self._all_products(), products_before)
+        self.assertEqual(len(products), len(expected["products"]))
+        stats = catalogue["import_stats"]
+        self.assertEqual(stats["lines"], len(expected["products"]))
+        self.assertEqual(stats["created"], 0)
+        self.assertEqual(stats["updated"], 0)
+        self.assertEqual(stats["unchanged"], len(expected["products"]))
@@ -1,13 +1,23 @@
 # Copyright 2022 Camptocamp
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import logging
+from io import BytesIO
+
 from lxml import etree
 
-from odoo import api, models
+from odoo import _, api, models
+from odoo.exceptions import UserError
 from odoo.tools import str2bool
 
+logger = logging.getLogger(__name__)
+
 CATALOGUE_NS = "urn:oasis:names:specification:ubl:schema:xsd:Catalogue-2"
 CATALOGUE_TAG = "{%s}Catalogue" % CATALOGUE_NS
+CATALOGUE_LINE_TAG = (
+    "{urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2}"
+    "CatalogueLine"
+)
 
 
 class XPathGetter(object):
@@ -39,6 +49,30 @@ class XPathGetter(object):
 class ProductImport(models.TransientModel):
     _inherit = "product.import"
 
+    def _parse_file(self, filename, filecontent, detect_doc_type=False):
+        # UBL catalogues are streamed instead of being loaded in memory
+        if filename and self._is_ubl_catalogue_file(filecontent):
+            if detect_doc_type:
+                return "catalogue"
+            return self.parse_ubl_catalogue_stream(filecontent)
+        return super()._parse_file(
+            filename, filecontent, detect_doc_type=detect_doc_type
+        )
+
+    @api.model
+    def _is_ubl_catalogue_file(self, filecontent):
+        """Only read the root tag of the file"""
+        if not filecontent:
+            return False
+        try:
+            for _event, element in etree.iterparse(
+                BytesIO(filecontent), events=("start",)
+            ):
+                return element.tag == CATALOGUE_TAG
+        except etree.XMLSyntaxError:
+            return False
+        return False
+
     @api.model
     def parse_xml_catalogue(self, xml_root, detect_doc_type=False):
         if xml_root.tag == CATALOGUE_TAG:
@@ -107,11 +141,8 @@ class ProductImport(models.TransientModel):
         line_name = f"cac:{document}Line"
 
         # Validate content according to xsd file
-        xml_string = etree.tostring(
-            xml_root, pretty_print=True, encoding="UTF-8", xml_declaration=True
-        )
         ubl._ubl_check_xml_schema(
-            xml_string, document, version=ubl._ubl_get_version(xml_root, root_name, ns)
+            xml_root, document, version=ubl._ubl_get_version(xml_root, root_name, ns)
         )
         # Parse content
         xroot = XPathGetter(xml_root, ns)
@@ -133,3 +164,86 @@ class ProductImport(models.TransientModel):
             "products": res_lines,
         }
         return res
+
+    @api.model
+    def _parse_ubl_catalogue_header(self, filecontent):
+        """Parse the file until the first catalogue line
+
+        :return: root element, without any catalogue line
+        """
+        xml_root = None
+        try:
+            for event, element in etree.iterparse(
+                BytesIO(filecontent), events=("start", "end")
+            ):
+                if xml_root is None:
+                    xml_root = element
+                elif event == "start" and element.tag == CATALOGUE_LINE_TAG:
+                    break
+        except etree.XMLSyntaxError:
+            raise UserError(_("This XML file is not XML-compliant"))
+        # The parser reads ahead: remove the lines already (partially) parsed
+        for line in list(xml_root.iterchildren(CATALOGUE_LINE_TAG)):
+            xml_root.remove(line)
+        return xml_root
+
+    @api.model
+    def _iter_ubl_catalogue_lines(self, filecontent, ns, version):
+        """Parse and validate the catalogue lines one by one,
+        the processed lines are removed from memory"""
+        ubl = self.env["base.ubl"]
+        schema = ubl._ubl_get_xml_schema("Catalogue", version=version)
+        context = etree.iterparse(
+            BytesIO(filecontent),
+            events=("end",),
+            tag=CATALOGUE_LINE_TAG,
+            schema=schema,
+        )
+        try:
+            for _event, line in context:
+                yield self.parse_ubl_catalogue_line(line, ns)
+                line.clear()
+                while line.getprevious() is not None:
+                    del line.getparent()[0]
+        except etree.XMLSyntaxError as e:
+            logger.warning("The XML file is invalid against the XML Schema Definition")
+            logger.warning(e)
+            raise UserError(
+                _(
+                    "The UBL XML file is not valid against the official "
+                    "XML Schema Definition. Here is the error, which may "
+                    "give you an idea on the cause of the problem : %s."
+                )
+                % str(e)
+            )
+        finally:
+            del context
+
+    @api.model
+    def parse_ubl_catalogue_stream(self, filecontent):
+        """Same as parse_ubl_catalogue(), but "products" is an iterator
+        parsing the catalogue lines on the fly: the memory used does not
+        depend on the number of lines of the catalogue.
+        The XML schema is validated while reading the lines.
+        """
+        ubl = self.env["base.ubl"]
+        xml_root = self._parse_ubl_catalogue_header(filecontent)
+        ns = xml_root.nsmap
+        # Empty namespace prefix is not supported in XPath
+        ns["main"] = ns.pop(None)
+        assert ns["main"] == CATALOGUE_NS
+        root_name = "main:Catalogue"
+        version = ubl._ubl_get_version(xml_root, root_name, ns)
+        xroot = XPathGetter(xml_root, ns)
+        company_xpath = xroot.get(f"/{root_name}/cac:ReceiverParty")
+        company_dict = ubl.ubl_parse_party(company_xpath, ns)
+        supplier_xpath = xroot.get(f"/{root_name}/cac:SellerSupplierParty")
+        supplier_dict = ubl.ubl_parse_supplier_party(supplier_xpath, ns)
+        return {
+            "doc_type": "catalogue",
+            "date": xroot.text(f"/{root_name}/cbc:IssueDate"),
+            "ref": xroot.text(f"/{root_name}/cbc:ID"),
+            "company": company_dict,
+            "seller": supplier_dict,
+            "products": self._iter_ubl_catalogue_lines(filecontent, ns, version),
+        }
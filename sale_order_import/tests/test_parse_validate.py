@@ -118,6 +118,41 @@ class TestParsingValidation(TestCommon):
             self.assertTrue(isinstance(xml_root, etree._Element))
             self.assertTrue(error_msg is None)
 
+    def test_parse_xml_detect_doc_type(self):
+        xml_data = (
+            b"<?xml version='1.0' encoding='utf-8'?><root xmlns='urn:test'>"
+            + b"<foo>baz</foo>" * 1000
+            + b"</root>"
+        )
+        mock_parse_order = mock.patch.object(type(self.wiz_model), "parse_xml_order")
+        with mock_parse_order as mocked:
+            mocked.return_value = "rfq"
+            xml_root, error_msg = self.wiz_model._parse_xml(
+                xml_data, detect_doc_type=True
+            )
+            self.assertEqual(xml_root.tag, "{urn:test}root")
+            # The children are not parsed to detect the type of document
+            self.assertEqual(len(xml_root), 0)
+            self.assertTrue(error_msg is None)
+
+    def test_parse_order_cached(self):
+        xml_data = b"<?xml version='1.0' encoding='utf-8'?><root><foo>baz</foo></root>"
+        wiz = self.wiz_model.create(
+            {"order_file": base64.b64encode(xml_data), "order_filename": "test.xml"}
+        )
+        mock_parse_file = mock.patch.object(type(self.wiz_model), "_parse_file")
+        with mock_parse_file as mocked:
+            mocked.return_value = {"order_ref": "PO1", "lines": []}
+            parsed_order = wiz.parse_order(xml_data, "test.xml")
+            self.assertEqual(parsed_order["order_ref"], "PO1")
+            parsed_order["chatter_msg"].append("Updated by the caller")
+            parsed_order = wiz.parse_order(xml_data, "test.xml")
+            self.assertEqual(mocked.call_count, 1)
+            self.assertEqual(parsed_order["chatter_msg"], [])
+            # Another file is parsed again
+            wiz.parse_order(xml_data + b"\n", "test.xml")
+            self.assertEqual(mocked.call_count, 2)
+
     def test_parse_pdf_bad(self):
         pdf_data = self.read_test_file("test.pdf", mode="rb", as_b64=True)
         mock_pdf_get_xml_files = mock.patch.object(
@@ -4,9 +4,12 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import hashlib
+import json
 import logging
 import mimetypes
 from base64 import b64decode, b64encode
+from io import BytesIO
 
 from lxml import etree
 
@@ -53,6 +56,10 @@ class SaleOrderImport(models.TransientModel):
         "res.partner", string="Shipping Address", readonly=True
     )
     sale_id = fields.Many2one("sale.order", string="Quotation to Update")
+    # Result of the parsing of the order file, reused by the next steps
+    # of the wizard as long as the file doesn't change
+    parsed_order_key = fields.Char(readonly=True)
+    parsed_order_cache = fields.Text(readonly=True)
 
     @api.onchange("order_file")
     def order_file_change(self):
@@ -85,7 +92,9 @@ class SaleOrderImport(models.TransientModel):
         if filetype and mimetype in supported_types["CSV"]:
             res = False
         elif filetype and mimetype in supported_types["XML"]:
-            xml_root, error_msg = self._parse_xml(filecontent)
+            xml_root, error_msg = self._parse_xml(
+                filecontent, detect_doc_type=detect_doc_type
+            )
             if (xml_root is None or not len(xml_root)) and error_msg:
                 raise UserError(error_msg)
             res = self.parse_xml_order(xml_root, detect_doc_type=detect_doc_type)
@@ -105,12 +114,20 @@ class SaleOrderImport(models.TransientModel):
         }
 
     @api.model
-    def _parse_xml(self, data):
+    def _parse_xml(self, data, detect_doc_type=False):
+        """Parse the XML data.
+
+        To only detect the type of document, the root element is read
+        from the beginning of the data, without its children.
+        """
         if not data:
             return None, _("No data provided")
         xml_root = None
         try:
-            xml_root = etree.fromstring(data)
+            if detect_doc_type:
+                xml_root = self._sniff_xml_root(data)
+            else:
+                xml_root = etree.fromstring(data)
             error_msg = None
         except etree.XMLSyntaxError:
             error_msg = _("This XML file is not XML-compliant")
@@ -121,6 +138,16 @@ class SaleOrderImport(models.TransientModel):
             error_msg = _("Unsupported XML document")
         return xml_root, error_msg
 
+    @api.model
+    def _sniff_xml_root(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        for _event, element in etree.iterparse(BytesIO(data), events=("start",)):
+            return etree.Element(
+                element.tag, attrib=element.attrib, nsmap=element.nsmap
+            )
+        return None
+
     # FIXME: not used at all
     @api.model
     def get_xml_doc_type(self, xml_root):  # pragma: no cover
@@ -257,6 +284,10 @@ class SaleOrderImport(models.TransientModel):
             so_vals["partner_invoice_id"] = invoicing_partner.id
         if parsed_order.get("date"):
             so_vals["date_order"] = parsed_order["date"]
+        bdio._prefetch_match_products(
+            [line["product"] for line in parsed_order["lines"]]
+        )
+        bdio._prefetch_match_uoms([line.get("uom") for line in parsed_order["lines"]])
         for line in parsed_order["lines"]:
             # partner=False because we don't want to use product.supplierinfo
             product = bdio._match_product(
@@ -316,7 +347,8 @@ class SaleOrderImport(models.TransientModel):
     def create_order(self, parsed_order, price_source, order_filename=None):
         soo = self.env["sale.order"].with_context(mail_create_nosubscribe=True)
         bdio = self.env["business.document.import"]
-        so_vals = self._prepare_order(parsed_order, price_source)
+        with bdio._match_cache():
+            so_vals = self._prepare_order(parsed_order, price_source)
         order = soo.create(so_vals)
         bdio.post_create_or_update(parsed_order, order, doc_filename=order_filename)
         logger.info("Sale Order ID %d created", order.id)
@@ -332,9 +364,27 @@ class SaleOrderImport(models.TransientModel):
         )
         return order.id
 
+    def _parse_file_cached(self, filename, filecontent):
+        """Parse the order file, or reuse the result of the previous parsing
+        of the same file by this wizard."""
+        if len(self) != 1:
+            return self._parse_file(filename, filecontent)
+        key = "{}:{}".format(hashlib.sha1(filecontent).hexdigest(), filename)
+        if self.parsed_order_key == key and self.parsed_order_cache:
+            return json.loads(self.parsed_order_cache)
+        parsed_order = self._parse_file(filename, filecontent)
+        try:
+            cache = json.dumps(parsed_order)
+        except (TypeError, ValueError):
+            logger.debug("Parsed order of %s can't be cached", filename)
+            return parsed_order
+        self.write({"parsed_order_key": key, "parsed_order_cache": cache})
+        # Return a copy, the caller updates the parsed order
+        return json.loads(cache)
+
     @api.model
     def parse_order(self, order_file, order_filename, partner=False):
-        parsed_order = self._parse_file(order_filename, order_file)
+        parsed_order = self._parse_file_cached(order_filename, order_file)
         logger.debug("Result of order parsing: %s", parsed_order)
         defaults = (
             ("attachments", {}),
@@ -640,7 +690,11 @@ class SaleOrderImport(models.TransientModel):
         )
         if vals:
             order.write(vals)
-        self.update_order_lines(parsed_order, order, self.price_source)
+        with bdio._match_cache():
+            bdio._prefetch_match_products(
+                [line["product"] for line in parsed_order["lines"]]
+            )
+            self.update_order_lines(parsed_order, order, self.price_source)
         bdio.post_create_or_update(parsed_order, order)
         logger.info(
             "Quotation ID %d updated via import of file %s",
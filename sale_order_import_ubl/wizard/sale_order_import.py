@@ -1,8 +1,6 @@
 # © 2016-2017 Akretion (Alexis de Lattre <alexis.delattre@akretion.com>)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from lxml import etree
-
 from odoo import api, models
 from odoo.tools import float_is_zero
 
@@ -84,11 +82,8 @@ class SaleOrderImport(models.TransientModel):
             line_name = "cac:OrderLine"
             doc_type = "order"
         # Validate content according to xsd file
-        xml_string = etree.tostring(
-            xml_root, pretty_print=True, encoding="UTF-8", xml_declaration=True
-        )
         self._ubl_check_xml_schema(
-            xml_string, document, version=self._ubl_get_version(xml_root, root_name, ns)
+            xml_root, document, version=self._ubl_get_version(xml_root, root_name, ns)
         )
         # Parse content
         date_xpath = xml_root.xpath("/%s/cbc:IssueDate" % root_name, namespaces=ns)